@@ -1,17 +1,872 @@
+import gc
+import hashlib
+import heapq
 import json
+import math
+import mmap
 import os
+import pickle
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from collections.abc import Mapping
+from urllib.parse import urlparse
+
+# 部位数据 schema 与清单格式由爬虫与分析器共用同一模块（mhws_Wiki_Crawler/src/dataset_schema.py）
+_SCHEMA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mhws_Wiki_Crawler', 'src')
+if _SCHEMA_DIR not in sys.path:
+    sys.path.append(_SCHEMA_DIR)
+import dataset_schema  # noqa: E402
+from dataset_schema import (  # noqa: E402
+    MANIFEST_NAME, NON_MONSTER_FILES, STAGING_DIR, entry_matches, hitzone_rows, normalize_row, read_committed_manifest,
+)
+
+# 掉落率文本中的数字，如 "30%"、"2 x 12%"、"12.5 %"
+_RATE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+_NUM_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
+def parse_rate(text):
+    """把掉落率文本解析为百分数（float），无法解析时返回 None。
+
+    带 % 的取最后一个百分数（"2 x 12%" -> 12.0），否则取第一个数字。
+    """
+    if isinstance(text, (int, float)):
+        return float(text)
+    if not text:
+        return None
+    s = str(text)
+    found = _RATE_RE.findall(s)
+    if found:
+        return float(found[-1])
+    m = _NUM_RE.search(s)
+    return float(m.group()) if m else None
+
+
+def _normalize(text):
+    return ''.join(str(text).split()).lower()
+
+
+def _bigrams(text):
+    """按字符切分二元组（中文素材名没有分词边界），单字返回自身。"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _drop_order(d):
+    # 掉落率降序，无法解析的排最后
+    return (d[0] is None, -(d[0] or 0))
+
+
+class DropIndex:
+    """素材名 -> 掉落怪物的倒排索引。
+
+    加载时把每条掉落记录解析为 (掉落率, 怪物, 数据源)，按素材名归并并预先按掉落率降序排好；
+    另建单字与二元组 -> 素材名的倒排表，用于部分匹配（如 "逆鳞" 命中 "火龙的逆鳞"）。
+    """
+
+    def __init__(self):
+        self._names = []       # 素材 id -> 原始素材名
+        self._keys = []        # 素材 id -> 归一化后的素材名
+        self._ids = {}         # 归一化素材名 -> 素材 id
+        self._drops = []       # 素材 id -> [(掉落率, 怪物, 数据源), ...]
+        self._grams = {}       # 单字/二元组 -> {素材 id}
+        self._sorted = True
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, source, monster, materials):
+        """加入一只怪物的 materials 列表（爬虫输出的 name/rate 字段）。"""
+        best = {}
+        for m in materials or ():
+            if not isinstance(m, dict):
+                continue
+            name = str(m.get('name', '')).strip()
+            key = _normalize(name)
+            if not key:
+                continue
+            rate = parse_rate(m.get('rate'))
+            # 同一怪物的同名素材（不同取得方式/等级）只保留最高掉落率
+            if key not in best or (rate is not None and (best[key][1] is None or rate > best[key][1])):
+                best[key] = (name, rate)
+        for key, (name, rate) in best.items():
+            mid = self._ids.get(key)
+            if mid is None:
+                mid = len(self._names)
+                self._ids[key] = mid
+                self._names.append(name)
+                self._keys.append(key)
+                self._drops.append([])
+                for g in _bigrams(key) | set(key):
+                    self._grams.setdefault(g, set()).add(mid)
+            self._drops[mid].append((rate, monster, source))
+        self._sorted = False
+
+    def finalize(self):
+        """按掉落率排好每个素材的掉落列表（add 之后首次查询前调用一次；沿用已排好的索引时直接返回）"""
+        if self._sorted:
+            return
+        for drops in self._drops:
+            drops.sort(key=lambda d: _drop_order(d) + (d[1], d[2]))
+        self._sorted = True
+
+    def _match_ids(self, key):
+        mid = self._ids.get(key)
+        if mid is not None:
+            return [mid]
+        grams = _bigrams(key)
+        if not grams:
+            return []
+        postings = sorted((self._grams.get(g, ()) for g in grams), key=len)
+        if not postings[0]:
+            return []
+        if len(postings) == 1:
+            return list(postings[0])
+        # 二元组交集可能误中（字符都出现但不连续），再核对一次子串
+        cands = set(postings[0]).intersection(*postings[1:])
+        return [i for i in cands if key in self._keys[i]]
+
+    def search(self, query, source=None, limit=None):
+        """返回 (命中总数, [(素材名, 掉落率, 怪物, 数据源), ...])，列表按掉落率降序，最多 limit 条。
+
+        查询与某个素材名完全一致时只返回该素材，否则返回所有包含查询串的素材。
+        """
+        if not self._sorted:
+            self.finalize()
+        total = 0
+        rows = []
+        for mid in self._match_ids(_normalize(query)):
+            drops = self._drops[mid]
+            if source is not None:
+                drops = [d for d in drops if d[2] == source]
+            total += len(drops)
+            # 每个素材的掉落列表已预先排序，只需取前 limit 条参与合并
+            name = self._names[mid]
+            rows.extend((name, d) for d in (drops if limit is None else drops[:limit]))
+        key = lambda r: _drop_order(r[1]) + (r[0], r[1][1], r[1][2])
+        rows = sorted(rows, key=key) if limit is None else heapq.nsmallest(limit, rows, key=key)
+        return total, [(name, rate, monster, src) for name, (rate, monster, src) in rows]
+
+
+# 推荐引擎打分的肉质列：物理三种 + 五属性
+PHYSICAL_KEYS = ('斩', '打', '弹')
+ELEMENT_KEYS = ('火', '水', '雷', '冰', '龙')
+SCORE_KEYS = PHYSICAL_KEYS + ELEMENT_KEYS
+# 排行使用的常态状态名（mhws 的空状态记为 正常，mhwi 为 基本）
+PRIMARY_STATES = ('正常', '基本')
+
+
+def _to_float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+class RecommendIndex:
+    """按怪物/状态预先计算的物理与属性有效值，以及按各列排好序的排行。
+
+    每个状态的得分为该状态下各部位肉质的平均值；加权得分按部位 HP 加权（HP 取自同名部位任一行，
+    缺失 HP 的部位按该怪物已知部位 HP 的均值计，全部缺失时与不加权相同）。
+    排行与"A 优于 B"列表只针对常态（正常/基本），查询时直接切片。
+    """
+
+    def __init__(self):
+        # {(source, 怪物): {状态: (不加权得分, 加权得分)}}，得分为与 SCORE_KEYS 对齐的元组，无数据为 None
+        self._scores = {}
+        self._rankings = {}  # {(source, 列, 加权): [(得分, 怪物), ...]}，得分降序
+        self._beats = {}  # {(source, 列A, 列B, 加权): [(差值, 怪物, A 得分, B 得分), ...]}，仅 A > B，差值降序
+
+    def __len__(self):
+        return len(self._scores)
+
+    def add(self, source, monster, rows):
+        """加入一只怪物的部位数据（已归一化为 部位/列1/斩…龙/HP 字段）"""
+        rows = [r for r in rows or () if isinstance(r, dict)]
+        hp_by_part = {}
+        for row in rows:
+            hp = _to_float(row.get('HP'))
+            if hp and hp > 0:
+                hp_by_part.setdefault(row.get('部位', ''), hp)
+        default_hp = sum(hp_by_part.values()) / len(hp_by_part) if hp_by_part else 1.0
+        n = len(SCORE_KEYS)
+        # {状态: [和, 个数, 加权和, 权重和]}，每项为与 SCORE_KEYS 对齐的列表，一次遍历累加
+        acc = {}
+        for row in rows:
+            w = hp_by_part.get(row.get('部位', ''), default_hp)
+            state = row.get('列1') or '正常'
+            sums = acc.get(state)
+            for i, k in enumerate(SCORE_KEYS):
+                v = _to_float(row.get(k))
+                if v is None:
+                    continue
+                if sums is None:
+                    sums = acc[state] = [[0.0] * n, [0] * n, [0.0] * n, [0.0] * n]
+                total, count, wsum, wtotal = sums
+                total[i] += v
+                count[i] += 1
+                wsum[i] += v * w
+                wtotal[i] += w
+        if acc:
+            self._scores[(source, monster)] = {
+                state: (tuple(t / c if c else None for t, c in zip(total, count)),
+                        tuple(s / wt if wt else None for s, wt in zip(wsum, wtotal)))
+                for state, (total, count, wsum, wtotal) in acc.items()
+            }
+
+    def reuse(self, other, source, monster):
+        """沿用另一个索引中已计算的得分（文件未变时），成功返回 True"""
+        states = other._scores.get((source, monster))
+        if states is None:
+            return False
+        self._scores[(source, monster)] = states
+        return True
+
+    @staticmethod
+    def _primary(states):
+        for st in PRIMARY_STATES:
+            if st in states:
+                return st
+        return next(iter(states))
+
+    def finalize(self):
+        """生成各数据源按列与物理两两比较的排行"""
+        self._rankings = {}
+        self._beats = {}
+        for (source, monster), states in self._scores.items():
+            for weighted in (False, True):
+                scores = states[self._primary(states)][1 if weighted else 0]
+                for i, key in enumerate(SCORE_KEYS):
+                    if scores[i] is not None:
+                        self._rankings.setdefault((source, key, weighted), []).append((scores[i], monster))
+                for i, a in enumerate(PHYSICAL_KEYS):
+                    for j, b in enumerate(PHYSICAL_KEYS):
+                        if i != j and scores[i] is not None and scores[j] is not None and scores[i] > scores[j]:
+                            self._beats.setdefault((source, a, b, weighted), []).append(
+                                (scores[i] - scores[j], monster, scores[i], scores[j]))
+        for ranking in self._rankings.values():
+            ranking.sort(key=lambda r: (-r[0], r[1]))
+        for ranking in self._beats.values():
+            ranking.sort(key=lambda r: (-r[0], r[1]))
+
+    def scores(self, source, monster, state=None, weighted=False):
+        """返回 {列: 得分}；state 为空时取常态，找不到时返回 None"""
+        states = self._scores.get((source, monster))
+        if not states:
+            return None
+        st = state or self._primary(states)
+        if st not in states:
+            return None
+        return dict(zip(SCORE_KEYS, states[st][1 if weighted else 0]))
+
+    def states(self, source, monster):
+        return list(self._scores.get((source, monster), ()))
+
+    def ranking(self, source, key, weighted=False):
+        return self._rankings.get((source, key, weighted), [])
+
+    def beats(self, source, a, b, weighted=False):
+        return self._beats.get((source, a, b, weighted), [])
+
+    def best_elements(self, source, monsters, weighted=False):
+        """对一组怪物（如接下来要狩猎的几只）按常态属性得分求平均，返回 (属性排行, 各怪物最佳属性, 未找到的怪物)"""
+        sums = dict.fromkeys(ELEMENT_KEYS, 0.0)
+        counts = dict.fromkeys(ELEMENT_KEYS, 0)
+        per_monster = []
+        missing = []
+        for name in monsters:
+            scores = self.scores(source, name, weighted=weighted)
+            if scores is None:
+                missing.append(name)
+                continue
+            best = None
+            for k in ELEMENT_KEYS:
+                v = scores[k]
+                if v is None:
+                    continue
+                sums[k] += v
+                counts[k] += 1
+                if best is None or v > best[1]:
+                    best = (k, v)
+            per_monster.append((name, best))
+        ranked = sorted(((k, sums[k] / counts[k]) for k in ELEMENT_KEYS if counts[k]), key=lambda r: -r[1])
+        return ranked, per_monster, missing
+
+
+class DamageTable:
+    """伤害计算用的列式肉质表：每个数据源把所有怪物的全部部位/状态展开成若干等长数组。
+
+    物理肉质缺失记为 NaN（该行不参与计算），属性肉质缺失记为 0；
+    同一怪物的行连续存放，单只怪物的查询只计算对应切片，全图鉴查询一次遍历整列。
+    插件不依赖 numpy，列运算是对 array 切片的列表推导，排行取前 N 用 heapq.nlargest。
+    """
+
+    def __init__(self, meat_data):
+        # {source: {列: array('d'), 'monster'/'part'/'state': [...], 'spans': {怪物: (起, 止)}}}
+        self._tables = {}
+        # 肉质取值重复度很高，同一文本只解析一次
+        parsed = {}
+
+        def num(v):
+            try:
+                return parsed[v]
+            except KeyError:
+                parsed[v] = r = _to_float(v)
+                return r
+            except TypeError:
+                return _to_float(v)
+
+        for src, table in meat_data.items():
+            rows, monsters, spans = [], [], {}
+            for name, entries in table.items():
+                start = len(rows)
+                for row in entries or ():
+                    if isinstance(row, dict) and any(num(row.get(k)) is not None for k in PHYSICAL_KEYS):
+                        rows.append(row)
+                        monsters.append(name)
+                if len(rows) > start:
+                    spans[name] = (start, len(rows))
+            cols = {}
+            for k in PHYSICAL_KEYS:
+                cols[k] = array('d', [math.nan if v is None else v for v in (num(r.get(k)) for r in rows)])
+            for k in ELEMENT_KEYS:
+                cols[k] = array('d', [num(r.get(k)) or 0.0 for r in rows])
+            self._tables[src] = dict(cols, monster=monsters, spans=spans,
+                                     part=[r.get('部位', '') for r in rows],
+                                     state=[r.get('列1') or '正常' for r in rows])
+
+    def rows(self, source):
+        return len(self._tables.get(source, {}).get('monster', ()))
+
+    def compute(self, source, attack, phys_type='斩', element=None, element_value=0.0,
+                motion=100.0, sharpness=1.0, element_sharpness=1.0, monster=None, limit=None):
+        """计算每个部位/状态的期望伤害，返回 [(合计, 物理, 属性, 怪物, 部位, 状态), ...]，按合计降序。
+
+        物理 = 攻击力 × 动作值/100 × 斩味倍率 × 物理肉质/100；属性 = 属性值 × 属性斩味倍率 × 属性肉质/100。
+        monster 为空时计算整个数据源；找不到数据时返回 None。
+        """
+        t = self._tables.get(source)
+        if not t:
+            return None
+        if monster is None:
+            start, end = 0, len(t['monster'])
+        elif monster in t['spans']:
+            start, end = t['spans'][monster]
+        else:
+            return None
+        pa = attack * motion * sharpness / 10000.0
+        ea = element_value * element_sharpness / 100.0 if element else 0.0
+        phys = [pa * v for v in t[phys_type][start:end]]
+        elem = [ea * v for v in t[element][start:end]] if ea else [0.0] * (end - start)
+        # NaN != NaN：物理肉质缺失的行被过滤
+        out = [(p + e, p, e, i) for i, (p, e) in enumerate(zip(phys, elem), start) if p == p]
+        key = lambda r: r[0]
+        out = heapq.nlargest(limit, out, key=key) if limit is not None else sorted(out, key=key, reverse=True)
+        return [(total, p, e, t['monster'][i], t['part'][i], t['state'][i]) for total, p, e, i in out]
+
+
+# 异常状态名与常用别名（数据中为 爆破异常 / 昏厥）
+STATUS_NAMES = ('毒', '睡眠', '麻痹', '爆破异常', '昏厥', '减气')
+STATUS_ALIASES = {'爆破': '爆破异常', '眩晕': '昏厥', '晕': '昏厥'}
+# 预先计算阈值的最大触发次数
+MAX_STATUS_TRIGGERS = 10
+
+
+def _first_number(v):
+    # "+120" / "180" / "20 秒" -> float，无法解析时返回 None
+    m = _NUM_RE.search(str(v)) if v is not None else None
+    return float(m.group()) if m else None
+
+
+class StatusTable:
+    """各怪物异常状态耐性的数值表。
+
+    每种异常保存 (初始值, 增长, 最大值, 持续时间) 与前 MAX_STATUS_TRIGGERS 次触发的阈值，
+    第 k 次的阈值为 min(初始值 + 增长 × (k - 1), 最大值)；触发后累积值清零，因此每次所需命中数单独向上取整。
+    """
+
+    def __init__(self):
+        # {(source, 怪物): {状态: (初始值, 增长, 最大值, 持续时间, 阈值元组)}}
+        self._table = {}
+
+    def __len__(self):
+        return len(self._table)
+
+    def add(self, source, monster, effects):
+        """加入一只怪物的 status_effects（爬虫输出的字符串字段），不含阈值数据的行（如 Capture）跳过"""
+        parsed = {}
+        for row in effects or ():
+            if not isinstance(row, dict):
+                continue
+            name = str(row.get('状态', '')).strip()
+            initial = _first_number(row.get('初始值'))
+            if not name or initial is None:
+                continue
+            increment = _first_number(row.get('增长')) or 0.0
+            maximum = _first_number(row.get('最大值'))
+            if maximum is None or maximum < initial:
+                maximum = initial + increment * (MAX_STATUS_TRIGGERS - 1)
+            thresholds = tuple(min(initial + increment * k, maximum) for k in range(MAX_STATUS_TRIGGERS))
+            parsed[name] = (initial, increment, maximum, _first_number(row.get('持续时间')), thresholds)
+        if parsed:
+            self._table[(source, monster)] = parsed
+
+    def statuses(self, source, monster):
+        return self._table.get((source, monster))
+
+    def applications(self, source, monster, build, times=1):
+        """按异常值 build（{状态: 每次命中的累积值}）计算触发 times 次各需命中多少次。
+
+        返回 {状态: [第 1 次所需命中数, ...]}，怪物没有该异常的数据时为 None；找不到怪物时返回 None。
+        """
+        table = self._table.get((source, monster))
+        if table is None:
+            return None
+        times = max(1, min(times, MAX_STATUS_TRIGGERS))
+        out = {}
+        for status, buildup in build.items():
+            entry = table.get(status)
+            if entry is None or buildup <= 0:
+                out[status] = None
+                continue
+            out[status] = [math.ceil(t / buildup) for t in entry[4][:times]]
+        return out
+
+
+# 跨数据源合并时的优先顺序：ID 与共用图片取排在前面的数据源
+SOURCE_ORDER = ('mhws', 'mhwi')
+# 可选的别名表（data/ 下）：{"规范名": ["别名", ...]}，用于名称在各数据源中不一致的怪物
+ALIASES_FILE = 'monster_aliases.json'
+# 启动快照（data/ 下）：完整构建后的分析器状态，数据与代码都未变化时直接加载
+SNAPSHOT_NAME = 'analyzer.snapshot'
+SNAPSHOT_VERSION = 1
+# 多进程共享的只读肉质表（data/ 下），见 export_shared_dataset / SharedDataset
+SHARED_NAME = 'hitzone.shared'
+SHARED_MAGIC = b'MHSHARED'
+SHARED_VERSION = 2
+_NAME_PUNCT_RE = re.compile(r'[\s·・\-_]+')
+
+
+def _normalize_name(name):
+    return _NAME_PUNCT_RE.sub('', unicodedata.normalize('NFKC', str(name))).lower()
+
+
+def _url_slug(url):
+    path = urlparse(str(url)).path.rstrip('/')
+    return path.rsplit('/', 1)[-1].lower() if path else ''
+
+
+class MonsterIdentity:
+    """跨数据源的怪物身份表：把各源中名称、别名或页面 slug 相同的记录归并为同一个规范 ID。
+
+    规范 ID 取别名表中的规范名，否则取按 SOURCE_ORDER 排在最前的数据源中的名称；
+    每个 ID 只保留一张共用图片，各数据源查询同一怪物时命中同一个下载缓存。
+    """
+
+    def __init__(self, aliases=None):
+        self._aliases = {}  # 归一化别名 -> 规范名
+        for canonical, names in (aliases or {}).items():
+            for n in [canonical] + list(names or ()):
+                self._aliases[_normalize_name(n)] = canonical
+        self._nodes = {}  # (source, 名称) -> {'url', 'image'}
+        self._parent = {}
+        self._ids = {}  # (source, 名称) -> 规范 ID
+        self._keys = {}  # 归一化名称/别名/slug -> 规范 ID
+        self._records = {}  # 规范 ID -> {source: 名称}
+        self._images = {}  # 规范 ID -> 共用图片 URL
+
+    def add(self, source, name, url='', image=''):
+        if not name:
+            return
+        node = self._nodes.setdefault((source, name), {'url': '', 'image': ''})
+        node['url'] = node['url'] or url or ''
+        node['image'] = node['image'] or image or ''
+
+    def _find(self, x):
+        while self._parent[x] != x:
+            self._parent[x] = self._parent[self._parent[x]]
+            x = self._parent[x]
+        return x
+
+    @staticmethod
+    def _source_rank(source):
+        return (SOURCE_ORDER.index(source) if source in SOURCE_ORDER else len(SOURCE_ORDER), source)
+
+    def finalize(self):
+        """按共享的键合并记录并生成查找表"""
+        self._parent = {node: node for node in self._nodes}
+        owner = {}
+        node_keys = {}
+        for node, info in self._nodes.items():
+            norm = _normalize_name(node[1])
+            keys = ['n:' + norm]
+            if norm in self._aliases:
+                keys.append('a:' + self._aliases[norm])
+            slug = _url_slug(info['url'])
+            if slug:
+                keys.append('u:' + slug)
+            node_keys[node] = keys
+            for key in keys:
+                first = owner.setdefault(key, node)
+                if first != node:
+                    ra, rb = self._find(first), self._find(node)
+                    if ra != rb:
+                        self._parent[rb] = ra
+        groups = {}
+        for node in self._nodes:
+            groups.setdefault(self._find(node), []).append(node)
+        self._ids, self._keys, self._records, self._images = {}, {}, {}, {}
+        for members in groups.values():
+            members.sort(key=lambda n: self._source_rank(n[0]) + (n[1],))
+            canonical = next((self._aliases[_normalize_name(n[1])] for n in members
+                              if _normalize_name(n[1]) in self._aliases), members[0][1])
+            # 规范 ID 冲突（不同怪物的别名相同）时退回首个名称
+            if canonical in self._records:
+                canonical = f"{members[0][0]}:{members[0][1]}"
+            records = {}
+            for n in members:
+                records.setdefault(n[0], n[1])
+                self._ids[n] = canonical
+                for key in node_keys[n]:
+                    self._keys.setdefault(key[2:], canonical)
+            self._records[canonical] = records
+            self._images[canonical] = next((self._nodes[n]['image'] for n in members if self._nodes[n]['image']), '')
+
+    def resolve(self, name):
+        """由任一数据源的名称、别名或 slug 得到规范 ID，找不到时返回 None"""
+        norm = _normalize_name(name)
+        return self._keys.get(norm) or self._keys.get(self._aliases.get(norm, '')) or self._keys.get(str(name).lower())
+
+    def records(self, name):
+        """返回 {source: 该源中的名称}，按 SOURCE_ORDER 排序"""
+        monster_id = self.resolve(name)
+        records = self._records.get(monster_id, {})
+        return dict(sorted(records.items(), key=lambda r: self._source_rank(r[0])))
+
+    def name_in(self, name, source):
+        """把任一数据源中的名称映射到 source 中的名称，找不到时返回 None"""
+        return self._records.get(self.resolve(name), {}).get(source)
+
+    def image_url(self, name):
+        return self._images.get(self.resolve(name), '')
+
+
+# 共享肉质表每行的定长记录：部位、状态的字符串编号，列的存在位图与文本位图，随后每列一个 float64
+# （文本单元格存放其字符串编号）
+_SHARED_ROW_HEAD = '<IIQQ'
+_SHARED_NO_STR = 0xFFFFFFFF
+_SHARED_TEXT_KEYS = ('部位', '列1')
+
+
+def export_shared_dataset(meat_data, path, fingerprint=None):
+    """把 {source: {怪物: [部位行, ...]}} 写成可被多个进程只读映射的文件（先写临时文件再原子重命名）。
+
+    布局：魔数、版本、头部 JSON 长度与头部 JSON（各数据源的列名、行区域与怪物目录），
+    随后是字符串表（偏移数组 + UTF-8）与各数据源的定长行。数值缺失记为 NaN，键不存在由位图区分；
+    通用格式中保留为原文本的单元格存入字符串表，由文本位图标记。
+    """
+    strings, string_ids = [], {}
+
+    def sid(value):
+        if value is None:
+            return _SHARED_NO_STR
+        value = str(value)
+        i = string_ids.get(value)
+        if i is None:
+            i = string_ids[value] = len(strings)
+            strings.append(value)
+        return i
+
+    sources, blocks = {}, []
+    for src, table in meat_data.items():
+        columns = []
+        for rows in table.values():
+            for row in rows or ():
+                if isinstance(row, dict):
+                    columns.extend(k for k in row if k not in _SHARED_TEXT_KEYS and k not in columns)
+        if len(columns) > 64:
+            raise ValueError(f"{src} 的数值列超过 64 个")
+        col_index = {k: i for i, k in enumerate(columns)}
+        row_struct = struct.Struct(_SHARED_ROW_HEAD + 'd' * len(columns))
+        buf = bytearray()
+        monsters = []
+        count = 0
+        for name, rows in table.items():
+            start = count
+            for row in rows or ():
+                if not isinstance(row, dict):
+                    continue
+                values = [math.nan] * len(columns)
+                mask = text_mask = 0
+                for k, v in row.items():
+                    j = col_index.get(k)
+                    if j is None:
+                        continue
+                    if isinstance(v, str):
+                        values[j] = sid(v)
+                        text_mask |= 1 << j
+                    elif v is not None:
+                        if isinstance(v, bool) or not isinstance(v, (int, float)):
+                            raise ValueError(f"{src}/{name} 的 {k} 不是数值或文本: {v!r}")
+                        values[j] = v
+                    mask |= 1 << j
+                buf += row_struct.pack(sid(row['部位']) if '部位' in row else _SHARED_NO_STR,
+                                       sid(row['列1']) if '列1' in row else _SHARED_NO_STR, mask, text_mask, *values)
+                count += 1
+            monsters.append([name, start, count - start])
+        sources[src] = {'columns': columns, 'stride': row_struct.size, 'rows': count, 'monsters': monsters}
+        blocks.append((src, bytes(buf)))
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = array('I', [0])
+    for b in encoded:
+        offsets.append(offsets[-1] + len(b))
+    string_block = offsets.tobytes() + b''.join(encoded)
+
+    # 偏移均相对于头部之后按 8 字节对齐的数据区起点，头部长度不影响其内容
+    pos = len(string_block)
+    for src, block in blocks:
+        pos += -pos % 8
+        sources[src]['offset'] = pos
+        pos += len(block)
+    header = {'fingerprint': fingerprint, 'strings': len(strings), 'sources': sources}
+    head = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    base = 16 + len(head)
+    base += -base % 8
+
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(SHARED_MAGIC + struct.pack('<II', SHARED_VERSION, len(head)) + head)
+            f.write(b'\0' * (base - f.tell()))
+            f.write(string_block)
+            for src, block in blocks:
+                f.write(b'\0' * (base + sources[src]['offset'] - f.tell()))
+                f.write(block)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class SharedDataset(Mapping):
+    """只读映射 export_shared_dataset 写出的文件，按 {source: {怪物: [部位行, ...]}} 提供与 meat_data 相同的查找。
+
+    行数据与字符串留在映射页中（多个进程共享同一份页缓存），查询某只怪物时才解码为字典；
+    本进程只保存头部中的怪物目录。pickle 时只记录路径，恢复时重新映射。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._mm[:8] != SHARED_MAGIC:
+                raise ValueError(f"不是共享肉质表: {path}")
+            version, head_len = struct.unpack_from('<II', self._mm, 8)
+            if version != SHARED_VERSION:
+                raise ValueError(f"共享肉质表版本不符: {version}")
+            header = json.loads(self._mm[16:16 + head_len].decode('utf-8'))
+        except Exception:
+            self._mm.close()
+            raise
+        base = 16 + head_len
+        base += -base % 8
+        self.fingerprint = header.get('fingerprint')
+        count = header['strings']
+        self._str_offsets = memoryview(self._mm)[base:base + 4 * (count + 1)].cast('I')
+        self._str_base = base + 4 * (count + 1)
+        self._str_cache = {}
+        self._sources = {src: SharedSourceView(self, info, base) for src, info in header['sources'].items()}
+
+    @classmethod
+    def open_fresh(cls, path, fingerprint):
+        """文件存在且指纹与 fingerprint 一致时返回 SharedDataset，否则返回 None"""
+        try:
+            reader = cls(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        if reader.fingerprint != json.loads(json.dumps(fingerprint)):
+            reader.close()
+            return None
+        return reader
+
+    def string(self, i):
+        if i == _SHARED_NO_STR:
+            return None
+        s = self._str_cache.get(i)
+        if s is None:
+            s = self._str_cache[i] = self._mm[self._str_base + self._str_offsets[i]:
+                                              self._str_base + self._str_offsets[i + 1]].decode('utf-8')
+        return s
+
+    def close(self):
+        for view in self._sources.values():
+            view._release()
+        self._str_offsets.release()
+        self._mm.close()
+
+    def __reduce__(self):
+        return (SharedDataset, (self.path,))
+
+    def __getitem__(self, source):
+        return self._sources[source]
+
+    def __iter__(self):
+        return iter(self._sources)
+
+    def __len__(self):
+        return len(self._sources)
+
+
+class SharedSourceView(Mapping):
+    """SharedDataset 中一个数据源的 {怪物: [部位行, ...]} 视图；每次取值都解码出新的列表"""
+
+    def __init__(self, dataset, info, base):
+        self._dataset = dataset
+        self._columns = info['columns']
+        self._struct = struct.Struct(_SHARED_ROW_HEAD + 'd' * len(self._columns))
+        self._offset = base + info['offset']
+        self._monsters = {name: (start, n) for name, start, n in info['monsters']}
+
+    def _release(self):
+        self._dataset = None
+
+    def __getitem__(self, name):
+        start, n = self._monsters[name]
+        dataset, columns = self._dataset, self._columns
+        stride = self._struct.size
+        rows = []
+        for vals in self._struct.iter_unpack(dataset._mm[self._offset + start * stride:self._offset + (start + n) * stride]):
+            row = {}
+            if vals[0] != _SHARED_NO_STR:
+                row['部位'] = dataset.string(vals[0])
+            if vals[1] != _SHARED_NO_STR:
+                row['列1'] = dataset.string(vals[1])
+            mask, text_mask = vals[2], vals[3]
+            for j, k in enumerate(columns):
+                if mask >> j & 1:
+                    v = vals[4 + j]
+                    if text_mask >> j & 1:
+                        row[k] = dataset.string(int(v))
+                    else:
+                        row[k] = None if v != v else (int(v) if v.is_integer() else v)
+            rows.append(row)
+        return rows
+
+    def __contains__(self, name):
+        return name in self._monsters
+
+    def __iter__(self):
+        return iter(self._monsters)
+
+    def __len__(self):
+        return len(self._monsters)
+
+
+_code_digest_cache = []
+
+
+def _code_digest():
+    """本模块与 dataset_schema 源码的 sha256：部署新代码后旧快照中的类结构与数据格式可能不再适用"""
+    if not _code_digest_cache:
+        h = hashlib.sha256()
+        try:
+            for path in (__file__, dataset_schema.__file__):
+                with open(path, 'rb') as f:
+                    h.update(f.read())
+            _code_digest_cache.append(h.hexdigest())
+        except OSError:
+            _code_digest_cache.append('')
+    return _code_digest_cache[0]
+
+
+def data_fingerprint(base):
+    """data/ 下各文件（含各数据源子目录中的文件）的 (目录, 文件名, 大小, mtime_ns)，用于判断快照是否过期。
+
+    隐藏文件（爬虫写入中的临时文件）、快照与共享肉质表本身不计入，但暂存目录中已提交的清单计入
+    （分析器会按它读取尚未移入的文件）；目录不存在时返回 None。
+    """
+    entries = []
+    try:
+        with os.scandir(base) as it:
+            top = list(it)
+    except OSError:
+        return None
+    for e in top:
+        if e.name in (SNAPSHOT_NAME, SHARED_NAME) or e.name.startswith('.'):
+            continue
+        try:
+            if e.is_dir():
+                with os.scandir(e.path) as sub:
+                    for f in sub:
+                        if not f.name.startswith('.'):
+                            st = f.stat()
+                            entries.append((e.name, f.name, st.st_size, st.st_mtime_ns))
+                try:
+                    st = os.stat(os.path.join(e.path, STAGING_DIR, MANIFEST_NAME))
+                    entries.append((os.path.join(e.name, STAGING_DIR), MANIFEST_NAME, st.st_size, st.st_mtime_ns))
+                except FileNotFoundError:
+                    pass
+            else:
+                st = e.stat()
+                entries.append(('', e.name, st.st_size, st.st_mtime_ns))
+        except OSError:
+            return None
+    entries.sort()
+    return entries
+
+
+def format_damage_params(attack, phys_type='斩', element=None, element_value=0.0,
+                         motion=100.0, sharpness=1.0, element_sharpness=1.0):
+    """伤害计算参数的简短说明，如 斩 攻击200 动作值40% 斩味×1.32 + 火30×1.15"""
+    text = f"{phys_type} 攻击{attack:g} 动作值{motion:g}%"
+    if sharpness != 1.0:
+        text += f" 斩味×{sharpness:g}"
+    if element and element_value:
+        text += f" + {element}{element_value:g}"
+        if element_sharpness != 1.0:
+            text += f"×{element_sharpness:g}"
+    return text
 
 
 class MonsterAnalyzer:
     """支持多个数据源（例如 data/mhws 和 data/mhwi）的分析器。
-    方法支持传入 source 参数来选择数据源；若未提供则在所有源中查找并使用第一个匹配项。"""
+    方法支持传入 source 参数来选择数据源；若未提供则在所有源中查找并使用第一个匹配项。
+
+    数据源目录中有爬虫写出的 manifest.json 时，只加载清单中列出且校验和一致的文件；
+    传入上一个分析器（previous）时，校验和未变的文件直接复用其解析结果。
+    没有清单的目录（旧数据、合成数据）按原方式加载全部 JSON。"""
 
-    def __init__(self, data_dir):
+    def __init__(self, data_dir, previous=None):
         base = os.path.join(data_dir, 'data')
         self.base_data_dir = base
         self.sources = []  # 可用数据源目录名
         self.monster_list = []
         self.meat_data = {}  # { source: { name: [...parts...] } }
+        self.drops = DropIndex()  # 素材 -> 掉落怪物的倒排索引
+        self.recommend = RecommendIndex()  # 预先计算的各怪物物理/属性得分与排行
+        self._damage_table = None  # 伤害计算用的列式肉质表，首次计算时生成
+        self.status = StatusTable()  # 异常状态耐性数值表
+        self.identity = MonsterIdentity()  # 跨数据源的怪物身份表
+        self._all_manifest = False
+        self.restored_from_snapshot = False  # 由 load() 从快照恢复时为 True
+        # 按清单加载的文件：{(source, 文件名): (sha256, 怪物名, 部位数据, 素材列表, 异常状态)}
+        self._file_cache = {}
+        self.skipped_files = []  # 不在完整清单中或校验失败而未加载的文件
+        self.reused_files = 0  # 从 previous 复用的文件数
+        self._reused_monsters = set()  # 从 previous 复用的 (source, 怪物名)
+        previous_cache = getattr(previous, '_file_cache', {})
+        self._aliases_stat = None  # 别名表的 (mtime_ns, 大小)，用于判断能否沿用 previous 的身份表
+        reuse_identity = False
 
         # 探测子目录作为各数据源
         try:
@@ -20,21 +875,231 @@ class MonsterAnalyzer:
                 if os.path.isdir(path):
                     self.sources.append(name)
             # 加载每个源的 monster_list.json 和肉质数据
+            self._all_manifest = True
             for src in self.sources:
                 src_dir = os.path.join(self.base_data_dir, src)
-                lst = self._load_monster_list_for(src_dir)
+                # 爬虫已提交但未移入完时按暂存清单读取，移入留给爬虫的 DatasetWriter（分析器只读）
+                manifest, dirs = read_committed_manifest(src_dir)
+                if manifest is None:
+                    self._all_manifest = False
+                    lst = self._load_monster_list_for(src_dir)
+                    self.meat_data[src] = self._load_meat_data_for(src_dir)
+                else:
+                    lst = self._load_verified_list(src, dirs, manifest)
+                    self.meat_data[src] = self._load_meat_data_from_manifest(
+                        src, dirs, manifest, previous_cache, getattr(previous, 'meat_data', None))
                 # 将来源信息注入到条目中，便于展示
                 for it in lst:
                     if isinstance(it, dict):
                         it.setdefault('source', src)
                     self.monster_list.append(it)
-
-                self.meat_data[src] = self._load_meat_data_for(src_dir)
+            # 所有源都按清单加载且文件与上一个分析器完全相同时，直接沿用其索引
+            if (self._all_manifest and getattr(previous, '_all_manifest', False) and self._file_cache
+                    and self.reused_files == len(self._file_cache) == len(previous_cache)):
+                self.drops = previous.drops
+                self.recommend = previous.recommend
+                self._damage_table = previous._damage_table
+                self.status = previous.status
+                reuse_identity = True
+            else:
+                for (src, _), cached in self._file_cache.items():
+                    self.drops.add(src, cached[1], cached[3])
+                    self.status.add(src, cached[1], cached[4])
+                self._build_recommend_index(getattr(previous, 'recommend', None))
+            self.drops.finalize()
+            self._build_identity(previous if reuse_identity else None)
         except Exception:
             # 兼容老结构：直接在 data 下寻找文件
             self.sources = []
+            self.drops = DropIndex()
+            self.status = StatusTable()
             self.monster_list = self._load_monster_list_fallback(data_dir)
             self.meat_data = {'default': self._load_meat_data_fallback(data_dir)}
+            self.drops.finalize()
+            self._build_recommend_index()
+            self._build_identity()
+
+    @classmethod
+    def load(cls, data_dir, previous=None, snapshot=True, shared=False):
+        """优先从 data/ 下的快照恢复分析器；快照缺失或过期时重新构建并写出新快照。
+
+        快照头部记录格式版本、本模块源码的哈希与数据文件指纹（见 data_fingerprint），
+        三者一致才读取其余部分，因此过期的快照只需读取头部即可判定。
+        shared 为 True 时肉质表改用多进程共享的只读映射（见 attach_shared），快照中只记录其路径。
+        """
+        if snapshot:
+            restored = cls.from_snapshot(data_dir, shared)
+            if restored is not None:
+                return restored
+        analyzer = cls(data_dir, previous=previous)
+        if shared:
+            analyzer.attach_shared()
+        if snapshot:
+            analyzer.save_snapshot()
+        return analyzer
+
+    @staticmethod
+    def _snapshot_header(base, fingerprint, shared):
+        return {'version': SNAPSHOT_VERSION, 'code': _code_digest(),
+                'base': os.path.abspath(base), 'fingerprint': fingerprint, 'shared': shared}
+
+    def attach_shared(self):
+        """把肉质表换成 data/hitzone.shared 的只读映射，释放本进程中的部位行；成功返回 True。
+
+        文件缺失或指纹与当前数据不符时先由本进程导出（原子替换，其它进程已映射的旧文件不受影响）；
+        同一主机上的其它 bot 进程映射同一文件，行数据只在页缓存中保留一份。
+        """
+        if isinstance(self.meat_data, SharedDataset):
+            return True
+        fingerprint = data_fingerprint(self.base_data_dir)
+        if fingerprint is None:
+            return False
+        path = os.path.join(self.base_data_dir, SHARED_NAME)
+        reader = SharedDataset.open_fresh(path, fingerprint)
+        if reader is None:
+            try:
+                export_shared_dataset(self.meat_data, path, fingerprint)
+                reader = SharedDataset(path)
+            except (OSError, ValueError):
+                return False
+        self.meat_data = reader
+        # 文件缓存中的部位行改为 None，重新加载时从共享表取回
+        self._file_cache = {k: c[:2] + (None,) + c[3:] for k, c in self._file_cache.items()}
+        return True
+
+    @classmethod
+    def from_snapshot(cls, data_dir, shared=False):
+        """读取并校验快照，返回恢复的分析器；不存在、过期或无法读取时返回 None"""
+        base = os.path.join(data_dir, 'data')
+        try:
+            with open(os.path.join(base, SNAPSHOT_NAME), 'rb') as f:
+                if pickle.load(f) != cls._snapshot_header(base, data_fingerprint(base), shared):
+                    return None
+                # 快照中是大量新建的小容器，读取期间暂停循环垃圾回收可省去约三成耗时
+                gc_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    state = pickle.load(f)
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+        except Exception:
+            return None
+        analyzer = cls.__new__(cls)
+        analyzer.__dict__.update(state)
+        analyzer.restored_from_snapshot = True
+        return analyzer
+
+    def save_snapshot(self):
+        """把当前状态写入快照（先写临时文件再原子重命名），成功返回 True
+
+        指纹在构建完成后计算：构建期间数据若被改写，快照会在下次启动时被判为过期。
+        """
+        fingerprint = data_fingerprint(self.base_data_dir)
+        if fingerprint is None:
+            return False
+        path = os.path.join(self.base_data_dir, SNAPSHOT_NAME)
+        tmp = os.path.join(self.base_data_dir, f".{SNAPSHOT_NAME}.{os.getpid()}.tmp")
+        # 伤害计算表按需生成，不写入快照
+        state = dict(self.__dict__, _damage_table=None, restored_from_snapshot=False)
+        try:
+            with open(tmp, 'wb') as f:
+                header = self._snapshot_header(self.base_data_dir, fingerprint, isinstance(self.meat_data, SharedDataset))
+                pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def _build_identity(self, previous=None):
+        # 数据文件与别名表都未变化时沿用 previous 的身份表
+        path = os.path.join(self.base_data_dir, ALIASES_FILE)
+        try:
+            st = os.stat(path)
+            self._aliases_stat = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            self._aliases_stat = None
+        if previous is not None and previous._aliases_stat == self._aliases_stat:
+            self.identity = previous.identity
+            return
+        aliases = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                aliases = json.load(f)
+        except (OSError, ValueError):
+            pass
+        self.identity = MonsterIdentity(aliases if isinstance(aliases, dict) else {})
+        for it in self.monster_list:
+            if isinstance(it, dict):
+                self.identity.add(it.get('source', 'default'), it.get('name', ''), it.get('url', ''), it.get('image', ''))
+        for src, table in self.meat_data.items():
+            for name in table:
+                self.identity.add(src, name)
+        self.identity.finalize()
+
+    def _build_recommend_index(self, previous=None):
+        # 文件未变的怪物沿用 previous 中的得分，其余重新计算
+        self.recommend = RecommendIndex()
+        for src, table in self.meat_data.items():
+            for name, rows in table.items():
+                if previous is not None and (src, name) in self._reused_monsters and self.recommend.reuse(previous, src, name):
+                    continue
+                self.recommend.add(src, name, rows)
+        self.recommend.finalize()
+
+    def _read_verified(self, src, dirs, fname, entry):
+        """依次在 dirs 中读取文件并核对清单中的 sha256，都不一致（如爬取中途崩溃）时返回 None"""
+        for src_dir in dirs:
+            try:
+                with open(os.path.join(src_dir, fname), 'rb') as f:
+                    raw = f.read()
+            except OSError:
+                continue
+            if entry_matches(raw, entry):
+                return raw
+        self.skipped_files.append(f"{src}/{fname}")
+        return None
+
+    def _load_verified_list(self, src, dirs, manifest):
+        entry = manifest['files'].get('monster_list.json')
+        raw = self._read_verified(src, dirs, 'monster_list.json', entry) if entry else None
+        try:
+            return json.loads(raw) if raw is not None else []
+        except ValueError:
+            return []
+
+    def _load_meat_data_from_manifest(self, src, dirs, manifest, previous_cache, previous_meat=None):
+        meat_data = {}
+        for fname, entry in manifest['files'].items():
+            if fname in NON_MONSTER_FILES or not fname.endswith('.json'):
+                continue
+            key = (src, fname)
+            cached = previous_cache.get(key)
+            if cached and cached[2] is None:
+                # 上一个分析器已改用共享肉质表，部位行从中取回
+                rows = (previous_meat or {}).get(src, {}).get(cached[1])
+                cached = cached[:2] + (rows,) + cached[3:] if rows is not None else None
+            if cached and cached[0] == entry.get('sha256'):
+                self.reused_files += 1
+                self._reused_monsters.add((src, cached[1]))
+            else:
+                raw = self._read_verified(src, dirs, fname, entry)
+                if raw is None:
+                    continue
+                try:
+                    monster = json.loads(raw)
+                except ValueError:
+                    continue
+                cached = (entry.get('sha256'), monster.get('name', ''), hitzone_rows(monster, src.lower()),
+                          monster.get('materials', []), monster.get('status_effects', []))
+            self._file_cache[key] = cached
+            meat_data[cached[1]] = cached[2]
+        return meat_data
 
     def _load_monster_list_for(self, src_dir):
         list_path = os.path.join(src_dir, 'monster_list.json')
@@ -48,84 +1113,19 @@ class MonsterAnalyzer:
         meat_data = {}
         try:
             for fname in os.listdir(src_dir):
-                if fname.endswith('.json') and fname != 'monster_list.json':
+                if fname.endswith('.json') and fname not in NON_MONSTER_FILES:
                     with open(os.path.join(src_dir, fname), 'r', encoding='utf-8') as f:
                         monster = json.load(f)
-                        data = monster.get('hitzone_data', [])
-                        # 如果是 mhwi 数据源，进行归一化以兼容旧分析逻辑
-                        if os.path.basename(src_dir).lower() == 'mhwi':
-                            data = [self._normalize_mhwi_entry(e) for e in data]
-                        meat_data[monster.get('name', '')] = data
+                        meat_data[monster.get('name', '')] = hitzone_rows(monster, os.path.basename(src_dir).lower())
+                        self.drops.add(os.path.basename(src_dir), monster.get('name', ''), monster.get('materials'))
+                        self.status.add(os.path.basename(src_dir), monster.get('name', ''), monster.get('status_effects'))
         except Exception:
             pass
         return meat_data
 
     def _normalize_mhwi_entry(self, entry):
-        """将 mhwi 格式的单条部位数据转换为兼容旧逻辑的字段。
-
-        转换规则（基于用户提供的映射说明）：
-        - Part -> 部位（去掉括号内的状态）
-        - 括号内内容 -> 列1（状态）
-        - 切断 -> 斩 / 列2
-        - 打击 -> 打 / 列3
-        - 遥远 -> 弹 / 列4
-        - col4 -> 火 / 列5
-        - col5 -> 水 / 列6
-        - col6 -> 雷 / 列7
-        - col7 -> 冰 / 列8
-        - col8 -> 龙 / 列9
-        - col9 -> 晕 / 列10
-        其余字段原样保留（如 耐力）。
-        """
-        out = {}
-        # 处理 Part 与状态
-        part = entry.get('Part', '')
-        status = ''
-        if part and '(' in part and ')' in part:
-            try:
-                name = part[:part.rfind('(')].strip()
-                status = part[part.rfind('(')+1:part.rfind(')')].strip()
-            except Exception:
-                name = part
-        else:
-            name = part
-        out['部位'] = name
-        out['列1'] = status
-
-        def _num(v):
-            try:
-                if v is None:
-                    return ''
-                s = str(v).strip()
-                return s
-            except:
-                return ''
-
-        # 数值映射
-        mapping = [
-            ('切断', '斩', '列2'),
-            ('打击', '打', '列3'),
-            ('遥远', '弹', '列4'),
-            ('col4', '火', '列5'),
-            ('col5', '水', '列6'),
-            ('col6', '雷', '列7'),
-            ('col7', '冰', '列8'),
-            ('col8', '龙', '列9'),
-            ('col9', '晕', '列10')
-        ]
-        for src_key, chi_key, col_key in mapping:
-            val = entry.get(src_key)
-            v = _num(val)
-            out[chi_key] = v
-            out[col_key] = v
-
-        # 复制其他可能的字段
-        for k, v in entry.items():
-            if k in ('Part', '切断', '打击', '遥远', 'col4', 'col5', 'col6', 'col7', 'col8', 'col9'):
-                continue
-            out[k] = v
-
-        return out
+        """将 mhwi 原始格式的单条部位数据转换为通用格式（旧数据迁移用，新数据在爬取时已归一化）"""
+        return normalize_row(entry, 'mhwi')
 
     # 兼容性后备（当没有子目录时）
     def _load_monster_list_fallback(self, data_dir):
@@ -141,10 +1141,12 @@ class MonsterAnalyzer:
         base = os.path.join(data_dir, 'data')
         try:
             for fname in os.listdir(base):
-                if fname.endswith('.json') and fname != 'monster_list.json':
+                if fname.endswith('.json') and fname not in NON_MONSTER_FILES:
                     with open(os.path.join(base, fname), 'r', encoding='utf-8') as f:
                         monster = json.load(f)
-                        meat_data[monster.get('name', '')] = monster.get('hitzone_data', [])
+                        meat_data[monster.get('name', '')] = hitzone_rows(monster, 'default')
+                        self.drops.add('default', monster.get('name', ''), monster.get('materials'))
+                        self.status.add('default', monster.get('name', ''), monster.get('status_effects'))
         except Exception:
             pass
         return meat_data
@@ -191,6 +1193,101 @@ class MonsterAnalyzer:
         lines.append(f"输入/ws肉质 {monster_name} 或 /wi肉质 {monster_name} 查看不同数据源的肉质表\n输入/ws弱点 {monster_name} 或 /wi弱点 {monster_name} 查看弱点简析")
         return "\n".join(lines)
 
+    def get_material_drops(self, material_name, source=None, limit=15):
+        # 反查掉落该素材的怪物，按掉落率从高到低
+        total, results = self.drops.search(material_name, source=source, limit=limit)
+        if not results:
+            return f"未找到掉落「{material_name}」的怪物"
+        lines = [f"掉落「{material_name}」的怪物（按掉落率）："]
+        for name, rate, monster, src in results:
+            rate_text = f"{rate:g}%" if rate is not None else "-"
+            lines.append(f"{monster}[{src}] {name} {rate_text}")
+        if total > limit:
+            lines.append(f"……共 {total} 条，仅显示前 {limit} 条")
+        return "\n".join(lines)
+
+    def get_ranking(self, query, source, weighted=False, limit=10):
+        # 排行查询：单列（如 火）按常态得分排序；"打>斩" 列出 打 优于 斩 的怪物
+        query = query.replace(' ', '').replace('＞', '>')
+        basis = '常态，按部位HP加权' if weighted else '常态'
+        if '>' in query:
+            a, _, b = query.partition('>')
+            if a not in PHYSICAL_KEYS or b not in PHYSICAL_KEYS or a == b:
+                return f"用法：{'/'.join(PHYSICAL_KEYS)} 两两比较，如 打>斩"
+            rows = self.recommend.beats(source, a, b, weighted=weighted)
+            if not rows:
+                return f"{source} 中没有 {a} 优于 {b} 的怪物"
+            lines = [f"{source} 中 {a} 优于 {b} 的怪物（{basis}）：共 {len(rows)} 只"]
+            for i, (diff, monster, sa, sb) in enumerate(rows[:limit], 1):
+                lines.append(f"{i}. {monster} {a}{sa:.1f} / {b}{sb:.1f} (+{diff:.1f})")
+            return "\n".join(lines)
+        if query not in SCORE_KEYS:
+            return f"用法：{''.join(SCORE_KEYS)} 之一，或如 打>斩 的比较"
+        rows = self.recommend.ranking(source, query, weighted=weighted)
+        if not rows:
+            return f"{source} 中没有可用的 {query} 肉质数据"
+        lines = [f"{source} {query} 有效值排行（{basis}）："]
+        for i, (score, monster) in enumerate(rows[:limit], 1):
+            lines.append(f"{i}. {monster} {score:.1f}")
+        return "\n".join(lines)
+
+    def get_element_recommendation(self, monster_names, source, weighted=False):
+        # 为接下来要狩猎的一组怪物推荐属性：按常态属性得分平均
+        ranked, per_monster, missing = self.recommend.best_elements(source, monster_names, weighted=weighted)
+        if not per_monster:
+            return "未找到这些怪物的肉质数据"
+        emoji_map = {'火': '🔥', '水': '💧', '雷': '⚡️', '冰': '🧊', '龙': '🐉'}
+        basis = '常态，按部位HP加权' if weighted else '常态'
+        lines = [f"{len(per_monster)} 只怪物的推荐属性（{source}，{basis}）："]
+        lines.append(' > '.join(f"{emoji_map[k]}{k}({v:.1f})" for k, v in ranked))
+        for name, best in per_monster:
+            lines.append(f"{name}: {best[0]}({best[1]:.1f})" if best else f"{name}: 无属性数据")
+        if missing:
+            lines.append(f"未找到: {' '.join(missing)}")
+        return "\n".join(lines)
+
+    @property
+    def damage_table(self):
+        if self._damage_table is None:
+            self._damage_table = DamageTable(self.meat_data)
+        return self._damage_table
+
+    def get_damage(self, source, attack, monster=None, limit=15, **kw):
+        # 伤害估算文本：单只怪物列出各部位/状态，monster 为空时列出整个数据源中伤害最高的部位
+        rows = self.damage_table.compute(source, attack, monster=monster, limit=limit, **kw)
+        return self.format_damage(rows, source, attack, monster=monster, limit=limit, **kw)
+
+    @staticmethod
+    def format_damage(rows, source, attack, monster=None, limit=15, **kw):
+        if rows is None:
+            return "未找到该怪物的肉质数据" if monster else f"{source} 没有肉质数据"
+        lines = [f"{monster or source + ' 全部怪物'} 伤害估算（{format_damage_params(attack, **kw)}）："]
+        for i, (total, p, e, name, part, state) in enumerate(rows[:limit], 1):
+            who = f"{part}({state})" if monster else f"{name} {part}({state})"
+            lines.append(f"{i}. {who} {total:.1f}" + (f" = {p:.1f}+{e:.1f}" if e else ""))
+        return "\n".join(lines)
+
+    def get_status_applications(self, monster_names, source, build, times=1):
+        # 按异常值计算触发 times 次所需的命中次数，可一次查询多只怪物
+        times = max(1, min(times, MAX_STATUS_TRIGGERS))
+        build_text = ' '.join(f"{k}{v:g}" for k, v in build.items())
+        lines = [f"异常值 {build_text}，触发 {times} 次所需命中数（{source}）："]
+        for name in monster_names:
+            result = self.status.applications(source, name, build, times)
+            if result is None:
+                lines.append(f"{name}：无异常状态数据")
+                continue
+            parts = []
+            for status, counts in result.items():
+                if counts is None:
+                    parts.append(f"{status} -")
+                elif len(counts) == 1:
+                    parts.append(f"{status} {counts[0]}")
+                else:
+                    parts.append(f"{status} {'+'.join(map(str, counts))}={sum(counts)}")
+            lines.append(f"{name}：" + '  '.join(parts))
+        return "\n".join(lines)
+
     def get_monster_weakness(self, monster_name, source=None):
         # 若指定 source，则从指定的源读取；否则在所有源中查找第一个匹配
         data = None
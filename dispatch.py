@@ -0,0 +1,49 @@
+class CommandDispatcher:
+    """群消息命令分发表。
+
+    - 以 `/` 开头的消息：先按整句查精确命令，再取第一个空格前的词查带参数命令；
+    - 其它消息：仅当长度命中已注册的长度时才尝试正则（如 12/16 位集会码）。
+    普通聊天消息通常只需一次首字符判断与一次字典查找即可返回。
+    每个命令带一个类别（kind），供限流等按类别区分处理。
+    """
+
+    def __init__(self, prefix: str = "/"):
+        self.prefix = prefix
+        self._exact = {}      # { "/查询": (handler(msg), kind) }
+        self._with_arg = {}   # { "/ws简介": (handler(msg, arg), kind) }
+        self._patterns = {}   # { 长度: [(regex, handler(msg, text), kind), ...] }
+
+    def exact(self, command: str, handler, kind: str = "text"):
+        self._exact[command] = (handler, kind)
+
+    def with_arg(self, command: str, handler, kind: str = "text"):
+        self._with_arg[command] = (handler, kind)
+
+    def pattern(self, length: int, regex, handler, kind: str = "text"):
+        self._patterns.setdefault(length, []).append((regex, handler, kind))
+
+    def resolve(self, text: str):
+        """返回 (handler, args, kind)；不是命令时返回 None。"""
+        if not text:
+            return None
+        if text[0] != self.prefix:
+            for regex, handler, kind in self._patterns.get(len(text), ()):
+                if regex.match(text):
+                    return handler, (text,), kind
+            return None
+
+        entry = self._exact.get(text)
+        if entry is None:
+            entry = self._exact.get(text.strip())
+        if entry is not None:
+            return entry[0], (), entry[1]
+
+        sep = text.find(" ")
+        if sep > 0:
+            entry = self._with_arg.get(text[:sep])
+            if entry is not None:
+                return entry[0], (text[sep + 1:].strip(),), entry[1]
+        return None
+
+    def commands(self) -> list:
+        return sorted(list(self._exact) + list(self._with_arg))
@@ -0,0 +1,397 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows：只在进程内互斥
+    fcntl = None
+
+from ncatbot.utils import get_log
+
+LOG = get_log("mh")
+
+# (文件头, 扩展名, content_type)
+_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', '.png', 'image/png'),
+    (b'\xff\xd8\xff', '.jpg', 'image/jpeg'),
+    (b'GIF87a', '.gif', 'image/gif'),
+    (b'GIF89a', '.gif', 'image/gif'),
+]
+
+
+def sniff_image_type(head: bytes):
+    """根据文件头识别图片格式，返回 (扩展名, content_type)，无法识别返回 (None, None)。"""
+    for magic, ext, ctype in _SIGNATURES:
+        if head.startswith(magic):
+            return ext, ctype
+    if len(head) >= 12 and head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp', 'image/webp'
+    return None, None
+
+
+def _has_valid_trailer(ctype: str, head: bytes, tail: bytes, size: int) -> bool:
+    """检查文件尾部，识别下载或写入中途被截断的图片。"""
+    if ctype == 'image/png':
+        return tail.endswith(b'IEND\xaeB`\x82')
+    if ctype == 'image/jpeg':
+        return b'\xff\xd9' in tail.rstrip(b'\x00')[-16:]
+    if ctype == 'image/gif':
+        return tail.endswith(b';')
+    if ctype == 'image/webp':
+        return int.from_bytes(head[4:8], 'little') + 8 == size
+    return True
+
+
+class ImageCache:
+    """图片缓存管理：记录每个文件的大小、最近访问时间与格式，按字节上限 LRU 淘汰。
+
+    索引保存在缓存目录旁的 SQLite 数据库 `<目录名>.index.sqlite3`（WAL 模式），同一主机上的多个
+    bot 进程共用同一目录与索引：文件先写入带进程号的临时文件再原子重命名，随后才登记到索引，
+    因此一个进程下载或渲染的结果其它进程立即命中；淘汰在一个写事务（BEGIN IMMEDIATE）中
+    统计总量、选出并删除条目，多个进程不会重复淘汰或各自超出上限。
+    lock(key) / lock_async(key) 是按键的跨进程互斥（fcntl.flock），用于避免重复下载/渲染同一张图。
+    访问时间先记在内存中，每 save_interval 秒批量写入。仅当索引新建或目录在最后一次登记后
+    被外部修改时才扫描整个目录重建。所有方法均线程安全，可在渲染线程中调用。
+    """
+
+    INDEX_VERSION = 2
+    # 超过该时长仍未重命名的临时文件视为中断的写入（其它进程正在写的临时文件不能删除）
+    STALE_TMP_SECONDS = 3600
+    LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(self, cache_dir, max_bytes: int = 200 * 1024 * 1024, save_interval: float = 30.0,
+                 lock_timeout: float = 30.0):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir.parent / f"{self.cache_dir.name}.index.sqlite3"
+        # 锁文件放在缓存目录之外，不影响目录的修改时间与重建扫描
+        self.lock_dir = self.cache_dir.parent / f"{self.cache_dir.name}.locks"
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.save_interval = save_interval
+        self.lock_timeout = lock_timeout
+        self._lock = threading.RLock()
+        self._thread_locks = {}  # 没有 fcntl 时的进程内按键互斥
+        self._touched = {}  # { key: 最近访问时间 }，尚未写入索引
+        self._last_save = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalid = 0
+        self.lock_waits = 0
+        self._conn = sqlite3.connect(str(self.index_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " file TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " atime REAL NOT NULL,"
+                " type TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_atime ON entries (atime)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)")
+        # 旧版本的 JSON 索引已不再使用
+        legacy_index = self.cache_dir.parent / f"{self.cache_dir.name}.index.json"
+        if legacy_index.exists():
+            self._unlink(legacy_index)
+        if not self._index_current():
+            self.rebuild()
+        self._evict()
+
+    # ---------- 索引 ----------
+    def _dir_mtime(self) -> int:
+        try:
+            return self.cache_dir.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def _meta(self, name):
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _record_dir_mtime(self):
+        """在写事务中记录目录的修改时间（须在本次的重命名/删除之后调用）"""
+        self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dir_mtime_ns', ?)",
+                           (self._dir_mtime(),))
+
+    def _index_current(self) -> bool:
+        with self._lock:
+            return (self._meta('version') == self.INDEX_VERSION
+                    and self._meta('dir_mtime_ns') == self._dir_mtime())
+
+    def rebuild(self):
+        """扫描缓存目录重建索引，丢弃无法识别或已损坏的文件；已有条目保留其访问时间。"""
+        entries = {}
+        now = time.time()
+        for path in self.cache_dir.iterdir():
+            if not path.is_file():
+                continue
+            if path.suffix == '.tmp':
+                # 中断的写入；较新的可能是其它进程正在写的文件
+                try:
+                    if now - path.stat().st_mtime > self.STALE_TMP_SECONDS:
+                        self._unlink(path)
+                except OSError:
+                    pass
+                continue
+            ctype = self._validate_file(path)
+            if not ctype:
+                self.invalid += 1
+                self._unlink(path)
+                continue
+            st = path.stat()
+            entries[path.stem] = (path.stem, path.name, st.st_size, min(st.st_mtime, now), ctype)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                known = dict(self._conn.execute("SELECT file, atime FROM entries").fetchall())
+                rows = [(k, f, size, known.get(f, atime), t) for k, f, size, atime, t in entries.values()]
+                self._conn.execute("DELETE FROM entries")
+                self._conn.executemany("INSERT INTO entries (key, file, size, atime, type) VALUES (?, ?, ?, ?, ?)", rows)
+                self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (self.INDEX_VERSION,))
+                self._record_dir_mtime()
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        LOG.info(f"图片缓存索引已重建: {len(entries)} 个文件, {sum(e[2] for e in entries.values()) / 1024 / 1024:.1f}MB")
+
+    def save(self, force: bool = False):
+        """把内存中的访问时间批量写入索引（未到 save_interval 且非 force 时跳过）。"""
+        with self._lock:
+            if not self._touched:
+                return
+            if not force and time.time() - self._last_save < self.save_interval:
+                return
+            touched = list(self._touched.items())
+            self._touched.clear()
+            self._last_save = time.time()
+            try:
+                with self._conn:
+                    self._conn.executemany("UPDATE entries SET atime = MAX(atime, ?) WHERE key = ?",
+                                           [(atime, key) for key, atime in touched])
+            except sqlite3.Error as e:
+                LOG.error(f"保存图片缓存访问时间失败: {e}")
+
+    def close(self):
+        self.save(force=True)
+        with self._lock:
+            self._conn.close()
+
+    # ---------- 跨进程互斥 ----------
+    def _lock_path(self, key: str) -> Path:
+        return self.lock_dir / f"{key}.lock"
+
+    def _try_lock(self, key: str):
+        """尝试获取按键的互斥，成功返回句柄，已被占用返回 None。"""
+        if fcntl is None:
+            with self._lock:
+                lock = self._thread_locks.setdefault(key, threading.Lock())
+            return lock if lock.acquire(blocking=False) else None
+        f = open(self._lock_path(key), 'a+b')
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return None
+        except BaseException:
+            f.close()
+            raise
+        return f
+
+    @staticmethod
+    def _release(handle):
+        if handle is None:
+            return
+        if fcntl is None:
+            handle.release()
+            return
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+    @contextmanager
+    def lock(self, key: str):
+        """跨进程（及线程）的按键互斥，最多等待 lock_timeout 秒，超时后不加锁继续执行。
+
+        持有锁期间应先再次 get(key)：等待时其它进程可能已写入结果。
+        """
+        handle = self._try_lock(key)
+        if handle is None:
+            self.lock_waits += 1
+            deadline = time.monotonic() + self.lock_timeout
+            while handle is None and time.monotonic() < deadline:
+                time.sleep(self.LOCK_POLL_INTERVAL)
+                handle = self._try_lock(key)
+        try:
+            yield handle is not None
+        finally:
+            self._release(handle)
+
+    @asynccontextmanager
+    async def lock_async(self, key: str):
+        """lock() 的协程版本，等待时不阻塞事件循环。"""
+        handle = self._try_lock(key)
+        if handle is None:
+            self.lock_waits += 1
+            deadline = time.monotonic() + self.lock_timeout
+            while handle is None and time.monotonic() < deadline:
+                await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+                handle = self._try_lock(key)
+        try:
+            yield handle is not None
+        finally:
+            self._release(handle)
+
+    # ---------- 校验 ----------
+    @staticmethod
+    def _validate_file(path: Path, expected_size: int = None):
+        """校验文件格式与完整性，通过时返回 content_type，否则返回 None。"""
+        try:
+            size = path.stat().st_size
+            if size == 0 or (expected_size is not None and size != expected_size):
+                return None
+            with open(path, 'rb') as f:
+                head = f.read(16)
+                f.seek(max(0, size - 32))
+                tail = f.read()
+        except OSError:
+            return None
+        _, ctype = sniff_image_type(head)
+        if not ctype or not _has_valid_trailer(ctype, head, tail, size):
+            return None
+        return ctype
+
+    @staticmethod
+    def _unlink(path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    # ---------- 读写 ----------
+    def get(self, key: str, touch: bool = True):
+        """查找并校验缓存条目（包括其它进程写入的），命中时返回路径；文件缺失或损坏时移除条目并返回 None。"""
+        with self._lock:
+            row = self._conn.execute("SELECT file, size FROM entries WHERE key = ?", (key,)).fetchone()
+        if not row:
+            self.misses += 1
+            return None
+        path = self.cache_dir / row[0]
+        if not self._validate_file(path, row[1]):
+            self.invalid += 1
+            self.misses += 1
+            self.discard(path)
+            return None
+        self.hits += 1
+        if touch:
+            with self._lock:
+                self._touched[key] = time.time()
+            self.save()
+        return path
+
+    def put_bytes(self, key: str, data: bytes):
+        """按真实格式选择扩展名写入图片数据；数据不是完整图片时返回 None。"""
+        ext, ctype = sniff_image_type(data[:16])
+        if not ctype or not _has_valid_trailer(ctype, data[:16], data[-32:], len(data)):
+            self.invalid += 1
+            return None
+        path = self.cache_dir / f"{key}{ext}"
+        tmp = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return self.add_file(path, ctype)
+
+    def add_file(self, path, ctype: str = None):
+        """登记已（原子地）写入缓存目录的文件（例如渲染结果），并按需淘汰。"""
+        path = Path(path)
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return None
+        if ctype is None:
+            ctype = self._validate_file(path)
+            if not ctype:
+                self.invalid += 1
+                self._unlink(path)
+                return None
+        with self._lock:
+            with self._conn:
+                old = self._conn.execute("SELECT file FROM entries WHERE key = ?", (path.stem,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, file, size, atime, type) VALUES (?, ?, ?, ?, ?)",
+                    (path.stem, path.name, size, time.time(), ctype),
+                )
+                if old and old[0] != path.name:
+                    self._unlink(self.cache_dir / old[0])
+                self._record_dir_mtime()
+        self._evict(keep=path.stem)
+        return path
+
+    def discard(self, path):
+        path = Path(path)
+        with self._lock:
+            with self._conn:
+                # 只删除仍指向该文件的条目，其它进程可能已用新格式写入同一个键
+                self._conn.execute("DELETE FROM entries WHERE key = ? AND file = ?", (path.stem, path.name))
+                self._unlink(path)
+                self._record_dir_mtime()
+            self._touched.pop(path.stem, None)
+
+    def _evict(self, keep: str = None):
+        # 先写入本进程记录的访问时间，淘汰顺序才能反映各进程的最近访问
+        self.save(force=True)
+        with self._lock:
+            if self._total_bytes() <= self.max_bytes:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 在写锁内重新统计：其它进程可能刚完成淘汰
+                total = self._total_bytes()
+                victims = []
+                if total > self.max_bytes:
+                    for key, name, size in self._conn.execute("SELECT key, file, size FROM entries ORDER BY atime"):
+                        if total <= self.max_bytes:
+                            break
+                        if key == keep:
+                            continue
+                        victims.append((key, name))
+                        total -= size
+                    self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+                    for _, name in victims:
+                        self._unlink(self.cache_dir / name)
+                    self._record_dir_mtime()
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self.evictions += len(victims)
+        if victims:
+            LOG.info(f"图片缓存淘汰 {len(victims)} 个文件，当前 {total / 1024 / 1024:.1f}MB")
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            'entries': entries,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalid': self.invalid,
+            'lock_waits': self.lock_waits,
+        }
@@ -0,0 +1,128 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# 当前正在处理的命令名，供各阶段计时归属到对应命令
+current_command = ContextVar("mh_current_command", default="-")
+
+# Prometheus 直方图桶边界（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """累计桶计数 + 最近 window 个样本（用于计算 p50/p95/p99）。"""
+
+    __slots__ = ("counts", "count", "total", "samples")
+
+    def __init__(self, window: int = 1024):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def percentiles(self, qs=(0.5, 0.95, 0.99)):
+        data = sorted(self.samples)
+        if not data:
+            return [0.0 for _ in qs]
+        return [data[min(len(data) - 1, int(q * len(data)))] for q in qs]
+
+
+class Metrics:
+    """按 (命令, 阶段) 记录耗时的进程内指标。
+
+    阶段约定：dispatch（命令解析）、resolve（怪物名解析：别名与身份表）、analyze（分析器计算）、
+    download（图片下载）、render（肉质图渲染，含排队）、send（消息发送）、total（处理函数总耗时，不含发送）。
+    """
+
+    STAGES = ("dispatch", "resolve", "analyze", "download", "render", "send", "total")
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._hist = {}  # { (command, stage): Histogram }
+        self.started = time.time()
+
+    def observe(self, stage: str, seconds: float, command: str = None):
+        key = (command or current_command.get(), stage)
+        with self._lock:
+            hist = self._hist.get(key)
+            if hist is None:
+                hist = self._hist[key] = Histogram(self.window)
+            hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, command: str = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, command)
+
+    def snapshot(self) -> dict:
+        """返回 {command: {stage: {count, avg, p50, p95, p99}}}，耗时单位为秒。"""
+        out = {}
+        with self._lock:
+            items = list(self._hist.items())
+        for (command, stage), hist in items:
+            p50, p95, p99 = hist.percentiles()
+            out.setdefault(command, {})[stage] = {
+                "count": hist.count,
+                "avg": hist.total / hist.count if hist.count else 0.0,
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+            }
+        return out
+
+    def format_text(self) -> str:
+        snap = self.snapshot()
+        if not snap:
+            return "暂无统计数据"
+        order = {s: i for i, s in enumerate(self.STAGES)}
+        lines = [f"统计自 {time.strftime('%m-%d %H:%M', time.localtime(self.started))}（单位 ms，p50/p95/p99）"]
+        for command in sorted(snap):
+            stages = snap[command]
+            total = stages.get("total", {}).get("count") or max(s["count"] for s in stages.values())
+            lines.append(f"{command} ×{total}")
+            for stage in sorted(stages, key=lambda s: order.get(s, len(order))):
+                st = stages[stage]
+                lines.append(f"  {stage}: {st['p50'] * 1000:.1f}/{st['p95'] * 1000:.1f}/{st['p99'] * 1000:.1f}")
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        def _esc(v):
+            return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        lines = [
+            "# HELP mh_stage_latency_seconds Latency of mh plugin command stages.",
+            "# TYPE mh_stage_latency_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted(self._hist.items())
+            for (command, stage), hist in items:
+                labels = f'command="{_esc(command)}",stage="{_esc(stage)}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS, hist.counts):
+                    cumulative += n
+                    lines.append(f'mh_stage_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'mh_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"mh_stage_latency_seconds_sum{{{labels}}} {hist.total}")
+                lines.append(f"mh_stage_latency_seconds_count{{{labels}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump_prometheus(self, path):
+        """以文本格式写出指标（先写临时文件再替换，供 node_exporter textfile 收集）。"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
@@ -8,9 +8,19 @@ import os
 import sys
 import aiohttp
 import asyncio
+import hashlib
+import threading
+import time
+from functools import partial
 from pathlib import Path
-from datetime import datetime
-from .analyze import MonsterAnalyzer
+from .analyze import MonsterAnalyzer, PHYSICAL_KEYS, STATUS_NAMES, STATUS_ALIASES, format_damage_params
+from .render_pool import RenderPool, RenderQueueFull
+from .image_cache import ImageCache
+from .team_code_store import TeamCodeStore
+from .dispatch import CommandDispatcher
+from .rate_limit import RateLimiter, RequestCoalescer
+from .outbox import OutboundQueue
+from .metrics import Metrics, current_command
 LOG = get_log("mh")
 class mh(NcatBotPlugin):
     name = "mh" 
@@ -18,44 +28,168 @@ class mh(NcatBotPlugin):
     description = "mh插件，用于ncatbot的怪物猎人集会码管理与怪物信息查询" 
     author = "as811"
     meat_background_opacity = 0.10
+    # 肉质图渲染线程池：线程数与排队上限，队列满时直接回退文本
+    render_workers = 2
+    render_queue_size = 8
+    # 爬取完成后是否在后台预热肉质图缓存；空闲检查间隔（秒）
+    warm_cache_after_crawl = True
+    warm_cache_idle_wait = 0.5
+    # 图片缓存（下载图 + 渲染图）字节上限，超出后按最近访问时间淘汰
+    image_cache_max_bytes = 200 * 1024 * 1024
     
     # 初始化：集会码
     is_mhw_team_code = re.compile(r'^[A-Za-z0-9!#$%&+\-=?@^_`~]{12}$')
     is_mhr_team_code = re.compile(r'^[A-Za-z0-9!#$%&+\-=?@^_`~]{16}$')
-    mhw=list()
-    mhr=list()
+    # 集会码按群持久化：过期时间（秒）与每群每种游戏的条数上限
+    team_code_ttl = 6 * 3600
+    team_code_max_per_group = 20
+    # 按命令类别限流：{类别: {"user"/"group": (每秒补充令牌数, 桶容量)}}
+    rate_limits = {
+        "text": {"user": (0.5, 5), "group": (2.0, 20)},
+        "analyze": {"user": (0.5, 5), "group": (2.0, 20)},
+        "render": {"user": (0.1, 2), "group": (0.5, 5)},
+        "crawl": {"user": (1 / 600, 1), "group": (1 / 600, 1)},
+    }
+    # 同一群内相同请求的合并窗口（秒），仅对开销较大的命令类别生效
+    coalesce_window = 5.0
+    coalesce_kinds = ("render", "analyze")
+    # 发送队列：同时发送数上限与失败重试次数（指数退避）
+    send_concurrency = 4
+    send_max_retries = 3
+    # 可选：定期把延迟指标以 Prometheus 文本格式写入该文件（None 为关闭）
+    metrics_prometheus_path = None
+    metrics_dump_interval = 60
+    # 爬取过程中向群内汇报进度的最小间隔（秒）
+    crawl_progress_interval = 30
+    # 可选：按数据源覆盖爬虫的列表页 URL（如镜像站或本地 fixture 服务器），{"mhws": "http://..."}
+    crawler_base_urls = {}
+    # 启动时优先从 data/analyzer.snapshot 恢复分析器（数据与代码未变时免去重新解析），构建后写出新快照
+    analyzer_snapshot = True
+    # 同一主机上多个 bot 进程共用插件目录时开启：肉质表导出为 data/hitzone.shared 并以只读 mmap 共享，
+    # 各进程不再各自持有一份部位数据（所有进程应使用相同设置，否则会互相覆盖启动快照）
+    shared_dataset = False
+    # 排行与属性推荐是否按部位 HP 加权（HP 仅 mhws 数据提供，缺失时等同不加权）
+    recommend_hp_weighted = True
+    # /推荐 一次最多接受的怪物数
+    recommend_max_monsters = 10
+    # /伤害 全部 列出的部位数
+    damage_roster_limit = 20
+    # /伤害 的可选参数：动作值(%)、斩味倍率、属性斩味倍率，如 动作值40 斩味1.32
+    damage_option_re = re.compile(r'^(动作值|斩味|属性斩味)=?(\d+(?:\.\d+)?)%?$')
+    damage_element_re = re.compile(r'^([火水雷冰龙])=?(\d+(?:\.\d+)?)$')
+    # /异常 的参数：异常名+每次累积值（如 毒30），触发次数（如 3次）
+    status_build_re = re.compile(r'^([^\d=]+)=?(\d+(?:\.\d+)?)$')
+    status_times_re = re.compile(r'^(?:(\d+)次|次数=?(\d+))$')
+    # /mhstats 仅限群主、群管理员及以下 QQ 号使用
+    admin_user_ids = set()
+    team_codes = None
+    dispatcher = None
+    rate_limiter = None
+    coalescer = None
+    outbox = None
+    metrics = None
     analyzer = None
+    render_pool = None
+    image_cache = None
+    _metrics_task = None
 
     async def on_load(self):
+        self._warm_tasks = {}
+        self._crawling = set()
+        self.metrics = Metrics()
+        if self.metrics_prometheus_path:
+            self._metrics_task = asyncio.create_task(self._dump_metrics_periodically())
+        self.dispatcher = self._build_dispatcher()
+        self.rate_limiter = RateLimiter(self.rate_limits)
+        self.coalescer = RequestCoalescer(self.coalesce_window)
+        self.outbox = OutboundQueue(
+            self._post_group_msg,
+            max_concurrency=self.send_concurrency,
+            max_retries=self.send_max_retries,
+            metrics=self.metrics,
+        )
         print(f"{self.name} 插件已加载")
         print(f"插件版本: {self.version}")
+        self.team_codes = TeamCodeStore(
+            Path("plugins/mh/team_codes.db"),
+            ttl=self.team_code_ttl,
+            max_per_group=self.team_code_max_per_group,
+        )
         try:
             data_dir = os.path.dirname(__file__)
-            self.analyzer = MonsterAnalyzer(data_dir)
+            self.analyzer = MonsterAnalyzer.load(data_dir, snapshot=self.analyzer_snapshot, shared=self.shared_dataset)
             # 创建图片缓存目录
             self.image_cache_dir = Path("plugins/mh/image_cache")
             self.image_cache_dir.mkdir(parents=True, exist_ok=True)
-            print("怪物数据加载成功")
+            self.image_cache = ImageCache(self.image_cache_dir, max_bytes=self.image_cache_max_bytes)
+            self.render_pool = RenderPool(self.render_workers, self.render_queue_size)
+            print("怪物数据加载成功" + ("（来自启动快照）" if self.analyzer.restored_from_snapshot else ""))
         except Exception as e:
             print(f"怪物数据加载失败: {e}，请确保已运行爬虫脚本以获取数据")
 
+    async def on_unload(self):
+        """释放 on_load 创建的后台任务、渲染线程池与 SQLite 连接，重载插件时不遗留线程和句柄"""
+        tasks = [t for t in (self._metrics_task, *getattr(self, '_warm_tasks', {}).values()) if t and not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.outbox:
+            self.outbox.close()
+        if self.render_pool:
+            self.render_pool.shutdown(wait=False, cancel_futures=True)
+        for store in (self.team_codes, self.image_cache):
+            if store is None:
+                continue
+            try:
+                store.close()
+            except Exception as e:
+                LOG.error(f"关闭 {type(store).__name__} 失败: {e}")
+
+    async def on_close(self):
+        # ncatbot 卸载插件时调用 on_close
+        await self.on_unload()
+        await super().on_close()
+
+    async def _post_group_msg(self, group_id, text=None, rtf=None):
+        """发送队列使用的底层发送函数。"""
+        if rtf is not None:
+            await self.api.post_group_msg(group_id=group_id, rtf=rtf)
+        else:
+            await self.api.post_group_msg(group_id=group_id, text=text)
+
+    async def _dump_metrics_periodically(self):
+        while True:
+            await asyncio.sleep(self.metrics_dump_interval)
+            try:
+                self.metrics.dump_prometheus(self.metrics_prometheus_path)
+            except Exception as e:
+                LOG.error(f"写出 Prometheus 指标失败: {e}")
+
     async def _download_image(self, url: str) -> Path:
-        """下载图片到缓存目录"""
+        """下载图片到缓存目录（按真实格式命名，写入前校验完整性）"""
+        with self.metrics.timer("download"):
+            return await self._fetch_image(url)
+
+    async def _fetch_image(self, url: str) -> Path:
         try:
-            import hashlib
             url_hash = hashlib.md5(url.encode()).hexdigest()
-            cache_path = self.image_cache_dir / f"{url_hash}.png"
-            
-            if cache_path.exists():
+            cache_path = self.image_cache.get(url_hash)
+            if cache_path:
                 return cache_path
-            
-            timeout = aiohttp.ClientTimeout(total=10, connect=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        with open(cache_path, 'wb') as f:
-                            f.write(await response.read())
-                        return cache_path
+
+            # 同一张图同时只由一个进程下载，其余进程等待后直接使用其结果
+            async with self.image_cache.lock_async(url_hash):
+                cache_path = self.image_cache.get(url_hash)
+                if cache_path:
+                    return cache_path
+                timeout = aiohttp.ClientTimeout(total=10, connect=5)
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with session.get(url) as response:
+                        if response.status == 200:
+                            cache_path = self.image_cache.put_bytes(url_hash, await response.read())
+                            if not cache_path:
+                                LOG.error(f"下载内容不是有效图片: {url}")
+                            return cache_path
         except Exception as e:
             LOG.error(f"下载图片失败 {url}: {e}")
         return None
@@ -72,12 +206,11 @@ class mh(NcatBotPlugin):
             except Exception:
                 monster_json = None
 
-        # 尝试从 analyzer 的 monster_list 找图片和描述（如果存在）
-        image_url = ''
+        # 从 analyzer 的 monster_list 找描述（如果存在），图片各数据源共用
+        image_url = self._find_monster_image_url(monster_name, source)
         desc = ''
         for m in (self.analyzer.monster_list or []):
             if m.get('name') == monster_name and m.get('source') == source:
-                image_url = m.get('image', '') or image_url
                 desc = m.get('description', '') or desc
                 break
 
@@ -132,29 +265,15 @@ class mh(NcatBotPlugin):
         if text_reply.strip():
             msg_chain.append(text_reply)
 
-        if msg_chain:
-            try:
-                await self.api.post_group_msg(group_id=msg.group_id, rtf=MessageChain(msg_chain))
-            except Exception as e:
-                LOG.error(f"发送消息失败: {e}")
-                if cache_path and cache_path.exists():
-                    try:
-                        cache_path.unlink()
-                        LOG.info(f"已删除缓存图片: {cache_path}")
-                        cache_path = await self._download_image(image_url)
-                        if cache_path:
-                            msg_chain[0] = Image(str(cache_path))
-                            await self.api.post_group_msg(group_id=msg.group_id, rtf=MessageChain(msg_chain))
-                        else:
-                            await self.api.post_group_msg(group_id=msg.group_id, text=text_reply)
-                    except Exception as retry_e:
-                        LOG.error(f"重试发送失败: {retry_e}")
-                        await self.api.post_group_msg(group_id=msg.group_id, text=text_reply)
-                else:
-                    await self.api.post_group_msg(group_id=msg.group_id, text=text_reply)
+        if cache_path:
+            def _drop_cached_image():
+                # 图片可能已损坏，删除后下次请求会重新下载
+                self.image_cache.discard(cache_path)
+                LOG.info(f"已删除缓存图片: {cache_path}")
+            self.outbox.send_rich(msg.group_id, MessageChain(msg_chain), fallback_text=text_reply, on_fail=_drop_cached_image)
         else:
             # 仅文本（或没有内容）
-            await self.api.post_group_msg(group_id=msg.group_id, text=text_reply)
+            self.outbox.send_text(msg.group_id, text_reply)
 
     def _build_meat_table_payload(self, monster_name: str, source: str):
         """构建肉质表图片所需的数据结构。"""
@@ -218,21 +337,44 @@ class mh(NcatBotPlugin):
         return payload, None
 
     def _find_monster_image_url(self, monster_name: str, source: str) -> str:
+        """同一怪物在各数据源共用一张图片（身份表中排在前面的数据源的图片），只需下载一次。"""
         if not self.analyzer:
             return ""
+        return str(self.analyzer.identity.image_url(monster_name)).strip()
 
-        for m in (self.analyzer.monster_list or []):
-            if m.get('name') == monster_name and m.get('source') == source:
-                return str(m.get('image', '')).strip()
+    def _resolve_name(self, monster_name: str, source: str) -> str:
+        """把别名或其它数据源中的名称映射为 source 中的名称，找不到时原样返回。"""
+        with self.metrics.timer("resolve"):
+            return self.analyzer.identity.name_in(monster_name, source) or monster_name
 
-        for m in (self.analyzer.monster_list or []):
-            if m.get('name') == monster_name:
-                return str(m.get('image', '')).strip()
+    def _resolve_records(self, monster_name: str) -> dict:
+        """查出该怪物在各数据源中的名称 {数据源: 名称}。"""
+        with self.metrics.timer("resolve"):
+            return self.analyzer.identity.records(monster_name)
 
-        return ""
+    def _meat_table_cache_path(self, payload: dict) -> Path:
+        """按渲染内容计算缓存文件名，相同数据与背景总是命中同一张 PNG。"""
+        key = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        safe_name = re.sub(r'[^\w\u4e00-\u9fa5-]+', '_', payload["monster_name"])
+        if not safe_name:
+            safe_name = "monster"
+        return self.image_cache_dir / f"{payload.get('kind', 'meat')}_{payload['source']}_{safe_name}_{digest}.png"
 
     def _render_meat_table_image(self, payload: dict):
-        """将肉质表数据渲染为 PNG。"""
+        """将肉质表数据渲染为 PNG；同一张图同时只由一个进程（线程）渲染，其余等待后直接使用其结果。"""
+        key = self._meat_table_cache_path(payload).stem
+        output_path = self.image_cache.get(key)
+        if output_path:
+            return output_path
+        with self.image_cache.lock(key):
+            output_path = self.image_cache.get(key)
+            if output_path:
+                return output_path
+            return self._draw_meat_table_image(payload)
+
+    def _draw_meat_table_image(self, payload: dict):
+        """绘制肉质表 PNG 并登记到图片缓存。"""
         try:
             from PIL import Image as PILImage, ImageDraw, ImageFont, ImageOps
         except Exception:
@@ -299,7 +441,8 @@ class mh(NcatBotPlugin):
         row_h = max(_text_size("测试", body_font)[1], _text_size("99", body_font)[1]) + 16
         header_h = max(_text_size("部位", header_font)[1], _text_size("99", header_font)[1]) + 18
         state_h = _text_size("状态：正常", section_font)[1] + 16
-        title_h = _text_size(f"{monster_name} 肉质表", title_font)[1] + 10
+        title = payload.get("title") or f"{monster_name} 肉质表"
+        title_h = _text_size(title, title_font)[1] + 10
         sub_h = _text_size(f"数据源：{source}", body_font)[1] + 6
 
         table_w = sum(col_widths)
@@ -337,7 +480,6 @@ class mh(NcatBotPlugin):
         text_color = (20, 20, 20)
 
         y = margin
-        title = f"{monster_name} 肉质表"
         draw.text((margin, y), title, fill=text_color, font=title_font)
         y += title_h
         draw.text((margin, y), f"数据源：{source}", fill=(90, 90, 90), font=body_font)
@@ -355,7 +497,7 @@ class mh(NcatBotPlugin):
 
         for sec in sections:
             draw.rectangle([margin, y, margin + table_w, y + state_h], outline=line_color, fill=state_bg, width=1)
-            state_text = f"状态：{sec['state']}"
+            state_text = sec.get("label") or f"状态：{sec['state']}"
             draw.text((margin + 12, y + (state_h - _text_size(state_text, section_font)[1]) / 2), state_text, fill=text_color, font=section_font)
             y += state_h
 
@@ -368,21 +510,18 @@ class mh(NcatBotPlugin):
 
             y += section_gap
 
-        safe_name = re.sub(r'[^\w\u4e00-\u9fa5-]+', '_', monster_name)
-        if not safe_name:
-            safe_name = "monster"
-        filename = f"meat_{source}_{safe_name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.png"
-        output_path = self.image_cache_dir / filename
-        image.save(output_path)
-        return output_path
+        output_path = self._meat_table_cache_path(payload)
+        tmp_path = output_path.with_name(f"{output_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, output_path)
+        return self.image_cache.add_file(output_path, "image/png")
 
-    async def _send_meat_table_image(self, msg: GroupMessage, monster_name: str, source: str, tip_text: str = ""):
-        """发送肉质 PNG，失败时回退到文本。"""
-        payload, err = self._build_meat_table_payload(monster_name, source)
+    async def _prepare_meat_table_payload(self, monster_name: str, source: str):
+        """构建肉质表数据并下载背景图，返回 (payload, err)。"""
+        with self.metrics.timer("analyze"):
+            payload, err = self._build_meat_table_payload(monster_name, source)
         if err:
-            reply = f"{tip_text}\n{err}" if tip_text else err
-            await self.api.post_group_msg(group_id=msg.group_id, text=reply)
-            return
+            return None, err
 
         background_url = self._find_monster_image_url(monster_name, source)
         background_path = None
@@ -390,107 +529,314 @@ class mh(NcatBotPlugin):
             background_path = await self._download_image(background_url)
         payload["background_image_path"] = str(background_path) if background_path else ""
         payload["background_opacity"] = self.meat_background_opacity
+        return payload, None
+
+    async def _render_meat_table(self, payload: dict):
+        """命中内容寻址缓存时直接返回，否则提交到渲染线程池。"""
+        cache_path = self.image_cache.get(self._meat_table_cache_path(payload).stem)
+        if cache_path:
+            return cache_path
+        if self.render_pool:
+            return await self.render_pool.submit(self._render_meat_table_image, payload)
+        return await asyncio.to_thread(self._render_meat_table_image, payload)
 
-        image_path = await asyncio.to_thread(self._render_meat_table_image, payload)
-        fallback_text = self.analyzer.get_monster_meat(monster_name, source=source)
+    async def _send_meat_table_image(self, msg: GroupMessage, monster_name: str, source: str, tip_text: str = ""):
+        """发送肉质 PNG，失败时回退到文本。"""
+        payload, err = await self._prepare_meat_table_payload(monster_name, source)
+        if err:
+            reply = f"{tip_text}\n{err}" if tip_text else err
+            self.outbox.send_text(msg.group_id, reply)
+            return
+
+        with self.metrics.timer("analyze"):
+            fallback_text = self.analyzer.get_monster_meat(monster_name, source=source)
         if tip_text:
             fallback_text = f"{tip_text}\n{fallback_text}"
 
+        try:
+            with self.metrics.timer("render"):
+                image_path = await self._render_meat_table(payload)
+        except RenderQueueFull as e:
+            LOG.warning(f"{e}，回退文本: {monster_name}")
+            image_path = None
+        except Exception as e:
+            LOG.error(f"渲染肉质 PNG 失败: {e}")
+            image_path = None
+
         if not image_path:
-            await self.api.post_group_msg(group_id=msg.group_id, text=fallback_text)
+            self.outbox.send_text(msg.group_id, fallback_text)
             return
 
         msg_chain = [Image(str(image_path))]
         if tip_text:
             msg_chain.append(tip_text)
 
-        try:
-            await self.api.post_group_msg(group_id=msg.group_id, rtf=MessageChain(msg_chain))
-        except Exception as e:
-            LOG.error(f"发送肉质 PNG 失败: {e}")
-            await self.api.post_group_msg(group_id=msg.group_id, text=fallback_text)
+        self.outbox.send_rich(msg.group_id, MessageChain(msg_chain), fallback_text=fallback_text)
+
+    async def _warm_meat_cache(self, source: str):
+        """爬取后预热：逐个下载背景图并预渲染肉质表。
+
+        以低优先级运行：渲染线程池有用户请求时让出，队列满时稍后重试。
+        """
+        analyzer = self.analyzer
+        if not analyzer or not self.render_pool:
+            return
+        current_command.set("warmup")
+        names = list(analyzer.meat_data.get(source, {}).keys())
+        rendered = 0
+        start = time.perf_counter()
+        for name in names:
+            if analyzer is not self.analyzer:
+                # 数据已被再次重载，放弃本轮预热
+                return
+            try:
+                payload, err = await self._prepare_meat_table_payload(name, source)
+                if err or self.image_cache.get(self._meat_table_cache_path(payload).stem, touch=False):
+                    continue
+                while True:
+                    while not self.render_pool.is_idle():
+                        await asyncio.sleep(self.warm_cache_idle_wait)
+                    try:
+                        await self.render_pool.submit(self._render_meat_table_image, payload)
+                        rendered += 1
+                        break
+                    except RenderQueueFull:
+                        await asyncio.sleep(self.warm_cache_idle_wait)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOG.error(f"预热肉质图失败 {source}/{name}: {e}")
+        LOG.info(f"{source} 肉质图预热完成: 新渲染 {rendered}/{len(names)}，耗时 {time.perf_counter() - start:.1f}s")
+
+    def _schedule_cache_warmup(self, source: str):
+        if not self.warm_cache_after_crawl:
+            return
+        task = self._warm_tasks.get(source)
+        if task and not task.done():
+            task.cancel()
+        self._warm_tasks[source] = asyncio.create_task(self._warm_meat_cache(source))
+
+    def _build_dispatcher(self) -> CommandDispatcher:
+        """注册全部命令到分发表。"""
+        d = CommandDispatcher()
+        d.pattern(12, self.is_mhw_team_code, partial(self._cmd_record_team_code, game='mhw'))
+        d.pattern(16, self.is_mhr_team_code, partial(self._cmd_record_team_code, game='mhr'))
+
+        d.exact("/helpMH", self._cmd_help)
+        d.exact("/helpmh", self._cmd_help)
+        d.exact("/查询", self._cmd_list_team_codes)
+        d.exact("/删除mhw", partial(self._cmd_pop_team_code, game='mhw'))
+        d.exact("/删除mhr", partial(self._cmd_pop_team_code, game='mhr'))
+        d.exact("/清空", self._cmd_clear_team_codes)
+        d.exact("/爬取ws", partial(self._cmd_crawl, source='mhws'), kind="crawl")
+        d.exact("/爬取wi", partial(self._cmd_crawl, source='mhwi'), kind="crawl")
+        d.exact("/渲染状态", self._cmd_render_stats)
+        d.exact("/mhstats", self._cmd_stats)
+        d.exact("/怪物列表", self._cmd_monster_list)
+
+        d.with_arg("/ws简介", partial(self._cmd_intro, source='mhws'), kind="render")
+        d.with_arg("/wi简介", partial(self._cmd_intro, source='mhwi'), kind="render")
+        d.with_arg("/ws弱点", partial(self._cmd_weakness, source='mhws'), kind="analyze")
+        d.with_arg("/wi弱点", partial(self._cmd_weakness, source='mhwi'), kind="analyze")
+        d.with_arg("/ws肉质", partial(self._cmd_meat, source='mhws'), kind="render")
+        d.with_arg("/wi肉质", partial(self._cmd_meat, source='mhwi'), kind="render")
+        d.with_arg("/掉落", self._cmd_drops, kind="analyze")
+        d.with_arg("/ws掉落", partial(self._cmd_drops, source='mhws'), kind="analyze")
+        d.with_arg("/wi掉落", partial(self._cmd_drops, source='mhwi'), kind="analyze")
+        d.with_arg("/ws排行", partial(self._cmd_ranking, source='mhws'), kind="analyze")
+        d.with_arg("/wi排行", partial(self._cmd_ranking, source='mhwi'), kind="analyze")
+        d.with_arg("/ws推荐", partial(self._cmd_recommend, source='mhws'), kind="analyze")
+        d.with_arg("/wi推荐", partial(self._cmd_recommend, source='mhwi'), kind="analyze")
+        d.with_arg("/ws伤害", partial(self._cmd_damage, source='mhws'), kind="render")
+        d.with_arg("/wi伤害", partial(self._cmd_damage, source='mhwi'), kind="render")
+        d.with_arg("/ws异常", partial(self._cmd_status, source='mhws'), kind="analyze")
+        d.with_arg("/wi异常", partial(self._cmd_status, source='mhwi'), kind="analyze")
+        # 不带数据源的命令 —— 经身份表一次查出该怪物在所有数据源中的记录
+        d.with_arg("/简介", self._cmd_all_intro, kind="render")
+        d.with_arg("/弱点", self._cmd_all_weakness, kind="analyze")
+        d.with_arg("/肉质", self._cmd_all_meat, kind="render")
+        return d
 
     @filter_registry.group_filter
     async def on_group_message(self, msg: GroupMessage):
         text = msg.raw_message
         text = text.replace("&amp;", "&") 
-        if text == "/helpMH" or text == "/helpmh":
-            menu_text = \
-            "直接发送集会码即可记录喵~\n" \
-            "/查询 获取集会列表\n" \
-            "/删除mhw 删除最近一个 MHW 集会码\n" \
-            "/删除mhr 删除最近一个 MHR 集会码\n" \
-            "/清空 清空所有集会码\n"\
-            "/爬取ws(wi) 更新最新数据\n" \
-            "/怪物列表 列出已收录的怪物名称\n" \
-            "/ws(wi)简介 怪物名字 查询该怪物的信息\n" \
-            "/ws(wi)弱点 怪物名字 查询该怪物的弱点简析\n" \
-            "/ws(wi)肉质 怪物名字 查询 mhws(mhwi) 数据源的肉质表"
-            await msg.reply(text = menu_text, at = False)
-        if self.is_mhw_team_code.match(text):
-            self.mhw.append(text)
-            await self.api.post_group_msg(group_id=msg.group_id,text=f"收到 MHW 集会码：\n{text}\n输入 /查询 获取集会列表喵~") 
-        if self.is_mhr_team_code.match(text):
-                self.mhr.append(text)
-                await self.api.post_group_msg(group_id=msg.group_id,text=f"收到 MHR 集会码：\n{text}\n输入 /查询 获取集会列表喵~") 
-        if text == "/查询":
-            mhw_codes = "\n".join(self.mhw) if len(self.mhw) > 0 else "暂无 MHW 集会码"
-            mhr_codes = "\n".join(self.mhr) if len(self.mhr) > 0 else "暂无 MHR 集会码"
-            await self.api.post_group_msg(group_id=msg.group_id,text=f"MHW集会码：\n{mhw_codes}\nMHR 集会码：\n{mhr_codes} ")
-        if text == "/删除mhw":
-            if len(self.mhw) == 0:
-                await self.api.post_group_msg(group_id=msg.group_id,text="没有可删除的 MHW 集会码喵~")
-                return
-            await self.api.post_group_msg(group_id=msg.group_id,text="已删除一个 MHW 集会码"+self.mhw[-1]+"喵~")
-            self.mhw.pop()
-        if text == "/删除mhr":
-            if len(self.mhr) == 0:
-                await self.api.post_group_msg(group_id=msg.group_id,text="没有可删除的 MHR 集会码喵~")
-                return
-            await self.api.post_group_msg(group_id=msg.group_id,text="已删除一个 MHR 集会码"+self.mhr[-1]+"喵~")
-            self.mhr.pop()
-        if text == "/清空":
-            self.mhw.clear()
-            self.mhr.clear()
-            await self.api.post_group_msg(group_id=msg.group_id,text="已清空所有集会码喵~")
-        if text == "/爬取ws":
-            # 动态调用爬虫主函数（可用 subprocess 或 import 调用 main）
-            os.system(f"{sys.executable} plugins/mh/mhws_Wiki_Crawler/src/mhws_crawler.py")
-            self.analyzer = MonsterAnalyzer(os.path.dirname(__file__))
-            await self.api.post_group_msg(group_id=msg.group_id, text="已爬取并更新ws肉质表数据")
+        start = time.perf_counter()
+        route = self.dispatcher.resolve(text)
+        if route is None:
             return
-        if text == "/爬取wi":
-            # 动态调用爬虫主函数（可用 subprocess 或 import 调用 main）
-            os.system(f"{sys.executable} plugins/mh/mhwi_Wiki_Crawler/src/mhwi_crawler.py")
-            self.analyzer = MonsterAnalyzer(os.path.dirname(__file__))
-            await self.api.post_group_msg(group_id=msg.group_id, text="已爬取并更新wi肉质表数据")
+        handler, args, kind = route
+        command = text.split(' ', 1)[0].strip() if text.startswith('/') else 'team_code'
+        current_command.set(command)
+        self.metrics.observe("dispatch", time.perf_counter() - start)
+        if not self.rate_limiter.allow(kind, msg.group_id, getattr(msg, 'user_id', None)):
+            LOG.info(f"触发限流，忽略命令: group={msg.group_id} user={getattr(msg, 'user_id', None)} kind={kind}")
             return
-        if text.strip() == "/怪物列表":
-            # 按数据源分组输出，优先显示 mhwi，然后 mhws
-            grouped = {}
-            for m in (self.analyzer.monster_list or []):
-                name = m.get('name','')
-                if not name:
-                    continue
-                src = m.get('source','unknown')
-                grouped.setdefault(src, []).append(name)
-
-            parts = []
-            for src in ['mhwi', 'mhws']:
-                if src in grouped:
-                    # 去重但保持原顺序
-                    seen = set()
-                    uniq = []
-                    for n in grouped[src]:
-                        if n and n not in seen:
-                            seen.add(n)
-                            uniq.append(n)
-                    parts.append(f"{src}:")
-                    parts.append(' '.join(uniq))
-
-            # 如果还有其它来源，按字母序附加
-            other_srcs = sorted(k for k in grouped.keys() if k not in ('mhwi','mhws'))
-            for src in other_srcs:
+        with self.metrics.timer("total"):
+            if kind in self.coalesce_kinds:
+                # 同一群短时间内的相同请求只处理并回复一次
+                await self.coalescer.run((msg.group_id, text.strip()), partial(handler, msg, *args))
+            else:
+                await handler(msg, *args)
+
+    async def _cmd_help(self, msg: GroupMessage):
+        menu_text = \
+        "直接发送集会码即可记录喵~\n" \
+        "/查询 获取集会列表\n" \
+        "/删除mhw 删除最近一个 MHW 集会码\n" \
+        "/删除mhr 删除最近一个 MHR 集会码\n" \
+        "/清空 清空本群所有集会码\n"\
+        "/爬取ws(wi) 更新最新数据\n" \
+        "/怪物列表 列出已收录的怪物名称\n" \
+        "/ws(wi)简介 怪物名字 查询该怪物的信息\n" \
+        "/ws(wi)弱点 怪物名字 查询该怪物的弱点简析\n" \
+        "/ws(wi)肉质 怪物名字 查询 mhws(mhwi) 数据源的肉质表\n" \
+        "/简介 /弱点 /肉质 怪物名字 汇总所有数据源的结果\n" \
+        "/掉落 素材名 查询掉落该素材的怪物（/ws掉落 /wi掉落 指定数据源）\n" \
+        "/ws(wi)排行 火 查看某一肉质列的怪物排行，打>斩 列出打优于斩的怪物\n" \
+        "/ws(wi)推荐 怪物1 怪物2 … 为接下来的几场狩猎推荐属性\n" \
+        "/ws(wi)伤害 怪物名(或 全部) 攻击力 [火30] [斩/打/弹] [动作值40] [斩味1.32] 估算各部位伤害\n" \
+        "/ws(wi)异常 毒30 [麻痹25] [3次] 怪物1 怪物2 … 计算触发异常所需的命中数\n" \
+        "/渲染状态 查看肉质图渲染队列与耗时\n" \
+        "/mhstats 查看各命令分阶段耗时统计（管理员）"
+        self.outbox.send_text(msg.group_id, menu_text)
+
+    async def _cmd_record_team_code(self, msg: GroupMessage, code: str, game: str):
+        self.team_codes.add(msg.group_id, game, code)
+        self.outbox.send_text(msg.group_id, f"收到 {game.upper()} 集会码：\n{code}\n输入 /查询 获取集会列表喵~")
+
+    async def _cmd_list_team_codes(self, msg: GroupMessage):
+        mhw_list = self.team_codes.list(msg.group_id, 'mhw')
+        mhr_list = self.team_codes.list(msg.group_id, 'mhr')
+        mhw_codes = "\n".join(mhw_list) if len(mhw_list) > 0 else "暂无 MHW 集会码"
+        mhr_codes = "\n".join(mhr_list) if len(mhr_list) > 0 else "暂无 MHR 集会码"
+        self.outbox.send_text(msg.group_id, f"MHW集会码：\n{mhw_codes}\nMHR 集会码：\n{mhr_codes} ")
+
+    async def _cmd_pop_team_code(self, msg: GroupMessage, game: str):
+        code = self.team_codes.pop_latest(msg.group_id, game)
+        if code is None:
+            self.outbox.send_text(msg.group_id, f"没有可删除的 {game.upper()} 集会码喵~")
+            return
+        self.outbox.send_text(msg.group_id, f"已删除一个 {game.upper()} 集会码"+code+"喵~")
+
+    async def _cmd_clear_team_codes(self, msg: GroupMessage):
+        self.team_codes.clear(msg.group_id)
+        self.outbox.send_text(msg.group_id, "已清空所有集会码喵~")
+
+    async def _run_crawler(self, source: str, on_progress=None) -> int:
+        """以子进程运行爬虫脚本，解析其标准输出中的 PROGRESS 行并回调，返回退出码。"""
+        script = os.path.join(os.path.dirname(__file__), f"{source}_Wiki_Crawler", "src", f"{source}_crawler.py")
+        args = [script]
+        if self.crawler_base_urls.get(source):
+            args += ["--base-url", self.crawler_base_urls[source]]
+        proc = await asyncio.create_subprocess_exec(sys.executable, *args, stdout=asyncio.subprocess.PIPE)
+        async for raw in proc.stdout:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line.startswith("PROGRESS "):
+                continue
+            try:
+                progress = json.loads(line[len("PROGRESS "):])
+            except ValueError:
+                continue
+            if on_progress:
+                on_progress(progress)
+        return await proc.wait()
+
+    async def _cmd_crawl(self, msg: GroupMessage, source: str):
+        if source in self._crawling:
+            self.outbox.send_text(msg.group_id, f"{source[2:]} 数据正在爬取中，请稍候喵~")
+            return
+        self._crawling.add(source)
+        last = {"progress": None, "reported_at": time.monotonic()}
+
+        def _on_progress(progress):
+            last["progress"] = progress
+            now = time.monotonic()
+            if now - last["reported_at"] >= self.crawl_progress_interval and progress.get("done") < progress.get("total"):
+                last["reported_at"] = now
+                self.outbox.send_text(msg.group_id, f"{source[2:]} 爬取进度：{self._format_crawl_progress(progress)}")
+
+        try:
+            self.outbox.send_text(msg.group_id, f"开始爬取{source[2:]}数据，完成后会通知喵~")
+            code = await self._run_crawler(source, _on_progress)
+        finally:
+            self._crawling.discard(source)
+        # 复用上一个分析器中校验和未变的文件，并刷新启动快照；加载失败时继续使用原分析器
+        try:
+            self.analyzer = MonsterAnalyzer.load(os.path.dirname(__file__), previous=self.analyzer,
+                                                 snapshot=self.analyzer_snapshot, shared=self.shared_dataset)
+        except Exception as e:
+            LOG.error(f"爬取后重新加载 {source} 数据失败: {e}")
+            self.outbox.send_text(msg.group_id, f"{source[2:]} 爬取完成，但重新加载数据失败（{e}），继续使用原有数据喵~")
+            return
+        reply = f"已爬取并更新{source[2:]}肉质表数据"
+        if last["progress"]:
+            reply += f"（{self._format_crawl_progress(last['progress'])}，用时 {last['progress']['elapsed_s']:.0f}s）"
+        if code != 0:
+            reply += f"\n爬虫进程异常退出（code={code}），数据可能不完整"
+        self.outbox.send_text(msg.group_id, reply)
+        self._schedule_cache_warmup(source)
+
+    @staticmethod
+    def _format_crawl_progress(p: dict) -> str:
+        # 与爬虫侧 CrawlReport.format_progress 的格式保持一致
+        text = f"{p.get('done', 0)}/{p.get('total', 0)}，重试 {p.get('retries', 0)} 次"
+        if p.get('failures'):
+            text += f"，失败 {p['failures']} 个"
+        if p.get('eta_s') is not None and p.get('done', 0) < p.get('total', 0):
+            text += f"，预计剩余 {p['eta_s']:.0f}s"
+        return text
+
+    async def _cmd_render_stats(self, msg: GroupMessage):
+        reply = self.render_pool.format_stats() if self.render_pool else "渲染线程池未初始化"
+        self.outbox.send_text(msg.group_id, reply)
+
+    def _is_admin(self, msg: GroupMessage) -> bool:
+        if str(getattr(msg, 'user_id', '')) in {str(u) for u in self.admin_user_ids}:
+            return True
+        return getattr(getattr(msg, 'sender', None), 'role', None) in ('owner', 'admin')
+
+    async def _cmd_stats(self, msg: GroupMessage):
+        if not self._is_admin(msg):
+            self.outbox.send_text(msg.group_id, "该命令仅限群主或管理员使用喵~")
+            return
+        parts = [self.metrics.format_text()]
+        if self.render_pool:
+            parts.append("—— 渲染 ——\n" + self.render_pool.format_stats())
+        o = self.outbox.stats()
+        parts.append(
+            "—— 发送 ——\n"
+            f"排队: {o['pending']}  已发送: {o['sent']}  重试: {o['retried']}  失败: {o['failed']}  "
+            f"合并: {o['merged']}  丢弃: {o['dropped']}  回退文本: {o['fallbacks']}"
+        )
+        if self.image_cache:
+            c = self.image_cache.stats()
+            parts.append(
+                "—— 图片缓存 ——\n"
+                f"{c['entries']} 个文件 {c['bytes'] / 1024 / 1024:.1f}/{c['max_bytes'] / 1024 / 1024:.0f}MB  "
+                f"命中: {c['hits']}  未命中: {c['misses']}  淘汰: {c['evictions']}  等待其它进程: {c['lock_waits']}"
+            )
+        if self.metrics_prometheus_path:
+            try:
+                self.metrics.dump_prometheus(self.metrics_prometheus_path)
+            except Exception as e:
+                LOG.error(f"写出 Prometheus 指标失败: {e}")
+        self.outbox.send_text(msg.group_id, "\n".join(parts))
+
+    async def _cmd_monster_list(self, msg: GroupMessage):
+        # 按数据源分组输出，优先显示 mhwi，然后 mhws
+        grouped = {}
+        for m in (self.analyzer.monster_list or []):
+            name = m.get('name','')
+            if not name:
+                continue
+            src = m.get('source','unknown')
+            grouped.setdefault(src, []).append(name)
+
+        parts = []
+        for src in ['mhwi', 'mhws']:
+            if src in grouped:
+                # 去重但保持原顺序
                 seen = set()
                 uniq = []
                 for n in grouped[src]:
@@ -500,59 +846,200 @@ class mh(NcatBotPlugin):
                 parts.append(f"{src}:")
                 parts.append(' '.join(uniq))
 
-            reply = '\n'.join(parts) if parts else '暂无已收录的怪物'
-            await self.api.post_group_msg(group_id=msg.group_id, text=reply)
-            return
-        
-        # 支持按数据源查询简介
-        if text.startswith("/ws简介 "):
-            monster_name = text[len("/ws简介 "):].strip()
-            reply = self._build_intro_for_source(monster_name, 'mhws')
-            await self._send_intro_reply(msg, reply)
-            return
-        if text.startswith("/wi简介 "):
-            monster_name = text[len("/wi简介 "):].strip()
-            reply = self._build_intro_for_source(monster_name, 'mhwi')
-            await self._send_intro_reply(msg, reply)
-            return
-        # 支持按数据源查询弱点
-        if text.startswith("/ws弱点 "):
-            monster_name = text[len("/ws弱点 "):].strip()
-            reply = self.analyzer.get_monster_weakness(monster_name, source='mhws')
-            await self.api.post_group_msg(group_id=msg.group_id, text=reply)
-            return
-        if text.startswith("/wi弱点 "):
-            monster_name = text[len("/wi弱点 "):].strip()
-            reply = self.analyzer.get_monster_weakness(monster_name, source='mhwi')
-            await self.api.post_group_msg(group_id=msg.group_id, text=reply)
+        # 如果还有其它来源，按字母序附加
+        other_srcs = sorted(k for k in grouped.keys() if k not in ('mhwi','mhws'))
+        for src in other_srcs:
+            seen = set()
+            uniq = []
+            for n in grouped[src]:
+                if n and n not in seen:
+                    seen.add(n)
+                    uniq.append(n)
+            parts.append(f"{src}:")
+            parts.append(' '.join(uniq))
+
+        reply = '\n'.join(parts) if parts else '暂无已收录的怪物'
+        self.outbox.send_text(msg.group_id, reply)
+
+    # 支持按数据源查询简介
+    async def _cmd_intro(self, msg: GroupMessage, monster_name: str, source: str):
+        monster_name = self._resolve_name(monster_name, source)
+        with self.metrics.timer("analyze"):
+            reply = self._build_intro_for_source(monster_name, source)
+        await self._send_intro_reply(msg, reply)
+
+    async def _cmd_all_intro(self, msg: GroupMessage, monster_name: str):
+        records = self._resolve_records(monster_name)
+        if not records:
+            self.outbox.send_text(msg.group_id, "未找到该怪物信息")
             return
-        # 向后兼容旧命令 /简介 —— 映射到 mhws 并给出提示
-        if text.startswith("/简介 "):
-            monster_name = text[3:].strip()
-            reply = self.analyzer.get_monster_intro(monster_name)
-            reply = "(已使用默认数据源 mhws，如需 mhwi 请使用 /wi简介 )\n" + reply
-            await self.api.post_group_msg(group_id=msg.group_id, text=reply)
+        with self.metrics.timer("analyze"):
+            blocks = [self._build_intro_for_source(name, src) for src, name in records.items()]
+        # 图片各源共用、查询提示相同，只保留第一段中的
+        rest = [line for block in blocks[1:] for line in block.split('\n')
+                if not line.startswith("图片: ") and not line.startswith("输入/")]
+        await self._send_intro_reply(msg, "\n".join([blocks[0]] + rest))
+
+    # 支持按数据源查询弱点
+    async def _cmd_weakness(self, msg: GroupMessage, monster_name: str, source: str, tip_text: str = ""):
+        monster_name = self._resolve_name(monster_name, source)
+        with self.metrics.timer("analyze"):
+            reply = self.analyzer.get_monster_weakness(monster_name, source=source)
+        if tip_text:
+            reply = f"{tip_text}\n" + reply
+        self.outbox.send_text(msg.group_id, reply)
+
+    async def _cmd_all_weakness(self, msg: GroupMessage, monster_name: str):
+        records = self._resolve_records(monster_name)
+        with self.metrics.timer("analyze"):
+            replies = [f"[{src}] " + self.analyzer.get_monster_weakness(name, source=src)
+                       for src, name in records.items() if name in self.analyzer.meat_data.get(src, {})]
+        self.outbox.send_text(msg.group_id, "\n".join(replies) if replies else "未找到该怪物的肉质数据")
+
+    # 素材反查：支持部分素材名，不指定数据源时同时查询两个源
+    async def _cmd_drops(self, msg: GroupMessage, material_name: str, source: str = None):
+        with self.metrics.timer("analyze"):
+            reply = self.analyzer.get_material_drops(material_name, source=source)
+        self.outbox.send_text(msg.group_id, reply)
+
+    async def _cmd_ranking(self, msg: GroupMessage, query: str, source: str):
+        with self.metrics.timer("analyze"):
+            reply = self.analyzer.get_ranking(query, source, weighted=self.recommend_hp_weighted)
+        self.outbox.send_text(msg.group_id, reply)
+
+    async def _cmd_recommend(self, msg: GroupMessage, names: str, source: str):
+        monsters = [self._resolve_name(n, source) for n in re.split(r'[\s,，、]+', names) if n][:self.recommend_max_monsters]
+        with self.metrics.timer("analyze"):
+            reply = self.analyzer.get_element_recommendation(monsters, source, weighted=self.recommend_hp_weighted)
+        self.outbox.send_text(msg.group_id, reply)
+
+    def _parse_damage_args(self, text: str):
+        """解析 /伤害 的参数，返回 (怪物名或 None, 攻击力, 计算参数, 错误信息)。"""
+        tokens = text.split()
+        if len(tokens) < 2:
+            return None, None, None, "用法：/ws伤害 怪物名(或 全部) 攻击力 [火30] [斩/打/弹] [动作值40] [斩味1.32] [属性斩味1.06]"
+        monster = None if tokens[0] == '全部' else tokens[0]
+        attack = None
+        params = {}
+        keys = {'动作值': 'motion', '斩味': 'sharpness', '属性斩味': 'element_sharpness'}
+        for tok in tokens[1:]:
+            if tok in PHYSICAL_KEYS:
+                params['phys_type'] = tok
+                continue
+            m = self.damage_element_re.match(tok)
+            if m:
+                params['element'], params['element_value'] = m.group(1), float(m.group(2))
+                continue
+            m = self.damage_option_re.match(tok)
+            if m:
+                params[keys[m.group(1)]] = float(m.group(2))
+                continue
+            try:
+                value = float(tok)
+            except ValueError:
+                return None, None, None, f"无法识别的参数：{tok}"
+            if attack is not None:
+                return None, None, None, f"攻击力重复：{tok}"
+            attack = value
+        if attack is None:
+            return None, None, None, "缺少攻击力"
+        return monster, attack, params, None
+
+    def _parse_status_args(self, text: str):
+        """解析 /异常 的参数，返回 (怪物名列表, {异常: 累积值}, 触发次数, 错误信息)。"""
+        monsters, build, times = [], {}, 1
+        for tok in re.split(r'[\s,，、]+', text):
+            if not tok:
+                continue
+            m = self.status_times_re.match(tok)
+            if m:
+                times = int(m.group(1) or m.group(2))
+                continue
+            m = self.status_build_re.match(tok)
+            if m:
+                status = STATUS_ALIASES.get(m.group(1), m.group(1))
+                if status in STATUS_NAMES:
+                    build[status] = float(m.group(2))
+                    continue
+            monsters.append(tok)
+        if not build or not monsters:
+            return None, None, None, f"用法：/ws异常 毒30 [麻痹25] [3次] 怪物1 怪物2 …（异常：{' '.join(STATUS_NAMES)}）"
+        return monsters[:self.recommend_max_monsters], build, times, None
+
+    def _build_damage_payload(self, rows, monster_name, source, attack, params):
+        """把伤害计算结果组织成肉质图渲染器使用的表格数据。"""
+        if monster_name:
+            headers = ["部位", "状态", "物理", "属性", "合计"]
+            table = [[part, state, f"{p:.1f}", f"{e:.1f}", f"{t:.1f}"] for t, p, e, _, part, state in rows]
+        else:
+            headers = ["怪物", "部位", "状态", "合计"]
+            table = [[name, part, state, f"{t:.1f}"] for t, _, _, name, part, state in rows]
+        return {
+            "kind": "damage",
+            "monster_name": monster_name or "全部",
+            "source": source,
+            "title": f"{monster_name or '全部怪物'} 伤害估算",
+            "headers": headers,
+            "sections": [{"state": "", "label": format_damage_params(attack, **params), "rows": table}],
+        }
+
+    async def _cmd_damage(self, msg: GroupMessage, text: str, source: str):
+        monster_name, attack, params, err = self._parse_damage_args(text)
+        if err:
+            self.outbox.send_text(msg.group_id, err)
             return
-        # 向后兼容旧命令 /弱点 —— 映射到 mhws 并给出提示
-        if text.startswith("/弱点 "):
-            monster_name = text[len("/弱点 "):].strip()
-            reply = self.analyzer.get_monster_weakness(monster_name, source='mhws')
-            reply = "(已使用默认数据源 mhws，如需 mhwi 请使用 /wi弱点 )\n" + reply
-            await self.api.post_group_msg(group_id=msg.group_id, text=reply)
+        if monster_name:
+            monster_name = self._resolve_name(monster_name, source)
+        limit = None if monster_name else self.damage_roster_limit
+        analyzer = self.analyzer
+        with self.metrics.timer("analyze"):
+            # 全图鉴计算可能有数万行，放到线程中避免阻塞事件循环
+            rows = await asyncio.to_thread(
+                lambda: analyzer.damage_table.compute(source, attack, monster=monster_name, limit=limit, **params))
+            fallback_text = analyzer.format_damage(rows, source, attack, monster=monster_name, **params)
+        if not rows:
+            self.outbox.send_text(msg.group_id, fallback_text)
             return
-        # 支持两个肉质命令，分别对应 mhws 与 mhwi 数据源
-        if text.startswith("/ws肉质 "):
-            monster_name = text[len("/ws肉质 "):].strip()
-            await self._send_meat_table_image(msg, monster_name, source='mhws')
+
+        payload = self._build_damage_payload(rows, monster_name, source, attack, params)
+        background_url = self._find_monster_image_url(monster_name, source) if monster_name else ""
+        background_path = await self._download_image(background_url) if background_url else None
+        payload["background_image_path"] = str(background_path) if background_path else ""
+        payload["background_opacity"] = self.meat_background_opacity
+        try:
+            with self.metrics.timer("render"):
+                image_path = await self._render_meat_table(payload)
+        except RenderQueueFull as e:
+            LOG.warning(f"{e}，回退文本: 伤害估算 {monster_name or '全部'}")
+            image_path = None
+        except Exception as e:
+            LOG.error(f"渲染伤害表 PNG 失败: {e}")
+            image_path = None
+        if not image_path:
+            self.outbox.send_text(msg.group_id, fallback_text)
             return
-        if text.startswith("/wi肉质 "):
-            monster_name = text[len("/wi肉质 "):].strip()
-            await self._send_meat_table_image(msg, monster_name, source='mhwi')
+        self.outbox.send_rich(msg.group_id, MessageChain([Image(str(image_path))]), fallback_text=fallback_text)
+
+    async def _cmd_status(self, msg: GroupMessage, text: str, source: str):
+        monsters, build, times, err = self._parse_status_args(text)
+        if err:
+            self.outbox.send_text(msg.group_id, err)
             return
-        # 向后兼容旧命令 /肉质 —— 映射到 mhws 并给出提示
-        if text.startswith("/肉质 "):
-            monster_name = text[len("/肉质 "):].strip()
-            tip = "(已使用默认数据源 mhws，如需 mhwi 请使用 /wi肉质 )"
-            await self._send_meat_table_image(msg, monster_name, source='mhws', tip_text=tip)
+        monsters = [self._resolve_name(n, source) for n in monsters]
+        with self.metrics.timer("analyze"):
+            reply = self.analyzer.get_status_applications(monsters, source, build, times)
+        self.outbox.send_text(msg.group_id, reply)
+
+    # 肉质命令，分别对应 mhws 与 mhwi 数据源
+    async def _cmd_meat(self, msg: GroupMessage, monster_name: str, source: str, tip_text: str = ""):
+        await self._send_meat_table_image(msg, self._resolve_name(monster_name, source), source=source, tip_text=tip_text)
+
+    async def _cmd_all_meat(self, msg: GroupMessage, monster_name: str):
+        records = {src: name for src, name in self._resolve_records(monster_name).items()
+                   if name in self.analyzer.meat_data.get(src, {})}
+        if not records:
+            self.outbox.send_text(msg.group_id, "未找到该怪物的肉质数据")
             return
-        
\ No newline at end of file
+        # 每个数据源一张肉质图，背景图共用同一个下载缓存
+        for src, name in records.items():
+            await self._send_meat_table_image(msg, name, source=src, tip_text=f"(数据源 {src})" if len(records) > 1 else "")
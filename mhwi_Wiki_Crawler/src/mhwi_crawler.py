@@ -1,53 +1,107 @@
 import os
-import json
+import sys
+import time
+import asyncio
 import logging
+import argparse
 from pathlib import Path
+from urllib.parse import urljoin
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from mhwi_parser import MHWParser
 
+# 与 mhws 爬虫共用的工具模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'mhws_Wiki_Crawler' / 'src'))
+from crawl_report import CrawlReport, print_progress  # noqa: E402
+from async_http_utils import AsyncHttpUtils  # noqa: E402
+from dataset_writer import DatasetWriter  # noqa: E402
+from dataset_schema import normalize_monster  # noqa: E402
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
 class MHWICrawler:
     """MH:World (mhworld.kiranico.com) 爬虫入口"""
 
-    def __init__(self, base_url="https://mhworld.kiranico.com/zh/monsters"):
-        self.base_url = base_url
-        self.session = requests.Session()
-        retries = Retry(total=3, backoff_factor=0.6, status_forcelist=(500, 502, 503, 504))
-        self.session.mount("https://", HTTPAdapter(max_retries=retries))
+    DEFAULT_BASE_URL = "https://mhworld.kiranico.com/zh/monsters"
 
-        # 保存到 plugins/mh/data/mhwi
-        self.data_dir = os.path.join(Path(__file__).resolve().parents[2], 'data', 'mhwi')
+    def __init__(self, base_url=None, report=None, data_dir=None, retries=None, timeout=12, async_http_utils=None):
+        """base_url 可指向本地 fixture 服务器；retries 为同步请求使用的 urllib3 Retry，
+        async_http_utils 为 crawl_async 使用的异步传输（与 mhws 爬虫共用的 AsyncHttpUtils），为空时使用默认配置"""
+        self.base_url = base_url or self.DEFAULT_BASE_URL
+        # 与同步路径的 Retry(total=3, backoff_factor=0.6) 对应：最多 4 次尝试
+        self.async_http_utils = async_http_utils or AsyncHttpUtils(retry_times=4, retry_interval=0.6, timeout=timeout)
+        self.report = report or CrawlReport('mhwi')
+        self.timeout = timeout
+        self.session = requests.Session()
+        if retries is None:
+            retries = Retry(total=3, backoff_factor=0.6, status_forcelist=(500, 502, 503, 504))
+        adapter = HTTPAdapter(max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # 默认保存到 plugins/mh/data/mhwi
+        self.data_dir = data_dir or os.path.join(Path(__file__).resolve().parents[2], 'data', 'mhwi')
         os.makedirs(self.data_dir, exist_ok=True)
+        # 原子写入每个文件并在爬取结束时生成清单
+        self.writer = DatasetWriter(self.data_dir, 'mhwi')
 
-    def _request(self, url, timeout=12):
+    def _request(self, url, timeout=None):
         logging.info(f"请求 URL: {url}")
-        r = self.session.get(url, timeout=timeout)
-        r.raise_for_status()
+        start = time.perf_counter()
+        try:
+            r = self.session.get(url, timeout=timeout or self.timeout)
+            r.raise_for_status()
+        except Exception as e:
+            self.report.record_failure(url, e)
+            raise
+        self.report.record_fetch(url, len(r.content), time.perf_counter() - start, self._retries_taken(r), r.status_code)
         return r
 
+    @staticmethod
+    def _retries_taken(response):
+        """从 urllib3 的 Retry 历史中取出本次请求实际重试的次数"""
+        retries = getattr(getattr(response, 'raw', None), 'retries', None)
+        history = getattr(retries, 'history', None)
+        return len(history) if history else 0
+
     def get_monster_list(self):
         """获取怪物列表页面并解析出每个怪物的简要信息（name/url,image,description）"""
         try:
             resp = self._request(self.base_url)
             parser = MHWParser()
-            return parser.parse_monster_list(resp.text)
+            start = time.perf_counter()
+            lst = parser.parse_monster_list(resp.text)
+            self.report.record_parse(self.base_url, time.perf_counter() - start)
+            return lst
         except Exception as e:
             logging.error(f"获取怪物列表失败: {e}")
             return []
 
     def get_monster_data(self, monster_url):
         try:
+            # 请求失败已由 _request 记录
             resp = self._request(monster_url)
-            parser = MHWParser()
-            return parser.parse_monster_page(resp.text, monster_url)
         except Exception as e:
             logging.error(f"获取怪物详情失败 {monster_url}: {e}")
             return None
+        return self._parse_monster_page(monster_url, resp.text)
+
+    def _parse_monster_page(self, monster_url, html):
+        """解析详情页；解析出错或结果为空时记为解析失败"""
+        start = time.perf_counter()
+        try:
+            data = MHWParser().parse_monster_page(html, monster_url)
+        except Exception as e:
+            logging.error(f"解析怪物详情失败 {monster_url}: {e}")
+            self.report.record_failure(monster_url, f"解析失败: {e}")
+            return None
+        self.report.record_parse(monster_url, time.perf_counter() - start)
+        if not data:
+            self.report.record_failure(monster_url, "解析失败")
+        return data
 
     def _safe_filename(self, name: str) -> str:
         import re
@@ -60,39 +114,127 @@ class MHWICrawler:
             logging.warning("没有怪物数据可保存")
             return
         fname = self._safe_filename(monster_data.get('name') or monster_data.get('id') or 'monster')
-        path = os.path.join(self.data_dir, fname)
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump(monster_data, f, ensure_ascii=False, indent=2)
+            # 在爬取时归一化为与 mhws 相同的通用格式，分析器加载时无需再转换
+            path = self.writer.write_json(fname, normalize_monster(monster_data, 'mhwi'))
             logging.info(f"已保存: {path}")
         except Exception as e:
             logging.error(f"保存失败: {e}")
 
+    def crawl(self):
+        """crawl_async 的顺序版本：使用同步 session（urllib3 Retry）逐个抓取，返回怪物列表"""
+        lst = self.get_monster_list()
+        logging.info(f"抓取到 {len(lst)} 个怪物")
+        if not lst:
+            # 列表获取失败时保留现有数据与清单
+            return lst
+
+        self.report.start(len(lst))
+        for idx, m in enumerate(lst):
+            url = m.get('url')
+            if url and not url.startswith('http'):
+                url = urljoin(self.base_url, url)
+            if not url:
+                logging.warning(f"条目缺少 url: {m}")
+                self.report.record_failure(f"#{idx}", "条目缺少 url")
+                self.report.page_done(f"#{idx}")
+                continue
+            logging.info(f"[{idx+1}/{len(lst)}] 抓取: {m.get('name')} -> {url}")
+            data = self.get_monster_data(url)
+            if data:
+                self.save_monster_data(data)
+            self.report.page_done(url)
+
+        self.writer.write_json('monster_list.json', lst)
+        self.writer.write_manifest(failures=self.report.progress()['failures'])
+        return lst
+
+    async def _request_async(self, url):
+        logging.info(f"请求 URL: {url}")
+        start = time.perf_counter()
+        try:
+            r = await self.async_http_utils.get(url)
+        except Exception as e:
+            self.report.record_failure(url, e, getattr(e, 'retries', 0))
+            raise
+        self.report.record_fetch(url, len(r.content), time.perf_counter() - start, r.retries, r.status_code, r.wire_bytes)
+        return r
 
-def main():
-    crawler = MHWICrawler()
-    lst = crawler.get_monster_list()
-    logging.info(f"抓取到 {len(lst)} 个怪物")
-    # 保存列表
-    try:
-        with open(os.path.join(crawler.data_dir, 'monster_list.json'), 'w', encoding='utf-8') as f:
-            json.dump(lst, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
-    # 抓取列表中全部条目
-    for idx, m in enumerate(lst):
-        url = m.get('url')
-        if url and not url.startswith('http'):
-            url = 'https://mhworld.kiranico.com' + url
-        if not url:
-            logging.warning(f"条目缺少 url: {m}")
-            continue
-        logging.info(f"[{idx+1}/{len(lst)}] 抓取: {m.get('name')} -> {url}")
-        data = crawler.get_monster_data(url)
-        if data:
-            crawler.save_monster_data(data)
+    async def get_monster_list_async(self):
+        try:
+            resp = await self._request_async(self.base_url)
+            start = time.perf_counter()
+            lst = MHWParser().parse_monster_list(resp.text)
+            self.report.record_parse(self.base_url, time.perf_counter() - start)
+            return lst
+        except Exception as e:
+            logging.error(f"获取怪物列表失败: {e}")
+            return []
+
+    async def crawl_monster_async(self, url):
+        try:
+            # 请求失败已由 _request_async 记录
+            resp = await self._request_async(url)
+        except Exception as e:
+            logging.error(f"获取怪物详情失败 {url}: {e}")
+        else:
+            data = self._parse_monster_page(url, resp.text)
+            if data:
+                self.save_monster_data(data)
+        self.report.page_done(url)
+
+    async def crawl_async(self, concurrency=4):
+        """抓取列表页并并发抓取全部条目，返回怪物列表"""
+        try:
+            lst = await self.get_monster_list_async()
+            logging.info(f"抓取到 {len(lst)} 个怪物")
+            if not lst:
+                # 列表获取失败时保留现有数据与清单
+                return lst
+
+            self.report.start(len(lst))
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def _one(idx, m):
+                url = m.get('url')
+                if url and not url.startswith('http'):
+                    url = urljoin(self.base_url, url)
+                if not url:
+                    logging.warning(f"条目缺少 url: {m}")
+                    self.report.record_failure(f"#{idx}", "条目缺少 url")
+                    self.report.page_done(f"#{idx}")
+                    return
+                async with semaphore:
+                    logging.info(f"[{idx+1}/{len(lst)}] 抓取: {m.get('name')} -> {url}")
+                    await self.crawl_monster_async(url)
+
+            await asyncio.gather(*(_one(idx, m) for idx, m in enumerate(lst)))
+
+            # 详情页全部处理完后再写列表与清单，中途崩溃时旧清单仍描述上一份完整数据
+            self.writer.write_json('monster_list.json', lst)
+            self.writer.write_manifest(failures=self.report.progress()['failures'])
+            return lst
+        finally:
+            await self.async_http_utils.close()
+
+
+def main(progress_callback=None, base_url=None, data_dir=None, async_http_utils=None, concurrency=4):
+    crawler = MHWICrawler(base_url, CrawlReport('mhwi', progress_callback), data_dir, async_http_utils=async_http_utils)
+    asyncio.run(crawler.crawl_async(concurrency))
+
+    # 保存爬取报告（放在数据源目录之外，避免被当作怪物数据加载）
+    crawler.report.finish()
+    report_path = os.path.join(os.path.dirname(crawler.data_dir), 'crawl_report_mhwi.json')
+    crawler.report.save(report_path)
+    summary = crawler.report.summary()
+    logging.info(f"爬取报告已保存到: {report_path}（{summary['bytes']} 字节，传输 {summary['wire_bytes']} 字节，解析 {summary['parse_s_total']}s，重试 {summary['retries']} 次，失败 {summary['failures']} 个）")
+    return crawler.report
 
 
 if __name__ == '__main__':
-    main()
+    ap = argparse.ArgumentParser(description="爬取 MH World 怪物数据")
+    ap.add_argument('--base-url', default=None, help="怪物列表页URL（如本地 fixture 服务器）")
+    ap.add_argument('--data-dir', default=None, help="数据保存目录")
+    ap.add_argument('--concurrency', type=int, default=4, help="同时进行的怪物页面请求数")
+    args = ap.parse_args()
+    main(progress_callback=print_progress, base_url=args.base_url, data_dir=args.data_dir, concurrency=args.concurrency)
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import ssl
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# 重试策略与同步的 HttpUtils 共用
+from http_utils import RETRY_STATUS, RetryBudgetExhausted, RetryPolicy  # noqa: F401
+
+# 读取响应体的分块大小
+READ_CHUNK = 64 * 1024
+
+
+def _accept_encoding():
+    """只声明 aiohttp 能解压的编码：brotli 需要安装 brotli 或 brotlicffi"""
+    encodings = ['gzip', 'deflate']
+    for module in ('brotli', 'brotlicffi'):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        encodings.append('br')
+        break
+    return ', '.join(encodings)
+
+
+ACCEPT_ENCODING = _accept_encoding()
+
+
+class ResponseTooLarge(Exception):
+    """响应体超过 max_body_size（不重试）"""
+
+
+class HttpResponse:
+    """异步请求的结果，与 requests.Response 的常用属性保持一致"""
+
+    def __init__(self, url, status_code, headers, content, encoding, retries, wire_bytes=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        # 本次请求实际重试的次数
+        self.retries = retries
+        # 线上传输的字节数（压缩后），无法得知时等于解压后的长度
+        self.wire_bytes = wire_bytes if wire_bytes is not None else len(content)
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+
+class AsyncHttpUtils(RetryPolicy):
+    """HttpUtils 的异步版本：连接池、带抖动的指数退避、全局重试预算、按主机限流与 Retry-After"""
+
+    def __init__(self, retry_times=3, retry_interval=1, timeout=10, max_backoff=30,
+                 retry_budget=100, max_connections=16, per_host=4, insecure_fallback=True,
+                 max_body_size=8 * 1024 * 1024):
+        """初始化异步HTTP工具类
+
+        Args:
+            retry_times: 单个请求的最大尝试次数
+            retry_interval: 退避基数（秒），第 n 次重试的等待上限为 retry_interval * 2^(n-1)
+            timeout: 单次请求超时时间（秒）
+            max_backoff: 单次等待的上限（秒），同样约束 Retry-After
+            retry_budget: 整个实例（一次爬取）允许的重试总数，用完后失败的请求不再重试
+            max_connections: 连接池总连接数
+            per_host: 每个主机的最大并发连接数
+            insecure_fallback: 证书校验失败时，是否对该主机改为不校验证书（与 HttpUtils 行为一致）
+            max_body_size: 响应体（解压后）的最大字节数，超过时抛出 ResponseTooLarge；None 为不限制
+        """
+        self.retry_times = retry_times
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.retry_budget = retry_budget
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.insecure_fallback = insecure_fallback
+        self.max_body_size = max_body_size
+        # 累计重试次数（含SSL降级重试）
+        self.total_retries = 0
+        self.logger = logging.getLogger(__name__)
+        self._session = None
+        # 证书校验失败后改为不校验的主机
+        self._insecure_hosts = set()
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.per_host,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    'Accept-Encoding': ACCEPT_ENCODING,
+                },
+            )
+        return self._session
+
+    async def _read_body(self, resp, url):
+        """分块读取（已解压的）响应体，超过 max_body_size 时立即中止"""
+        limit = self.max_body_size
+        if limit and resp.content_length and resp.content_length > limit:
+            raise ResponseTooLarge(f"响应体 {resp.content_length} 字节超过上限 {limit}: {url}")
+        chunks = []
+        size = 0
+        async for chunk in resp.content.iter_chunked(READ_CHUNK):
+            size += len(chunk)
+            if limit and size > limit:
+                raise ResponseTooLarge(f"响应体超过上限 {limit} 字节: {url}")
+            chunks.append(chunk)
+        content = b''.join(chunks)
+        # 压缩传输时 total_raw_bytes 为线上字节数（较旧的 aiohttp 没有该属性）
+        wire_bytes = getattr(resp.content, 'total_raw_bytes', None) or resp.content_length
+        return content, wire_bytes
+
+    async def get(self, url, params=None, verify_ssl=True):
+        """发送GET请求并处理可能的异常
+
+        Args:
+            url: 请求的URL
+            params: URL参数
+            verify_ssl: 是否验证SSL证书
+
+        Returns:
+            response: HttpResponse
+
+        Raises:
+            aiohttp.ClientError / asyncio.TimeoutError: 请求失败且重试次数用尽时抛出
+            RetryBudgetExhausted: 全局重试预算用完时抛出
+            ResponseTooLarge: 响应体超过 max_body_size 时抛出
+            抛出的异常带有 retries 属性，为放弃前已重试的次数
+        """
+        counter = [0]
+        try:
+            return await self._get(url, params, verify_ssl, counter)
+        except Exception as e:
+            e.retries = counter[0]
+            raise
+
+    async def _get(self, url, params, verify_ssl, counter):
+        session = await self._get_session()
+        host = urlsplit(url).hostname
+        for attempt in range(1, self.retry_times + 1):
+            insecure = not verify_ssl or host in self._insecure_hosts
+            retry_after = None
+            try:
+                self.logger.debug(f"正在请求: {url}")
+                async with session.get(url, params=params, ssl=False if insecure else None) as resp:
+                    if resp.status in RETRY_STATUS and attempt < self.retry_times:
+                        retry_after = self._parse_retry_after(resp.headers.get('Retry-After'))
+                        self.logger.warning(f"服务器返回 {resp.status} ({attempt}/{self.retry_times}): {url}")
+                    else:
+                        resp.raise_for_status()
+                        content, wire_bytes = await self._read_body(resp, url)
+                        return HttpResponse(str(resp.url), resp.status, resp.headers, content, resp.charset,
+                                            counter[0], wire_bytes)
+            except aiohttp.ClientConnectorCertificateError as e:
+                if not self.insecure_fallback or insecure or attempt >= self.retry_times:
+                    self.logger.error(f"SSL错误 ({attempt}/{self.retry_times}): {e}")
+                    raise
+                # 不再递归调用：记录该主机改为不校验证书，计作一次重试后继续循环
+                self.logger.warning(f"SSL证书验证失败: {e}，之后对 {host} 关闭SSL验证")
+                self._insecure_hosts.add(host)
+                self._take_retry(url)
+                counter[0] += 1
+                continue
+            except aiohttp.ClientResponseError as e:
+                self.logger.error(f"请求失败 ({attempt}/{self.retry_times}): {e}")
+                raise
+            except asyncio.TimeoutError:
+                self.logger.warning(f"请求超时 ({attempt}/{self.retry_times}): {url}")
+                if attempt >= self.retry_times:
+                    raise
+            except (aiohttp.ClientError, ssl.SSLError) as e:
+                self.logger.error(f"请求失败 ({attempt}/{self.retry_times}): {e}")
+                if attempt >= self.retry_times:
+                    raise
+
+            self._take_retry(url)
+            counter[0] += 1
+            sleep_time = self._backoff(attempt, retry_after)
+            self.logger.info(f"等待 {sleep_time:.2f} 秒后重试...")
+            await asyncio.sleep(sleep_time)
+
+    async def close(self):
+        """关闭会话与连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,161 @@
+import json
+import os
+import time
+
+
+class CrawlReport:
+    """爬取报告：按URL记录字节数（解压后与线上传输）、请求耗时、重试次数、解析耗时与失败原因，并汇报进度"""
+
+    def __init__(self, source, progress_callback=None):
+        """初始化爬取报告
+
+        Args:
+            source: 数据源名称（如 mhws / mhwi）
+            progress_callback: 每完成一个页面时调用，参数为 progress() 返回的字典
+        """
+        self.source = source
+        self.progress_callback = progress_callback
+        self.pages = {}
+        self.total = 0
+        self.done = 0
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.finished_at = None
+
+    def _page(self, url):
+        page = self.pages.get(url)
+        if page is None:
+            page = self.pages[url] = {
+                'url': url,
+                'status': None,
+                'bytes': 0,
+                'wire_bytes': 0,
+                'fetch_s': 0.0,
+                'retries': 0,
+                'parse_s': 0.0,
+                'ok': True,
+                'error': '',
+            }
+        return page
+
+    def start(self, total):
+        """设置待爬取的详情页数量"""
+        self.total = total
+        self._emit()
+
+    def record_fetch(self, url, nbytes, seconds, retries=0, status=None, wire_bytes=None):
+        """记录一次成功的请求；wire_bytes 为压缩后的传输字节数，未知时按 nbytes 计"""
+        page = self._page(url)
+        page['bytes'] += nbytes
+        page['wire_bytes'] += nbytes if wire_bytes is None else wire_bytes
+        page['fetch_s'] += seconds
+        page['retries'] += retries
+        page['status'] = status
+
+    def record_parse(self, url, seconds):
+        self._page(url)['parse_s'] += seconds
+
+    def record_failure(self, url, error, retries=0):
+        page = self._page(url)
+        page['ok'] = False
+        page['error'] = str(error)
+        page['retries'] += retries
+
+    def page_done(self, url):
+        """标记一个详情页处理完毕（无论成功与否）并汇报进度"""
+        self._page(url)
+        self.done += 1
+        self._emit()
+
+    def _emit(self):
+        if self.progress_callback:
+            try:
+                self.progress_callback(self.progress())
+            except Exception:
+                pass
+
+    def progress(self):
+        """返回当前进度
+
+        Returns:
+            dict: done/total/retries/failures/elapsed_s/eta_s
+        """
+        elapsed = time.perf_counter() - self._start
+        eta = None
+        if self.done and self.total:
+            eta = elapsed / self.done * max(0, self.total - self.done)
+        return {
+            'source': self.source,
+            'done': self.done,
+            'total': self.total,
+            'retries': sum(p['retries'] for p in self.pages.values()),
+            'failures': sum(1 for p in self.pages.values() if not p['ok']),
+            'bytes': sum(p['bytes'] for p in self.pages.values()),
+            'elapsed_s': round(elapsed, 1),
+            'eta_s': round(eta, 1) if eta is not None else None,
+        }
+
+    @staticmethod
+    def format_progress(p):
+        """将进度字典格式化为一行文本，例如 "37/112，重试 3 次，预计剩余 40s" """
+        text = f"{p['done']}/{p['total']}，重试 {p['retries']} 次"
+        if p.get('failures'):
+            text += f"，失败 {p['failures']} 个"
+        if p.get('eta_s') is not None:
+            text += f"，预计剩余 {p['eta_s']:.0f}s"
+        return text
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    def summary(self, slowest=10):
+        """生成汇总信息
+
+        Args:
+            slowest: 列出最慢页面的数量
+
+        Returns:
+            dict: 汇总数据（可直接写入JSON）
+        """
+        pages = list(self.pages.values())
+        fetch_times = sorted(p['fetch_s'] for p in pages if p['fetch_s'])
+
+        def _pct(q):
+            if not fetch_times:
+                return 0.0
+            return round(fetch_times[min(len(fetch_times) - 1, int(q * len(fetch_times)))], 3)
+
+        return {
+            'source': self.source,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'elapsed_s': round(time.perf_counter() - self._start, 2),
+            'pages': len(pages),
+            'detail_pages': self.total,
+            'failures': sum(1 for p in pages if not p['ok']),
+            'bytes': sum(p['bytes'] for p in pages),
+            'wire_bytes': sum(p['wire_bytes'] for p in pages),
+            'retries': sum(p['retries'] for p in pages),
+            'fetch_s_total': round(sum(fetch_times), 3),
+            'fetch_s_p50': _pct(0.5),
+            'fetch_s_p95': _pct(0.95),
+            'parse_s_total': round(sum(p['parse_s'] for p in pages), 3),
+            'slowest': sorted(pages, key=lambda p: p['fetch_s'] + p['parse_s'], reverse=True)[:slowest],
+            'failed': [{'url': p['url'], 'error': p['error']} for p in pages if not p['ok']],
+            'page_details': pages,
+        }
+
+    def save(self, path):
+        """将汇总写入JSON文件
+
+        Args:
+            path: 输出文件路径
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+
+def print_progress(progress):
+    """命令行/子进程模式下的进度输出：以 PROGRESS 前缀写到标准输出，供调用方解析"""
+    print('PROGRESS ' + json.dumps(progress, ensure_ascii=False), flush=True)
@@ -0,0 +1,196 @@
+"""爬虫与分析器共用的数据集格式：怪物部位数据的 schema 与数据源目录的清单（两侧都导入本模块，不各自维护副本）
+
+hitzone_data 的每一行：
+- 部位：部位名（mhwi 的 "头 (基本)" 拆为 部位 与 列1）
+- 列1：状态（mhws 常态为空字符串）
+- 斩 打 弹 火 水 雷 冰 龙 晕、HP：int / float，缺失或无法解析为 None
+- 其它列：能解析为数字的转为 int / float，否则保留原文本（空值为 None）
+
+清单 manifest.json 列出数据源目录中每个文件的 sha256 与大小，写成即表示数据集完整。
+爬取时新文件先写入数据源目录下的暂存目录 .staging/，清单写入暂存目录即为提交，随后才把文件与清单移入
+数据源目录；移入中途崩溃时，下次爬取或分析器加载先完成移入（commit_staging），未提交的暂存文件不影响现有数据。
+"""
+import hashlib
+import json
+import os
+
+# 格式版本：怪物 JSON 中没有 schema_version 的为爬虫的原始格式（版本 0）
+SCHEMA_VERSION = 1
+SCHEMA_KEY = 'schema_version'
+
+# mhwi 原始列名 -> 通用列名
+MHWI_COLUMNS = {
+    '切断': '斩',
+    '打击': '打',
+    '遥远': '弹',
+    'col4': '火',
+    'col5': '水',
+    'col6': '雷',
+    'col7': '冰',
+    'col8': '龙',
+    'col9': '晕',
+}
+TEXT_KEYS = ('部位', '列1')
+NUMERIC_KEYS = ('斩', '打', '弹', '火', '水', '雷', '冰', '龙', '晕', 'HP')
+
+# 清单文件名与格式版本
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+# 数据源目录中不是怪物数据的 JSON 文件
+NON_MONSTER_FILES = ('monster_list.json', MANIFEST_NAME)
+# 爬取中的暂存目录（以 . 开头，不会被当作数据加载或计入数据指纹）
+STAGING_DIR = '.staging'
+
+
+def to_number(value):
+    """把肉质文本转为 int（整数）或 float，空值或无法解析时返回 None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    s = str(value).strip()
+    try:
+        return int(s)
+    except ValueError:
+        pass
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _convert(key, value):
+    """数值列转为数字；其它列无法解析为数字时保留原文本"""
+    number = to_number(value)
+    if number is not None or key in NUMERIC_KEYS or value is None:
+        return number
+    text = str(value).strip()
+    return text or None
+
+
+def _split_part(part):
+    """"头 (基本)" -> ("头", "基本")；没有括号时状态为空"""
+    part = str(part or '')
+    if '(' in part and ')' in part:
+        return part[:part.rfind('(')].strip(), part[part.rfind('(') + 1:part.rfind(')')].strip()
+    return part.strip(), ''
+
+
+def normalize_row(row, source):
+    """把一行原始部位数据转为通用格式"""
+    if source == 'mhwi' and 'Part' in row:
+        name, state = _split_part(row.get('Part'))
+        out = {'部位': name, '列1': state}
+        for key, value in row.items():
+            if key != 'Part':
+                key = MHWI_COLUMNS.get(key, key)
+                out[key] = _convert(key, value)
+        return out
+    out = {'部位': str(row.get('部位', '')), '列1': str(row.get('列1', '') or '')}
+    for key, value in row.items():
+        if key not in TEXT_KEYS:
+            out[key] = _convert(key, value)
+    return out
+
+
+def normalize_monster(monster, source):
+    """返回带 schema_version 的怪物数据（hitzone_data 已归一化）；已是当前版本的原样返回"""
+    if monster.get(SCHEMA_KEY) == SCHEMA_VERSION:
+        return monster
+    out = dict(monster)
+    out['hitzone_data'] = hitzone_rows(monster, source)
+    out[SCHEMA_KEY] = SCHEMA_VERSION
+    return out
+
+
+def hitzone_rows(monster, source):
+    """取怪物 JSON 中的部位数据；schema_version 过旧时先迁移为通用格式"""
+    rows = monster.get('hitzone_data') or []
+    if monster.get(SCHEMA_KEY) == SCHEMA_VERSION:
+        return rows
+    return [normalize_row(r, source) for r in rows if isinstance(r, dict)]
+
+
+def file_entry(data):
+    """清单中一个文件的条目：sha256 与大小"""
+    return {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+
+
+def entry_matches(data, entry):
+    """文件内容与清单条目一致时返回 True"""
+    return (isinstance(entry, dict) and len(data) == entry.get('size', len(data))
+            and hashlib.sha256(data).hexdigest() == entry.get('sha256'))
+
+
+def read_manifest(src_dir):
+    """读取数据源目录的清单；没有清单时返回 None，清单损坏或不完整时返回空清单（不加载任何数据）"""
+    try:
+        with open(os.path.join(src_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        return {'files': {}}
+    if (not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION
+            or not manifest.get('complete') or not isinstance(manifest.get('files'), dict)):
+        return {'files': {}}
+    return manifest
+
+
+def read_committed_manifest(src_dir):
+    """读取当前已提交的清单及其文件所在目录，只读不移动文件。
+
+    暂存目录中已有提交但尚未移入完（写入方中途退出或正在移入）时返回暂存清单，
+    文件依次在暂存目录与数据源目录中查找；移入由 DatasetWriter 完成（见 commit_staging）。
+
+    Returns:
+        (manifest, dirs): manifest 同 read_manifest；dirs 为按顺序查找文件的目录
+    """
+    staging = os.path.join(src_dir, STAGING_DIR)
+    manifest = read_manifest(staging)
+    if manifest and manifest.get('files'):
+        return manifest, (staging, src_dir)
+    return read_manifest(src_dir), (src_dir,)
+
+
+def fsync_dir(path):
+    """把目录项（rename 的结果）落盘；不支持打开目录的平台（Windows）直接跳过"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def commit_staging(src_dir):
+    """暂存目录中已有完整清单（已提交）时，把其中的文件移入数据源目录，最后移入清单；返回是否有提交被完成。
+
+    可重复执行：已移走的文件直接跳过，因此中途崩溃后再次调用（或与写入方同时调用）结果相同。
+    """
+    staging = os.path.join(src_dir, STAGING_DIR)
+    manifest = read_manifest(staging)
+    if not manifest or not manifest.get('files'):
+        return False
+    for name in manifest['files']:
+        try:
+            os.replace(os.path.join(staging, name), os.path.join(src_dir, name))
+        except FileNotFoundError:
+            pass
+    fsync_dir(src_dir)
+    try:
+        os.replace(os.path.join(staging, MANIFEST_NAME), os.path.join(src_dir, MANIFEST_NAME))
+    except FileNotFoundError:
+        pass
+    fsync_dir(src_dir)
+    try:
+        for name in os.listdir(staging):
+            os.remove(os.path.join(staging, name))
+        os.rmdir(staging)
+    except OSError:
+        pass
+    return True
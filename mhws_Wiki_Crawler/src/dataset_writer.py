@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import time
+
+# 清单格式、暂存目录约定与分析器共用
+from dataset_schema import (
+    MANIFEST_NAME, MANIFEST_VERSION, STAGING_DIR, commit_staging, entry_matches, file_entry, fsync_dir, read_manifest,
+)
+
+
+def atomic_write_bytes(path, data):
+    """先写同目录下的临时文件并 fsync，再原子地重命名为目标文件
+
+    Args:
+        path: 目标文件路径
+        data: 文件内容（bytes）
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    # 临时文件不以 .json 结尾，避免被分析器当作数据加载
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    fsync_dir(directory)
+
+
+def dump_compact(obj):
+    """紧凑格式的 UTF-8 JSON"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class DatasetWriter:
+    """数据源目录的写入器：爬取中的文件原子写入暂存目录并记录校验和，写出清单时才整体移入数据源目录
+
+    爬取中途崩溃时数据源目录仍是上一份完整的数据与清单，暂存目录在下次爬取开始时丢弃。
+    """
+
+    def __init__(self, data_dir, source):
+        """初始化写入器
+
+        Args:
+            data_dir: 数据源目录（如 data/mhws）
+            source: 数据源名称
+        """
+        self.data_dir = data_dir
+        self.source = source
+        self.staging_dir = os.path.join(data_dir, STAGING_DIR)
+        self.files = {}
+        # 上次提交后未移入完的文件先移入；未提交的暂存文件（上次爬取中途退出）丢弃
+        if not commit_staging(data_dir):
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+        # 上一份清单中的条目：本次未重写（如页面抓取失败）的文件在写出清单前重新核对后沿用
+        manifest = read_manifest(data_dir)
+        self.previous = manifest['files'] if manifest else {}
+
+    def write_json(self, filename, obj):
+        """以紧凑 JSON 原子写入暂存目录中的 filename，并记录其 sha256 与大小
+
+        Returns:
+            path: 写入的文件路径（写出清单后移入 data_dir）
+        """
+        data = dump_compact(obj)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        path = os.path.join(self.staging_dir, filename)
+        atomic_write_bytes(path, data)
+        self.files[filename] = file_entry(data)
+        return path
+
+    def record_file(self, filename):
+        """把 data_dir 中已存在的文件加入清单（用于离线生成的数据集）"""
+        with open(os.path.join(self.data_dir, filename), 'rb') as f:
+            data = f.read()
+        self.files[filename] = file_entry(data)
+
+    def _carried_entries(self):
+        """上一份清单中本次未重写、且文件内容仍与条目一致的条目"""
+        carried = {}
+        for name, entry in self.previous.items():
+            if name in self.files:
+                continue
+            try:
+                with open(os.path.join(self.data_dir, name), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            if entry_matches(data, entry):
+                carried[name] = entry
+        return carried
+
+    def write_manifest(self, **extra):
+        """提交本次爬取：清单先写入暂存目录（提交点），再把暂存文件与清单移入数据源目录
+
+        Args:
+            extra: 额外记录到清单中的字段（如失败页面数）
+
+        Returns:
+            path: 清单路径
+        """
+        files = self._carried_entries()
+        files.update(self.files)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'source': self.source,
+            'complete': True,
+            'created_at': time.time(),
+            'files': dict(sorted(files.items())),
+        }
+        manifest.update(extra)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        atomic_write_bytes(os.path.join(self.staging_dir, MANIFEST_NAME),
+                           json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+        commit_staging(self.data_dir)
+        self.previous, self.files = manifest['files'], {}
+        return os.path.join(self.data_dir, MANIFEST_NAME)
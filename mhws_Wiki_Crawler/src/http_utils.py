@@ -1,75 +1,144 @@
 import requests
 import logging
+import random
 import time
-from requests.exceptions import RequestException, SSLError, Timeout
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from requests.exceptions import HTTPError, RequestException, SSLError, Timeout
 
-class HttpUtils:
+# 可重试的状态码（429 与 5xx 网关类错误）
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class RetryBudgetExhausted(Exception):
+    """本次爬取的全局重试预算已用完"""
+
+
+class RetryPolicy:
+    """HttpUtils 与 AsyncHttpUtils 共用的重试策略：带抖动的指数退避、Retry-After 与全局重试预算
+
+    使用方需设置 retry_interval、max_backoff、retry_budget 与 total_retries。
+    """
+
+    def _backoff(self, attempt, retry_after=None):
+        """计算第 attempt 次重试前的等待时间：优先使用 Retry-After，否则为带抖动的指数退避"""
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        ceiling = min(self.max_backoff, self.retry_interval * (2 ** (attempt - 1)))
+        # 一半固定、一半随机，避免并发请求同时重试
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    @staticmethod
+    def _parse_retry_after(value):
+        """解析 Retry-After（秒数或 HTTP 日期），无法解析时返回 None"""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _take_retry(self, url):
+        if self.retry_budget is not None and self.total_retries >= self.retry_budget:
+            raise RetryBudgetExhausted(f"重试预算已用完（{self.retry_budget} 次），放弃请求: {url}")
+        self.total_retries += 1
+
+
+class HttpUtils(RetryPolicy):
     """HTTP请求工具类，处理请求异常和重试"""
-    
-    def __init__(self, retry_times=3, retry_interval=2, timeout=10):
+
+    def __init__(self, retry_times=3, retry_interval=2, timeout=10, max_backoff=30,
+                 retry_budget=100, insecure_fallback=True):
         """初始化HTTP工具类
-        
+
         Args:
-            retry_times: 重试次数
-            retry_interval: 重试间隔（秒）
+            retry_times: 单个请求的最大尝试次数
+            retry_interval: 退避基数（秒），第 n 次重试的等待上限为 retry_interval * 2^(n-1)
             timeout: 请求超时时间（秒）
+            max_backoff: 单次等待的上限（秒），同样约束 Retry-After
+            retry_budget: 整个实例（一次爬取）允许的重试总数，用完后失败的请求不再重试
+            insecure_fallback: 证书校验失败时，是否对该主机改为不校验证书
         """
         self.retry_times = retry_times
         self.retry_interval = retry_interval
         self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.retry_budget = retry_budget
+        self.insecure_fallback = insecure_fallback
+        # 累计重试次数（含SSL降级重试），调用方可比较请求前后的差值得到单次请求的重试数
+        self.total_retries = 0
         self.logger = logging.getLogger(__name__)
-        
+        # 证书校验失败后改为不校验的主机
+        self._insecure_hosts = set()
+
         # 创建会话对象，用于保持连接
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
-    
+
     def get(self, url, params=None, verify_ssl=True):
         """发送GET请求并处理可能的异常
-        
+
         Args:
             url: 请求的URL
             params: URL参数
             verify_ssl: 是否验证SSL证书
-            
+
         Returns:
             response: 请求响应
-            
+
         Raises:
             RequestException: 请求失败且重试次数用尽时抛出
+            RetryBudgetExhausted: 全局重试预算用完时抛出
         """
-        for i in range(self.retry_times):
+        host = urlsplit(url).hostname
+        for attempt in range(1, self.retry_times + 1):
+            insecure = not verify_ssl or host in self._insecure_hosts
+            retry_after = None
             try:
                 self.logger.debug(f"正在请求: {url}")
                 response = self.session.get(
-                    url, 
-                    params=params, 
+                    url,
+                    params=params,
                     timeout=self.timeout,
-                    verify=verify_ssl
+                    verify=not insecure
                 )
-                response.raise_for_status()  # 检查HTTP错误
-                return response
-            except SSLError as e:
-                self.logger.warning(f"SSL证书验证失败: {e}，尝试关闭SSL验证")
-                if verify_ssl and i < self.retry_times - 1:
-                    # 如果SSL验证失败，尝试关闭验证再次请求
-                    return self.get(url, params, verify_ssl=False)
+                if response.status_code in RETRY_STATUS and attempt < self.retry_times:
+                    retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                    self.logger.warning(f"服务器返回 {response.status_code} ({attempt}/{self.retry_times}): {url}")
                 else:
-                    self.logger.error(f"SSL错误 ({i+1}/{self.retry_times}): {e}")
+                    response.raise_for_status()  # 检查HTTP错误
+                    return response
+            except SSLError as e:
+                if not self.insecure_fallback or insecure or attempt >= self.retry_times:
+                    self.logger.error(f"SSL错误 ({attempt}/{self.retry_times}): {e}")
+                    raise
+                # 记录该主机改为不校验证书，计作一次重试后继续循环（与 AsyncHttpUtils 一致）
+                self.logger.warning(f"SSL证书验证失败: {e}，之后对 {host} 关闭SSL验证")
+                self._insecure_hosts.add(host)
+                self._take_retry(url)
+                continue
+            except HTTPError as e:
+                self.logger.error(f"请求失败 ({attempt}/{self.retry_times}): {e}")
+                raise
             except Timeout as e:
-                self.logger.warning(f"请求超时 ({i+1}/{self.retry_times}): {e}")
+                self.logger.warning(f"请求超时 ({attempt}/{self.retry_times}): {e}")
+                if attempt >= self.retry_times:
+                    raise
             except RequestException as e:
-                self.logger.error(f"请求失败 ({i+1}/{self.retry_times}): {e}")
-            
-            if i < self.retry_times - 1:
-                sleep_time = self.retry_interval * (i + 1)  # 指数退避策略
-                self.logger.info(f"等待 {sleep_time} 秒后重试...")
-                time.sleep(sleep_time)
-            else:
-                self.logger.error(f"达到最大重试次数，放弃请求: {url}")
-                raise
-    
+                self.logger.error(f"请求失败 ({attempt}/{self.retry_times}): {e}")
+                if attempt >= self.retry_times:
+                    raise
+
+            self._take_retry(url)
+            sleep_time = self._backoff(attempt, retry_after)
+            self.logger.info(f"等待 {sleep_time:.2f} 秒后重试...")
+            time.sleep(sleep_time)
+
     def close(self):
         """关闭会话"""
-        self.session.close()
\ No newline at end of file
+        self.session.close()
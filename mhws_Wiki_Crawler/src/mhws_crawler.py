@@ -1,8 +1,15 @@
-import json
 import os
 import logging
+import time
+import asyncio
+import argparse
+from urllib.parse import urljoin
 from monster_parser import MonsterParser
 from http_utils import HttpUtils
+from async_http_utils import AsyncHttpUtils
+from crawl_report import CrawlReport, print_progress
+from dataset_writer import DatasetWriter
+from dataset_schema import normalize_monster
 
 # 配置日志
 logging.basicConfig(
@@ -13,20 +20,30 @@ logging.basicConfig(
 class MHWSCrawler:
     """魔物猎人Wilds数据爬虫"""
     
-    def __init__(self, base_url="https://mhwilds.kiranico.com/zh/data/monsters"):
+    DEFAULT_BASE_URL = "https://mhwilds.kiranico.com/zh/data/monsters"
+
+    def __init__(self, base_url=None, report=None, data_dir=None, http_utils=None, async_http_utils=None):
         """初始化爬虫
         
         Args:
-            base_url: 基础URL
+            base_url: 怪物列表页URL，怪物详情页的相对链接也以它为基准拼接（可指向本地 fixture 服务器）
+            report: 爬取报告（CrawlReport），为空时自动创建
+            data_dir: 数据保存目录，默认为 plugins/mh/data/mhws
+            http_utils: 同步HTTP工具类实例，为空时使用默认的重试/超时配置
+            async_http_utils: 异步HTTP工具类实例（crawl_async 使用），为空时使用默认配置
         """
-        self.base_url = base_url
+        self.base_url = base_url or self.DEFAULT_BASE_URL
+        self.report = report or CrawlReport('mhws')
         
         # 创建HTTP工具类实例
-        self.http_utils = HttpUtils(retry_times=3, retry_interval=2, timeout=10)
+        self.http_utils = http_utils or HttpUtils(retry_times=3, retry_interval=2, timeout=10)
+        self.async_http_utils = async_http_utils or AsyncHttpUtils(retry_times=3, retry_interval=2, timeout=10)
         
-        # 创建数据目录（保存到 plugins/mh/data/mhws）
-        self.data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'mhws')
+        # 创建数据目录（默认保存到 plugins/mh/data/mhws）
+        self.data_dir = data_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'mhws')
         os.makedirs(self.data_dir, exist_ok=True)
+        # 原子写入每个文件并在爬取结束时生成清单
+        self.writer = DatasetWriter(self.data_dir, 'mhws')
     
     def _request(self, url):
         """发送HTTP请求并处理可能的异常
@@ -37,12 +54,23 @@ class MHWSCrawler:
         Returns:
             response: 请求响应
         """
+        retries_before = self.http_utils.total_retries
+        start = time.perf_counter()
         try:
             # 使用HTTP工具类发送请求
-            return self.http_utils.get(url)
+            response = self.http_utils.get(url)
         except Exception as e:
             logging.error(f"请求失败: {e}")
+            self.report.record_failure(url, e, self.http_utils.total_retries - retries_before)
             raise
+        self.report.record_fetch(
+            url,
+            len(response.content),
+            time.perf_counter() - start,
+            self.http_utils.total_retries - retries_before,
+            response.status_code,
+        )
+        return response
     
     def get_monster_list(self):
         """获取怪物列表
@@ -57,7 +85,9 @@ class MHWSCrawler:
             response = self._request(self.base_url)
             # 使用解析器解析页面内容
             parser = MonsterParser()
+            start = time.perf_counter()
             monster_list = parser.parse_monster_list(response.text)
+            self.report.record_parse(self.base_url, time.perf_counter() - start)
 
             return monster_list
 
@@ -77,18 +107,26 @@ class MHWSCrawler:
         logging.info(f"正在获取怪物数据: {monster_url}")
         
         try:
-            # 发送请求获取页面内容
+            # 发送请求获取页面内容（失败已由 _request 记录）
             response = self._request(monster_url)
-            
-            # 使用解析器解析页面内容
-            parser = MonsterParser()
-            monster_data = parser.parse_monster_page(response.text)
-            
-            return monster_data
-            
         except Exception as e:
             logging.error(f"获取怪物数据失败: {e}")
             return None
+        return self._parse_monster_page(monster_url, response.text)
+
+    def _parse_monster_page(self, monster_url, html):
+        """解析怪物页面；解析出错或结果为空时记为解析失败"""
+        start = time.perf_counter()
+        try:
+            monster_data = MonsterParser().parse_monster_page(html)
+        except Exception as e:
+            logging.error(f"解析怪物数据失败: {e}")
+            self.report.record_failure(monster_url, f"解析失败: {e}")
+            return None
+        self.report.record_parse(monster_url, time.perf_counter() - start)
+        if not monster_data:
+            self.report.record_failure(monster_url, "解析失败")
+        return monster_data
     
     def save_monster_data(self, monster_data, filename=None):
         """保存怪物数据到JSON文件
@@ -104,11 +142,9 @@ class MHWSCrawler:
         if not filename:
             filename = f"{monster_data['name']}.json" if monster_data.get('name') else "unknown_monster.json"
         
-        file_path = os.path.join(self.data_dir, filename)
-        
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(monster_data, f, ensure_ascii=False, indent=2)
+            # 写出通用格式（数值已转换），紧凑 JSON，先写临时文件再原子重命名
+            file_path = self.writer.write_json(filename, normalize_monster(monster_data, 'mhws'))
             logging.info(f"数据已保存到: {file_path}")
         except Exception as e:
             logging.error(f"保存数据失败: {e}")
@@ -122,28 +158,137 @@ class MHWSCrawler:
         monster_data = self.get_monster_data(monster_url)
         if monster_data:
             self.save_monster_data(monster_data)
+        self.report.page_done(monster_url)
+
+    def crawl(self):
+        """crawl_async 的顺序版本：使用同步的 HttpUtils 逐个爬取
+
+        Returns:
+            monster_list: 怪物列表
+        """
+        monster_list = self.get_monster_list()
+        logging.info(f"获取到 {len(monster_list)} 个怪物信息")
+        if not monster_list:
+            # 列表获取失败时保留现有数据与清单
+            return monster_list
+
+        self.report.start(len(monster_list))
+        for monster in monster_list:
+            logging.info(f"正在爬取 {monster['name']} 的数据")
+            self.crawl_monster(urljoin(self.base_url, monster['url']))
+
+        self.writer.write_json('monster_list.json', monster_list)
+        logging.info("怪物列表数据已保存")
+        self.writer.write_manifest(failures=self.report.progress()['failures'])
+        return monster_list
+
+    async def _request_async(self, url):
+        """_request 的异步版本，重试次数取自响应/异常上的 retries"""
+        start = time.perf_counter()
+        try:
+            response = await self.async_http_utils.get(url)
+        except Exception as e:
+            logging.error(f"请求失败: {e}")
+            self.report.record_failure(url, e, getattr(e, 'retries', 0))
+            raise
+        self.report.record_fetch(url, len(response.content), time.perf_counter() - start, response.retries, response.status_code, response.wire_bytes)
+        return response
+
+    async def get_monster_list_async(self):
+        """get_monster_list 的异步版本"""
+        logging.info("正在获取怪物列表")
+        try:
+            response = await self._request_async(self.base_url)
+            start = time.perf_counter()
+            monster_list = MonsterParser().parse_monster_list(response.text)
+            self.report.record_parse(self.base_url, time.perf_counter() - start)
+            return monster_list
+        except Exception as e:
+            logging.error(f"获取怪物列表失败: {e}")
+            return []
+
+    async def crawl_monster_async(self, monster_url):
+        """crawl_monster 的异步版本：请求并发进行，解析与保存在事件循环中顺序执行"""
+        logging.info(f"正在获取怪物数据: {monster_url}")
+        try:
+            # 请求失败已由 _request_async 记录
+            response = await self._request_async(monster_url)
+        except Exception as e:
+            logging.error(f"获取怪物数据失败: {e}")
+        else:
+            monster_data = self._parse_monster_page(monster_url, response.text)
+            if monster_data:
+                self.save_monster_data(monster_data)
+        self.report.page_done(monster_url)
+
+    async def crawl_async(self, concurrency=4):
+        """并发爬取列表页中的全部怪物
+
+        Args:
+            concurrency: 同时进行的怪物页面请求数（连接池还会按主机限流）
+
+        Returns:
+            monster_list: 怪物列表
+        """
+        try:
+            monster_list = await self.get_monster_list_async()
+            logging.info(f"获取到 {len(monster_list)} 个怪物信息")
+            if not monster_list:
+                # 列表获取失败时保留现有数据与清单
+                return monster_list
+
+            self.report.start(len(monster_list))
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def _one(monster):
+                async with semaphore:
+                    await self.crawl_monster_async(urljoin(self.base_url, monster['url']))
+
+            await asyncio.gather(*(_one(m) for m in monster_list))
+
+            # 详情页全部处理完后再写列表与清单，中途崩溃时旧清单仍描述上一份完整数据
+            self.writer.write_json('monster_list.json', monster_list)
+            logging.info("怪物列表数据已保存")
+            self.writer.write_manifest(failures=self.report.progress()['failures'])
+            return monster_list
+        finally:
+            await self.async_http_utils.close()
 
 # 主函数
-def main():
+def main(progress_callback=None, base_url=None, data_dir=None, async_http_utils=None, concurrency=4):
+    """爬取全部怪物数据
+
+    Args:
+        progress_callback: 进度回调，每完成一个怪物页面调用一次
+        base_url: 怪物列表页URL，默认为官方站点
+        data_dir: 数据保存目录，默认为 plugins/mh/data/mhws
+        async_http_utils: 异步HTTP工具类实例，默认使用 MHWSCrawler 的配置
+        concurrency: 同时进行的怪物页面请求数
+
+    Returns:
+        report: 本次爬取的 CrawlReport
+    """
     # 创建爬虫实例
-    crawler = MHWSCrawler()
+    crawler = MHWSCrawler(base_url, CrawlReport('mhws', progress_callback), data_dir, async_http_utils=async_http_utils)
     
-    # 获取怪物列表
-    monster_list = crawler.get_monster_list()
-    logging.info(f"获取到 {len(monster_list)} 个怪物信息")
-    
-    # 保存怪物列表数据
-    with open(os.path.join(crawler.data_dir, 'monster_list.json'), 'w', encoding='utf-8') as f:
-        json.dump(monster_list, f, ensure_ascii=False, indent=2)
-    logging.info("怪物列表数据已保存")
-    
-    # 爬取每个怪物的详细数据
-    for monster in monster_list:
-        logging.info(f"正在爬取 {monster['name']} 的数据")
-        crawler.crawl_monster(f"https://mhwilds.kiranico.com{monster['url']}")
+    # 获取怪物列表并并发爬取每个怪物的详细数据
+    asyncio.run(crawler.crawl_async(concurrency))
     
     logging.info("所有怪物数据爬取完成")
     logging.info("数据已保存到 data 目录")
 
+    # 保存爬取报告（放在数据源目录之外，避免被当作怪物数据加载）
+    crawler.report.finish()
+    report_path = os.path.join(os.path.dirname(crawler.data_dir), 'crawl_report_mhws.json')
+    crawler.report.save(report_path)
+    summary = crawler.report.summary()
+    logging.info(f"爬取报告已保存到: {report_path}（{summary['bytes']} 字节，传输 {summary['wire_bytes']} 字节，解析 {summary['parse_s_total']}s，重试 {summary['retries']} 次，失败 {summary['failures']} 个）")
+    return crawler.report
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="爬取 MH Wilds 怪物数据")
+    parser.add_argument("--base-url", default=None, help="怪物列表页URL（如本地 fixture 服务器）")
+    parser.add_argument("--data-dir", default=None, help="数据保存目录")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时进行的怪物页面请求数")
+    args = parser.parse_args()
+    main(progress_callback=print_progress, base_url=args.base_url, data_dir=args.data_dir, concurrency=args.concurrency)
\ No newline at end of file
@@ -26,7 +26,9 @@ class MonsterParser:
                 self.logger.warning("未找到表格数据")
                 return []
             table=tables[0]
-            self.logger.info(f"Tables: {table}")
+            # 整张表格的字符串化代价较高，只在开启 DEBUG 时输出
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Tables: {table}")
             rows = table.select('tr')
             if not rows:
                 self.logger.warning("未找到表格行数据")
@@ -0,0 +1,155 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+from ncatbot.utils import get_log
+
+from .metrics import current_command
+
+LOG = get_log("mh")
+
+
+class _Outgoing:
+    __slots__ = ("text", "rtf", "fallback_text", "on_fail", "command")
+
+    def __init__(self, text=None, rtf=None, fallback_text=None, on_fail=None, command=None):
+        self.text = text
+        self.rtf = rtf
+        self.fallback_text = fallback_text
+        self.on_fail = on_fail
+        # 入队时所属命令，用于发送耗时统计
+        self.command = command or current_command.get()
+
+
+class OutboundQueue:
+    """按群排队的发送队列。
+
+    - 每个群一个串行 worker，保证同群消息顺序，群内无消息时 worker 自动退出；
+    - 全局信号量限制同时进行中的发送数；
+    - 发送失败按指数退避（带抖动）重试，图文消息重试用尽后自动改发 fallback_text；
+    - 队列中相邻的短文本会合并为一条发送。
+    """
+
+    def __init__(self, send, max_concurrency: int = 4, max_retries: int = 3,
+                 base_delay: float = 0.5, max_delay: float = 8.0,
+                 merge_max_chars: int = 300, max_pending: int = 50, metrics=None):
+        self._send = send  # async send(group_id, text=None, rtf=None)
+        self.metrics = metrics
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.merge_max_chars = merge_max_chars
+        self.max_pending = max_pending
+        self._queues = {}   # { group_id: deque[_Outgoing] }
+        self._workers = {}  # { group_id: Task }
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.merged = 0
+        self.dropped = 0
+        self.fallbacks = 0
+
+    # ---------- 入队 ----------
+    def send_text(self, group_id, text: str):
+        self._enqueue(group_id, _Outgoing(text=text))
+
+    def send_rich(self, group_id, rtf, fallback_text: str = None, on_fail=None):
+        """发送图文消息；重试用尽后调用 on_fail() 并改发 fallback_text。"""
+        self._enqueue(group_id, _Outgoing(rtf=rtf, fallback_text=fallback_text, on_fail=on_fail))
+
+    def _enqueue(self, group_id, item: _Outgoing):
+        queue = self._queues.setdefault(group_id, deque())
+        if len(queue) >= self.max_pending:
+            self.dropped += 1
+            LOG.warning(f"群 {group_id} 发送队列已满，丢弃一条消息")
+            return
+        queue.append(item)
+        worker = self._workers.get(group_id)
+        if worker is None or worker.done():
+            self._workers[group_id] = asyncio.get_running_loop().create_task(self._drain(group_id))
+
+    def close(self):
+        """取消全部群的发送 worker 并丢弃未发送的消息（插件卸载时调用）。"""
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+        self._queues.clear()
+
+    def pending(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    # ---------- 发送 ----------
+    def _next_batch(self, queue: deque) -> _Outgoing:
+        item = queue.popleft()
+        if item.text is None:
+            return item
+        # 合并紧随其后的短文本
+        parts = [item.text]
+        total = len(item.text)
+        while queue and queue[0].text is not None and total + len(queue[0].text) + 1 <= self.merge_max_chars:
+            nxt = queue.popleft()
+            parts.append(nxt.text)
+            total += len(nxt.text) + 1
+            self.merged += 1
+        if len(parts) > 1:
+            item = _Outgoing(text="\n".join(parts), command=item.command)
+        return item
+
+    async def _drain(self, group_id):
+        queue = self._queues[group_id]
+        try:
+            while queue:
+                item = self._next_batch(queue)
+                if await self._deliver(group_id, item):
+                    continue
+                if item.on_fail:
+                    try:
+                        item.on_fail()
+                    except Exception as e:
+                        LOG.error(f"发送失败回调出错: {e}")
+                if item.fallback_text:
+                    self.fallbacks += 1
+                    await self._deliver(group_id, _Outgoing(text=item.fallback_text, command=item.command))
+        finally:
+            if not queue:
+                self._queues.pop(group_id, None)
+                self._workers.pop(group_id, None)
+
+    async def _deliver(self, group_id, item: _Outgoing) -> bool:
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    if item.rtf is not None:
+                        await self._send(group_id, rtf=item.rtf)
+                    else:
+                        await self._send(group_id, text=item.text)
+                self.sent += 1
+                if self.metrics:
+                    self.metrics.observe("send", time.perf_counter() - start, item.command)
+                return True
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self.failed += 1
+                    LOG.error(f"发送消息失败（已重试 {attempt} 次）: {e}")
+                    return False
+                self.retried += 1
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.0)
+                LOG.warning(f"发送消息失败: {e}，{delay:.1f}s 后重试")
+                await asyncio.sleep(delay)
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "active_groups": len(self._workers),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "fallbacks": self.fallbacks,
+        }
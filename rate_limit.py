@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多存 capacity 个。"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1.0) -> bool:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class RateLimiter:
+    """按命令类别分别对用户与群限流。
+
+    limits 形如 {"render": {"user": (每秒补充, 容量), "group": (每秒补充, 容量)}}；
+    未配置的类别不限流。桶数量超过 max_buckets 时清理已回满（长时间空闲）的桶。
+    """
+
+    def __init__(self, limits: dict, max_buckets: int = 10000):
+        self.limits = limits
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self.rejected = {}
+
+    def _bucket(self, key, rate, capacity, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._prune(now)
+            bucket = self._buckets[key] = TokenBucket(rate, capacity, now)
+        return bucket
+
+    def _prune(self, now: float):
+        for key in [k for k, b in self._buckets.items() if b.is_full(now)]:
+            del self._buckets[key]
+
+    def allow(self, kind: str, group_id, user_id) -> bool:
+        conf = self.limits.get(kind)
+        if not conf:
+            return True
+        now = time.monotonic()
+        checks = []
+        if "user" in conf and user_id is not None:
+            checks.append(self._bucket((kind, "user", user_id), *conf["user"], now))
+        if "group" in conf and group_id is not None:
+            checks.append(self._bucket((kind, "group", group_id), *conf["group"], now))
+        # 先确认全部桶都有令牌再扣除，避免用户桶被群桶拒绝时白白消耗
+        for bucket in checks:
+            bucket.take(now, 0)
+            if bucket.tokens < 1:
+                self.rejected[kind] = self.rejected.get(kind, 0) + 1
+                return False
+        for bucket in checks:
+            bucket.take(now)
+        return True
+
+
+class RequestCoalescer:
+    """合并同一群内的相同请求。
+
+    处理中的请求由随后到达的相同请求共享结果（不重复执行）；完成后 window 秒内的相同请求
+    视为已回复，直接忽略。window <= 0 时不合并。处理失败的请求不计入窗口，可立即重试。
+    """
+
+    def __init__(self, window: float = 5.0):
+        self.window = window
+        self._inflight = {}         # { key: 处理中的 Task }
+        self._done = OrderedDict()  # { key: 完成时间 }，按时间先后排列
+        self.coalesced = 0
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        while self._done:
+            oldest_key, ts = next(iter(self._done.items()))
+            if ts >= cutoff:
+                break
+            self._done.popitem(last=False)
+
+    def _finish(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is None:
+            self._done[key] = time.monotonic()
+            self._done.move_to_end(key)
+
+    async def run(self, key, factory):
+        """执行 factory() 并返回其结果；与处理中的相同请求合并，窗口内已完成的重复请求返回 None。"""
+        if self.window <= 0:
+            return await factory()
+        self._expire(time.monotonic())
+        task = self._inflight.get(key)
+        if task is None:
+            if key in self._done:
+                self.coalesced += 1
+                return None
+            task = self._inflight[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.coalesced += 1
+        # 某个等待方被取消时不影响共享同一结果的其它请求
+        return await asyncio.shield(task)
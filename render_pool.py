@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RenderQueueFull(Exception):
+    """渲染队列已满，调用方应直接回退到文本输出。"""
+
+
+class RenderPool:
+    """专用的有界渲染线程池。
+
+    与 asyncio 默认执行器隔离，避免大量 /肉质 请求占满默认线程池；
+    排队 + 执行中的任务数超过 max_workers + max_queue 时立即拒绝。
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 8):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="mh-render")
+        self._lock = threading.Lock()
+        self._pending = 0   # 已提交但尚未开始执行
+        self._running = 0   # 正在执行
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+        self.completed = 0
+        self.total_render_time = 0.0
+        self.max_render_time = 0.0
+        self.last_render_time = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def is_full(self) -> bool:
+        return self._pending + self._running >= self.max_workers + self.max_queue
+
+    def is_idle(self) -> bool:
+        return self._pending == 0 and self._running == 0
+
+    def _run(self, func, args, kwargs):
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = func(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            cost = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                # 抛出异常的渲染只计入 failed
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self.total_render_time += cost
+                self.last_render_time = cost
+                self.max_render_time = max(self.max_render_time, cost)
+
+    async def submit(self, func, *args, **kwargs):
+        """提交渲染任务并等待结果；队列已满时抛出 RenderQueueFull。"""
+        with self._lock:
+            if self.is_full():
+                self.rejected += 1
+                raise RenderQueueFull(f"渲染队列已满 ({self._pending} 排队中)")
+            self._pending += 1
+            self.submitted += 1
+        try:
+            future = self._executor.submit(self._run, func, args, kwargs)
+        except BaseException:
+            self._release_pending()
+            raise
+        # 等待方被取消时，尚未开始执行的任务会随之取消，_run 不再执行，需在此归还排队名额
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _release_pending(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _on_done(self, future):
+        if future.cancelled():
+            self._release_pending()
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            avg = self.total_render_time / finished if finished else 0.0
+            return {
+                "workers": self.max_workers,
+                "queue_size": self.max_queue,
+                "queue_depth": self._pending,
+                "running": self._running,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_ms": avg * 1000,
+                "max_ms": self.max_render_time * 1000,
+                "last_ms": self.last_render_time * 1000,
+            }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (
+            f"渲染线程: {s['workers']}  队列上限: {s['queue_size']}\n"
+            f"排队中: {s['queue_depth']}  执行中: {s['running']}\n"
+            f"已提交: {s['submitted']}  已完成: {s['completed']}  失败: {s['failed']}  拒绝: {s['rejected']}\n"
+            f"渲染耗时: 平均 {s['avg_ms']:.1f}ms  最大 {s['max_ms']:.1f}ms  最近 {s['last_ms']:.1f}ms"
+        )
+
+    def shutdown(self, wait: bool = False, cancel_futures: bool = False):
+        """关闭线程池；cancel_futures 为 True 时取消尚未开始的任务（排队名额由 _on_done 归还）。"""
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
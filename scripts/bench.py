@@ -0,0 +1,431 @@
+"""离线基准测试：分析器、肉质图渲染与两个页面解析器。
+
+用法（在插件目录下）：
+    python scripts/bench.py                 # 运行全部基准并与基线比较
+    python scripts/bench.py --only analyzer # 只运行名称包含 analyzer 的基准
+    python scripts/bench.py --update        # 以本次结果更新基线
+    python scripts/bench.py --synthetic 2000 --parts 30 --states 4  # 在合成数据上测规模
+
+每个基准记录单次操作的最短耗时（多轮取最优，受机器噪声影响最小）与结果摘要：
+- 耗时超过基线 (1 + tolerance) 倍视为性能回退；
+- 结果摘要与基线不一致视为行为变化。
+任一情况出现时以非零状态退出。缺少依赖（Pillow / ncatbot / bs4）的基准会被跳过。
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import (  # noqa: E402
+    PLUGIN_DIR, add_crawler_paths, build_fixture_dataset, load_plugin_package, read_fixture, write_manifests,
+)
+from gen_dataset import generate_dataset  # noqa: E402
+
+sys.path.insert(0, PLUGIN_DIR)
+BASELINE_PATH = os.path.join(PLUGIN_DIR, "scripts", "bench_baselines.json")
+
+BENCHMARKS = []
+
+
+class Skip(Exception):
+    """依赖缺失，跳过该基准。"""
+
+
+def benchmark(name):
+    def deco(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return deco
+
+
+def digest(obj) -> str:
+    data = json.dumps(obj, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+
+# ---------- 分析器 ----------
+def _analyzer(ctx):
+    from analyze import MonsterAnalyzer
+    return MonsterAnalyzer(ctx["data_root"])
+
+
+@benchmark("analyzer.load")
+def bench_analyzer_load(ctx):
+    from analyze import MonsterAnalyzer
+
+    def run():
+        a = MonsterAnalyzer(ctx["data_root"])
+        return sorted((s, len(t)) for s, t in a.meat_data.items())
+    return run
+
+
+@benchmark("analyzer.load_legacy")
+def bench_analyzer_load_legacy(ctx):
+    """旧数据（爬虫原始格式，无 schema_version）的加载，需逐行迁移；迁移结果须与爬取时归一化的相同"""
+    from analyze import MonsterAnalyzer
+    if ctx["custom_data"]:
+        raise Skip("仅用于 fixtures 数据")
+    root = build_fixture_dataset(os.path.join(ctx["tmp"], "legacy"), ctx["roster"], legacy=True)
+    if MonsterAnalyzer(root).meat_data != MonsterAnalyzer(ctx["data_root"]).meat_data:
+        raise SystemExit("analyzer.load_legacy: 迁移结果与通用格式不一致")
+
+    def run():
+        a = MonsterAnalyzer(root)
+        return sorted((s, len(t)) for s, t in a.meat_data.items())
+    return run
+
+
+@benchmark("analyzer.reload_unchanged")
+def bench_analyzer_reload(ctx):
+    """有清单且文件未变时的重新加载（爬取结束后的常见情况）"""
+    import shutil
+    from analyze import MonsterAnalyzer
+    root = os.path.join(ctx["tmp"], "manifest")
+    shutil.copytree(os.path.join(ctx["data_root"], "data"), os.path.join(root, "data"))
+    write_manifests(root)
+    previous = MonsterAnalyzer(root)
+
+    def run():
+        a = MonsterAnalyzer(root, previous=previous)
+        return sorted((s, len(t)) for s, t in a.meat_data.items()) + [a.reused_files]
+    return run
+
+
+@benchmark("analyzer.snapshot_load")
+def bench_analyzer_snapshot(ctx):
+    """从启动快照恢复分析器（重启插件且数据未变时的路径）"""
+    import shutil
+    from analyze import MonsterAnalyzer
+    root = os.path.join(ctx["tmp"], "snapshot")
+    shutil.copytree(os.path.join(ctx["data_root"], "data"), os.path.join(root, "data"))
+    write_manifests(root)
+    if MonsterAnalyzer.load(root).restored_from_snapshot or not MonsterAnalyzer.load(root).restored_from_snapshot:
+        raise SystemExit("analyzer.snapshot_load: 快照未按预期写出或恢复")
+
+    def run():
+        a = MonsterAnalyzer.load(root)
+        return sorted((s, len(t)) for s, t in a.meat_data.items()) + [a.restored_from_snapshot]
+    return run
+
+
+@benchmark("analyzer.weakness_roster")
+def bench_weakness_roster(ctx):
+    analyzer = _analyzer(ctx)
+    roster = [(s, n) for s, table in sorted(analyzer.meat_data.items()) for n in sorted(table)]
+
+    def run():
+        return [analyzer.get_monster_weakness(n, source=s) for s, n in roster]
+    return run
+
+
+@benchmark("analyzer.meat_roster")
+def bench_meat_roster(ctx):
+    analyzer = _analyzer(ctx)
+    roster = [(s, n) for s, table in sorted(analyzer.meat_data.items()) for n in sorted(table)]
+
+    def run():
+        return [analyzer.get_monster_meat(n, source=s) for s, n in roster]
+    return run
+
+
+@benchmark("analyzer.shared_meat_roster")
+def bench_shared_meat_roster(ctx):
+    """肉质表改用共享只读映射（data/hitzone.shared）后的全量肉质查询，结果须与 meat_roster 相同"""
+    import shutil
+    from analyze import MonsterAnalyzer, SharedDataset
+    root = os.path.join(ctx["tmp"], "shared")
+    shutil.copytree(os.path.join(ctx["data_root"], "data"), os.path.join(root, "data"))
+    analyzer = MonsterAnalyzer.load(root, snapshot=False, shared=True)
+    if not isinstance(analyzer.meat_data, SharedDataset) or analyzer.meat_data != _analyzer(ctx).meat_data:
+        raise SystemExit("analyzer.shared_meat_roster: 共享肉质表与原数据不一致")
+    roster = [(s, n) for s, table in sorted(analyzer.meat_data.items()) for n in sorted(table)]
+
+    def run():
+        return [analyzer.get_monster_meat(n, source=s) for s, n in roster]
+    return run
+
+
+@benchmark("analyzer.drop_search")
+def bench_drop_search(ctx):
+    """素材反查：完整素材名、部分匹配与单字查询"""
+    analyzer = _analyzer(ctx)
+    queries = ["火龙的逆鳞", "逆鳞", "宝玉", "冥赤龙之尾", "鳞"]
+
+    def run():
+        return [analyzer.get_material_drops(q) for q in queries]
+    return run
+
+
+@benchmark("analyzer.recommend_build")
+def bench_recommend_build(ctx):
+    """加载时为全部怪物生成得分与排行（analyzer.load 中的这部分开销）"""
+    analyzer = _analyzer(ctx)
+
+    def run():
+        analyzer._build_recommend_index()
+        return [analyzer.recommend.ranking(s, "火")[:3] for s in sorted(analyzer.meat_data)]
+    return run
+
+
+@benchmark("analyzer.recommend")
+def bench_recommend(ctx):
+    """排行、物理比较与多怪物属性推荐（均读取预先计算的排行）"""
+    analyzer = _analyzer(ctx)
+    names = {s: sorted(table)[:5] for s, table in analyzer.meat_data.items()}
+    queries = [(q, s) for s in sorted(names) for q in ("火", "龙", "打>斩", "弹>打")]
+
+    def run():
+        out = [analyzer.get_ranking(q, s, weighted=True) for q, s in queries]
+        out += [analyzer.get_element_recommendation(names[s], s, weighted=True) for s in sorted(names)]
+        return out
+    return run
+
+
+@benchmark("analyzer.damage")
+def bench_damage(ctx):
+    """伤害计算：每只怪物全部部位 + 每个数据源的全图鉴排行（列式表在 setup 中生成）"""
+    analyzer = _analyzer(ctx)
+    table = analyzer.damage_table
+    roster = [(s, n) for s, t in sorted(analyzer.meat_data.items()) for n in sorted(t)]
+    params = {"phys_type": "斩", "element": "雷", "element_value": 25, "motion": 40, "sharpness": 1.32}
+
+    def run():
+        out = [len(table.compute(s, 200, monster=n, **params)) for s, n in roster]
+        out += [table.compute(s, 200, limit=20, **params)[0][:3] for s in sorted(analyzer.meat_data)]
+        return out
+    return run
+
+
+@benchmark("analyzer.status")
+def bench_status(ctx):
+    """异常状态：整个图鉴一次批量计算触发 3 次所需命中数"""
+    analyzer = _analyzer(ctx)
+    names = {s: sorted(t) for s, t in sorted(analyzer.meat_data.items())}
+    build = {"毒": 30, "麻痹": 25, "爆破异常": 20}
+
+    def run():
+        return [analyzer.get_status_applications(n, s, build, times=3) for s, n in names.items()]
+    return run
+
+
+# ---------- 渲染 ----------
+class _NoCache:
+    """渲染基准不使用缓存，保证每次都完整渲染。"""
+
+    def get(self, key, touch=True):
+        return None
+
+    def add_file(self, path, ctype=None):
+        return path
+
+    def lock(self, key):
+        return contextlib.nullcontext(True)
+
+
+def _renderer(ctx, with_background: bool):
+    try:
+        from PIL import Image as PILImage
+        package = load_plugin_package()
+    except ImportError as e:
+        raise Skip(f"缺少依赖: {e}")
+    from pathlib import Path
+    plugin_cls = package.mh
+    plugin = plugin_cls.__new__(plugin_cls)
+    plugin.analyzer = _analyzer(ctx)
+    plugin.image_cache_dir = Path(ctx["tmp"]) / "render"
+    plugin.image_cache_dir.mkdir(exist_ok=True)
+    plugin.image_cache = _NoCache()
+
+    source = "mhws"
+    name = sorted(plugin.analyzer.meat_data[source])[0]
+    payload, err = plugin._build_meat_table_payload(name, source)
+    if err:
+        raise Skip(err)
+    payload["background_opacity"] = plugin.meat_background_opacity
+    payload["background_image_path"] = ""
+    if with_background:
+        bg_path = plugin.image_cache_dir / "background.png"
+        PILImage.radial_gradient("L").resize((640, 480)).convert("RGBA").save(bg_path)
+        payload["background_image_path"] = str(bg_path)
+
+    def run():
+        path = plugin._render_meat_table_image(payload)
+        with PILImage.open(path) as im:
+            return im.size
+    return run
+
+
+@benchmark("render.meat_table")
+def bench_render_plain(ctx):
+    return _renderer(ctx, with_background=False)
+
+
+@benchmark("render.meat_table_background")
+def bench_render_background(ctx):
+    return _renderer(ctx, with_background=True)
+
+
+# ---------- 解析器 ----------
+@benchmark("parser.mhws_monster_page")
+def bench_mhws_parser(ctx):
+    add_crawler_paths()
+    try:
+        from monster_parser import MonsterParser
+    except ImportError as e:
+        raise Skip(f"缺少依赖: {e}")
+    html = read_fixture("html/mhws_monster.html")
+    return lambda: MonsterParser().parse_monster_page(html)
+
+
+@benchmark("parser.mhwi_monster_page")
+def bench_mhwi_parser(ctx):
+    add_crawler_paths()
+    try:
+        from mhwi_parser import MHWParser
+    except ImportError as e:
+        raise Skip(f"缺少依赖: {e}")
+    html = read_fixture("html/mhwi_monster.html")
+    return lambda: MHWParser().parse_monster_page(html, "https://mhworld.kiranico.com/zh/monsters/x")
+
+
+def _list_page(source, rows=200):
+    """把列表页 fixture 中的样例行复制成 rows 行"""
+    from fixture_server import ROWS_RE, SITES
+    site = SITES[source]
+    html = read_fixture(site["list_fixture"])
+    row = ROWS_RE.search(html).group(1)
+    body = "".join(row.replace(site["slug"], f"{site['slug']}-{i:03d}").replace(site["name"], f"{site['name']}{i:03d}")
+                   for i in range(rows))
+    return ROWS_RE.sub(lambda _: body, html)
+
+
+@benchmark("parser.mhws_monster_list")
+def bench_mhws_list_parser(ctx):
+    add_crawler_paths()
+    try:
+        from monster_parser import MonsterParser
+        html = _list_page("mhws")
+    except ImportError as e:
+        raise Skip(f"缺少依赖: {e}")
+    return lambda: MonsterParser().parse_monster_list(html)
+
+
+@benchmark("parser.mhwi_monster_list")
+def bench_mhwi_list_parser(ctx):
+    add_crawler_paths()
+    try:
+        from mhwi_parser import MHWParser
+        html = _list_page("mhwi")
+    except ImportError as e:
+        raise Skip(f"缺少依赖: {e}")
+    return lambda: [{k: v for k, v in m.items() if k != "raw"} for m in MHWParser().parse_monster_list(html)]
+
+
+# ---------- 运行 ----------
+def measure(fn, repeat: int, min_run_s: float = 0.05):
+    """先校准每轮循环次数，使每轮至少 min_run_s 秒，返回 (单次最短耗时, 结果)。"""
+    result = fn()  # 预热
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        cost = time.perf_counter() - start
+        if cost >= min_run_s or number >= 1 << 16:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return min(samples), result
+
+
+def _fmt_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.1f}µs"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", default="", help="只运行名称包含该字符串的基准")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--roster", type=int, default=60, help="每个数据源的怪物数量")
+    ap.add_argument("--data", default="", help="使用已有的插件数据目录（包含 data/ 子目录），默认用 fixtures 生成")
+    ap.add_argument("--synthetic", type=int, default=0, help="改用 gen_dataset 生成该数量怪物的合成数据")
+    ap.add_argument("--parts", type=int, default=12, help="合成数据每只怪物的部位数")
+    ap.add_argument("--states", type=int, default=3, help="合成数据每个部位的状态数")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="允许的耗时增幅（0.25 即 25%%）")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--update", action="store_true", help="用本次结果覆盖基线")
+    args = ap.parse_args()
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="mh-bench-") as tmp:
+        if args.data:
+            data_root = args.data
+        elif args.synthetic:
+            data_root = generate_dataset(tmp, args.synthetic, args.parts, args.states)
+        else:
+            data_root = build_fixture_dataset(tmp, args.roster)
+        custom_data = bool(args.data or args.synthetic)
+        ctx = {"tmp": tmp, "data_root": data_root, "roster": args.roster, "custom_data": custom_data}
+        results = {}
+        for name, setup in BENCHMARKS:
+            if args.only and args.only not in name:
+                continue
+            try:
+                fn = setup(ctx)
+            except Skip as e:
+                print(f"{name:32s} 跳过（{e}）")
+                continue
+            best, result = measure(fn, args.repeat)
+            entry = {"best_s": best, "digest": digest(result), "roster": args.roster}
+            results[name] = entry
+
+            base = baselines.get(name)
+            status = "无基线"
+            if base and (custom_data or base.get("roster") != args.roster):
+                status = "数据规模与基线不同，不比较"
+            elif base:
+                ratio = best / base["best_s"] if base.get("best_s") else 1.0
+                status = f"{ratio:5.2f}x 基线"
+                if ratio > 1 + args.tolerance:
+                    status += "  ⚠ 性能回退"
+                    failures += 1
+                if base.get("digest") != entry["digest"]:
+                    status += "  ⚠ 结果变化"
+                    failures += 1
+            print(f"{name:32s} {_fmt_time(best):>10s}  {status}")
+
+    if args.update:
+        if custom_data:
+            print("使用 --data / --synthetic 时不更新基线")
+            return 0
+        baselines.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"基线已更新: {args.baseline}")
+        return 0
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
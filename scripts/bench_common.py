@@ -0,0 +1,89 @@
+"""基准/压测脚本共用的工具：定位插件目录、以包形式加载插件、准备离线数据。"""
+import copy
+import importlib.util
+import json
+import os
+import sys
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(PLUGIN_DIR, "scripts", "fixtures")
+PLUGIN_PACKAGE = "mh_plugin"
+
+
+def load_plugin_package():
+    """把插件目录作为包 `mh_plugin` 导入（插件内部使用相对导入），返回包模块。"""
+    if PLUGIN_PACKAGE in sys.modules:
+        return sys.modules[PLUGIN_PACKAGE]
+    spec = importlib.util.spec_from_file_location(
+        PLUGIN_PACKAGE, os.path.join(PLUGIN_DIR, "__init__.py"), submodule_search_locations=[PLUGIN_DIR]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PLUGIN_PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def add_crawler_paths():
+    """爬虫模块以脚本方式互相导入，需要把两个 src 目录加入 sys.path。"""
+    for sub in ("mhws_Wiki_Crawler", "mhwi_Wiki_Crawler"):
+        path = os.path.join(PLUGIN_DIR, sub, "src")
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def read_fixture(name: str, mode: str = "r"):
+    path = os.path.join(FIXTURES_DIR, name)
+    if "b" in mode:
+        with open(path, mode) as f:
+            return f.read()
+    with open(path, mode, encoding="utf-8") as f:
+        return f.read()
+
+
+def write_manifests(root: str):
+    """为 root/data/ 下的每个数据源生成清单（与爬虫结束时写出的格式相同）。"""
+    add_crawler_paths()
+    from dataset_writer import MANIFEST_NAME, DatasetWriter
+    base = os.path.join(root, "data")
+    for source in sorted(os.listdir(base)):
+        src_dir = os.path.join(base, source)
+        if not os.path.isdir(src_dir):
+            continue
+        writer = DatasetWriter(src_dir, source)
+        for fname in sorted(os.listdir(src_dir)):
+            if fname.endswith(".json") and fname != MANIFEST_NAME:
+                writer.record_file(fname)
+        writer.write_manifest()
+    return root
+
+
+def build_fixture_dataset(root: str, roster: int = 60, legacy: bool = False):
+    """用 fixtures 中的样例怪物复制出 roster 只怪物，写入 root/data/<源>/。
+
+    样例为爬虫解析出的原始格式，默认与爬虫一样归一化为通用格式后写出；legacy 为 True 时原样写出（旧数据）。
+    返回 root，可直接作为 MonsterAnalyzer(root) 的参数。
+    """
+    add_crawler_paths()
+    from dataset_schema import normalize_monster
+    for source in ("mhws", "mhwi"):
+        template = json.loads(read_fixture(f"{source}_monster.json"))
+        src_dir = os.path.join(root, "data", source)
+        os.makedirs(src_dir, exist_ok=True)
+        monster_list = []
+        for i in range(roster):
+            monster = copy.deepcopy(template)
+            name = f"{template['name']}{i:03d}"
+            monster["name"] = name
+            if not legacy:
+                monster = normalize_monster(monster, source)
+            with open(os.path.join(src_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(monster, f, ensure_ascii=False)
+            monster_list.append({
+                "name": name,
+                "url": f"/monsters/{source}-{i:03d}",
+                "image": f"https://example.invalid/{source}/{i:03d}.png",
+                "description": template.get("description", ""),
+            })
+        with open(os.path.join(src_dir, "monster_list.json"), "w", encoding="utf-8") as f:
+            json.dump(monster_list, f, ensure_ascii=False)
+    return root
@@ -0,0 +1,130 @@
+"""群消息分发微基准：对比旧的顺序 if 链与 CommandDispatcher 的单条消息开销。
+
+用法（在插件目录下）：python scripts/bench_dispatch.py [--messages 20000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dispatch import CommandDispatcher  # noqa: E402
+
+is_mhw_team_code = re.compile(r'^[A-Za-z0-9!#$%&+\-=?@^_`~]{12}$')
+is_mhr_team_code = re.compile(r'^[A-Za-z0-9!#$%&+\-=?@^_`~]{16}$')
+
+EXACT = ["/helpMH", "/helpmh", "/查询", "/删除mhw", "/删除mhr", "/清空", "/爬取ws", "/爬取wi", "/渲染状态", "/怪物列表"]
+WITH_ARG = ["/ws简介", "/wi简介", "/ws弱点", "/wi弱点", "/简介", "/弱点", "/ws肉质", "/wi肉质", "/肉质"]
+
+CHAT = [
+    "哈哈哈哈", "今晚谁来打历战", "有人一起吗", "刚出了金狮子的红玉！", "这个太刀配装怎么搞",
+    "老火龙好难啊", "[CQ:image,file=abc.image]", "求带", "在吗", "吃饭去了", "6", "？？？",
+    "冰咒龙的肉质是多少来着", "你们用什么武器", "收到", "OK", "好的好的", "我先下了，明天见",
+    "这个版本弓太强了", "[CQ:face,id=178]", "http://example.com/some/long/link?x=1",
+    "开黑开黑", "谁有雌火龙的逆鳞", "麻了", "笑死", "明天更新吗", "dddd", "Good game",
+]
+MONSTERS = ["雌火龙", "火龙", "冰咒龙", "金狮子", "冥赤龙", "煌黑龙", "灭尽龙", "麒麟"]
+
+
+def _random_code(rng, n):
+    alphabet = "ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnpqrstuvwxyz23456789#$%&+-=?@"
+    return "".join(rng.choice(alphabet) for _ in range(n))
+
+
+def build_corpus(size: int, seed: int = 811):
+    """约 90% 普通聊天、5% 命令、5% 集会码或与集会码等长的普通文本。"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        r = rng.random()
+        if r < 0.90:
+            corpus.append(rng.choice(CHAT))
+        elif r < 0.93:
+            corpus.append(f"{rng.choice(WITH_ARG)} {rng.choice(MONSTERS)}")
+        elif r < 0.95:
+            corpus.append(rng.choice(EXACT))
+        elif r < 0.97:
+            corpus.append(_random_code(rng, rng.choice((12, 16))))
+        else:
+            corpus.append(rng.choice(("twelve chars", "有十二个字的一句普通聊天吗", "sixteen chars!!!")))
+    return corpus
+
+
+def legacy_route(text):
+    """旧版 on_group_message 的判断顺序（只做匹配，不执行）。"""
+    hit = None
+    if text == "/helpMH" or text == "/helpmh":
+        hit = "help"
+    if is_mhw_team_code.match(text):
+        hit = "mhw"
+    if is_mhr_team_code.match(text):
+        hit = "mhr"
+    if text == "/查询":
+        hit = "query"
+    if text == "/删除mhw":
+        hit = "del_mhw"
+    if text == "/删除mhr":
+        hit = "del_mhr"
+    if text == "/清空":
+        hit = "clear"
+    if text == "/爬取ws":
+        return "crawl_ws"
+    if text == "/爬取wi":
+        return "crawl_wi"
+    if text == "/渲染状态":
+        return "render_stats"
+    if text.strip() == "/怪物列表":
+        return "list"
+    for prefix in ("/ws简介 ", "/wi简介 ", "/ws弱点 ", "/wi弱点 ", "/简介 ", "/弱点 ", "/ws肉质 ", "/wi肉质 ", "/肉质 "):
+        if text.startswith(prefix):
+            return prefix
+    return hit
+
+
+def build_dispatcher():
+    d = CommandDispatcher()
+    noop = object()
+    d.pattern(12, is_mhw_team_code, noop)
+    d.pattern(16, is_mhr_team_code, noop)
+    for cmd in EXACT:
+        d.exact(cmd, noop)
+    for cmd in WITH_ARG:
+        d.with_arg(cmd, noop)
+    return d
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    corpus = build_corpus(args.messages)
+    dispatcher = build_dispatcher()
+
+    # 两种实现对同一语料的命中结果应一致
+    mismatches = sum(1 for t in corpus if (legacy_route(t) is None) != (dispatcher.resolve(t) is None))
+    if mismatches:
+        print(f"警告: {mismatches} 条消息两种实现判定不一致")
+
+    def run_legacy():
+        for t in corpus:
+            legacy_route(t)
+
+    def run_dispatch():
+        resolve = dispatcher.resolve
+        for t in corpus:
+            resolve(t)
+
+    results = {}
+    for name, fn in (("if 链", run_legacy), ("分发表", run_dispatch)):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        results[name] = best / len(corpus) * 1e9
+        print(f"{name:6s}: {results[name]:8.1f} ns/条  ({len(corpus)} 条消息, 取 {args.repeat} 次最优)")
+    print(f"加速比: {results['if 链'] / results['分发表']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""多进程图片缓存检查：N 个 worker 进程共用同一个 ImageCache 目录，并发"渲染"同一批图片。
+
+每个 worker 以不同顺序遍历全部键：未命中时取得该键的跨进程锁并再次查询，仍未命中才生成 PNG
+（--render-ms 模拟渲染耗时）并写入缓存。结束后检查：
+- 缓存容得下全部图片时，每个键只被生成一次（其余进程命中他人的结果）；
+- 索引与目录一致：每个条目的文件存在且完整，目录中没有未登记的图片或残留的临时文件；
+- 索引中的总字节数不超过上限（--max-kb 小于总量时验证多进程协同淘汰）。
+
+用法（在插件目录下）：
+    python scripts/cache_check.py --workers 4 --keys 200
+    python scripts/cache_check.py --workers 4 --keys 200 --max-kb 300
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import load_plugin_package  # noqa: E402
+
+
+def _png(key: str) -> bytes:
+    from PIL import Image as PILImage
+    seed = int(key[-6:], 16)
+    image = PILImage.new("RGB", (64, 64), (seed & 255, (seed >> 8) & 255, (seed >> 16) & 255))
+    # 加入噪声让每张图大小不同
+    rng = random.Random(seed)
+    for _ in range(200):
+        image.putpixel((rng.randrange(64), rng.randrange(64)), (rng.randrange(256),) * 3)
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _worker(cache_dir, keys, max_bytes, render_ms, seed, start, results):
+    ImageCache = load_plugin_package().image_cache.ImageCache
+    cache = ImageCache(cache_dir, max_bytes=max_bytes, save_interval=0.5)
+    order = list(keys)
+    random.Random(seed).shuffle(order)
+    start.wait()
+    produced = 0
+    t = time.perf_counter()
+    for key in order:
+        if cache.get(key):
+            continue
+        with cache.lock(key):
+            if cache.get(key):
+                continue
+            time.sleep(render_ms / 1000)
+            if cache.put_bytes(key, _png(key)):
+                produced += 1
+    elapsed = time.perf_counter() - t
+    stats = cache.stats()
+    cache.close()
+    results.put((produced, elapsed, stats))
+
+
+def check_consistency(cache_dir: Path, max_bytes: int):
+    ImageCache = load_plugin_package().image_cache.ImageCache
+    cache = ImageCache(cache_dir, max_bytes=max_bytes)
+    rows = cache._conn.execute("SELECT key, file, size FROM entries").fetchall()
+    problems = []
+    files = {p.name for p in cache_dir.iterdir() if p.is_file()}
+    for key, name, size in rows:
+        if name not in files or not ImageCache._validate_file(cache_dir / name, size):
+            problems.append(f"条目 {key} 的文件缺失或损坏")
+    for name in files - {r[1] for r in rows}:
+        problems.append(f"未登记的文件 {name}")
+    total = sum(r[2] for r in rows)
+    if total > max_bytes:
+        problems.append(f"总字节数 {total} 超过上限 {max_bytes}")
+    cache.close()
+    return len(rows), total, problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--keys", type=int, default=200)
+    ap.add_argument("--render-ms", type=float, default=5.0, help="模拟每张图的渲染耗时（毫秒）")
+    ap.add_argument("--max-kb", type=int, default=0, help="缓存字节上限（KiB），默认 0 为不限")
+    ap.add_argument("--seed", type=int, default=811)
+    args = ap.parse_args()
+    try:
+        load_plugin_package()
+    except ImportError as e:
+        raise SystemExit(f"缺少依赖: {e}")
+
+    keys = [f"{i:032x}" for i in range(args.keys)]
+    max_bytes = args.max_kb * 1024 if args.max_kb else 1 << 40
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="mh-cache-") as tmp:
+        cache_dir = Path(tmp) / "image_cache"
+        start = ctx.Event()
+        results = ctx.Queue()
+        procs = [ctx.Process(target=_worker, args=(cache_dir, keys, max_bytes, args.render_ms, args.seed + i, start, results))
+                 for i in range(args.workers)]
+        for p in procs:
+            p.start()
+        start.set()
+        rows = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        produced = sum(r[0] for r in rows)
+        for i, (n, elapsed, stats) in enumerate(rows):
+            print(f"worker {i}: 生成 {n:4d}  命中 {stats['hits']:4d}  等待其它进程 {stats['lock_waits']:4d}  "
+                  f"淘汰 {stats['evictions']:4d}  用时 {elapsed:.2f}s")
+        entries, total, problems = check_consistency(cache_dir, max_bytes)
+        print(f"共生成 {produced} 张（{args.keys} 个键），缓存中 {entries} 个文件 {total / 1024:.1f}KiB")
+        if not args.max_kb and produced != args.keys:
+            problems.append(f"重复生成：{produced} 次生成 {args.keys} 个键")
+        for p in problems:
+            print("  ✗ " + p)
+        if problems:
+            raise SystemExit(1)
+        print("通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""在本地替身服务器上运行两个爬虫，验证重试/退避行为并测量吞吐。
+
+每个场景启动一个 FixtureServer（见 fixture_server.py），把爬虫指向它并写入临时目录，然后对比爬取报告与预期。
+异步传输（两个爬虫共用的 AsyncHttpUtils，crawl_async）：
+- clean：无故障，全部页面成功、零重试
+- 5xx：每个路径前 1 次返回 503，每个页面重试一次后成功
+- retry-after：同上，但响应带 Retry-After: 1，重试前必须等待该时长
+- timeout：每个路径前 1 次挂起，客户端超时后重试成功
+- tls：自签名证书，首个请求证书校验失败后该主机改为不校验，之后不再重试
+- budget：每个路径前 1 次返回 503，全局重试预算为 5，超出预算的页面直接失败
+- load：按 --latency 注入延迟，只报告吞吐、传输字节数与解析耗时，不做断言
+同步传输（mhws 的 HttpUtils 与 mhwi 的 urllib3 Retry，顺序执行的 crawl）：
+- sync-clean：无故障，全部页面成功、零重试
+- sync-5xx：每个路径前 1 次返回 503，HttpUtils 与 urllib3 Retry 各重试一次后成功
+- sync-timeout：每个路径前 1 次挂起，客户端超时后重试成功
+- sync-tls：自签名证书，HttpUtils 与异步传输一样在首个请求失败后对该主机降级，之后不再重试；mhwi 没有降级逻辑，列表页即失败
+- sync-budget：同 budget，HttpUtils 与异步传输共用重试预算逻辑；mhwi 的 urllib3 Retry 没有全局预算，只报告不断言
+崩溃恢复（crash）：先完整爬取一次，再进行两次内容有变化的爬取——
+- 第一次在保存一半怪物后中断：分析器应仍加载第一次的完整数据，没有被跳过的文件；
+- 第二次在清单写入暂存目录后、文件移入前中断：分析器按暂存目录中已提交的清单读取全部新数据，但不移动文件；
+  之后再次爬取创建 DatasetWriter 时完成移入。
+--no-compress 让服务器不返回 gzip 页面，用于比较压缩前后的传输量。
+
+用法（在插件目录下）：
+    python scripts/crawl_check.py                   # 运行全部场景
+    python scripts/crawl_check.py --only load --roster 200 --concurrency 16
+任一场景与预期不符时以非零状态退出。
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import PLUGIN_DIR, add_crawler_paths  # noqa: E402
+from fixture_server import FaultPlan, FixtureServer, serve_in_thread  # noqa: E402
+
+CLIENT_TIMEOUT = 0.5
+
+
+def _crawl_sync(source, server, data_dir, retry_budget):
+    add_crawler_paths()
+    if source == "mhws":
+        import mhws_crawler
+        from http_utils import HttpUtils
+        http = HttpUtils(retry_times=3, retry_interval=0.01, timeout=CLIENT_TIMEOUT, retry_budget=retry_budget)
+        crawler = mhws_crawler.MHWSCrawler(server.base_url(source), mhws_crawler.CrawlReport(source), data_dir, http_utils=http)
+    else:
+        import mhwi_crawler
+        from urllib3.util.retry import Retry
+        retries = Retry(total=3, backoff_factor=0.01, status_forcelist=(500, 502, 503, 504))
+        crawler = mhwi_crawler.MHWICrawler(server.base_url(source), mhwi_crawler.CrawlReport(source), data_dir,
+                                           retries=retries, timeout=CLIENT_TIMEOUT)
+    crawler.crawl()
+    crawler.report.finish()
+    return crawler.report
+
+
+def _crawl(source, server, data_dir, concurrency, retry_budget, sync=False):
+    if sync:
+        return _crawl_sync(source, server, data_dir, retry_budget)
+    add_crawler_paths()
+    from async_http_utils import AsyncHttpUtils
+    import mhwi_crawler
+    import mhws_crawler
+    module = mhws_crawler if source == "mhws" else mhwi_crawler
+    http = AsyncHttpUtils(retry_times=3, retry_interval=0.02, timeout=CLIENT_TIMEOUT, retry_budget=retry_budget)
+    return module.main(base_url=server.base_url(source), data_dir=data_dir, async_http_utils=http, concurrency=concurrency)
+
+
+def _expect(retries, failures=lambda n: 0, min_elapsed=0.0):
+    """retries / failures 为以页面数（含列表页）为参数的函数"""
+    def check(summary, roster, elapsed):
+        pages = roster + 1
+        problems = []
+        if summary["pages"] != pages:
+            problems.append(f"应请求 {pages} 个页面，实际 {summary['pages']} 个")
+        if summary["failures"] != failures(pages):
+            problems.append(f"应失败 {failures(pages)} 个，实际 {summary['failures']} 个")
+        if summary["retries"] != retries(pages):
+            problems.append(f"应重试 {retries(pages)} 次，实际 {summary['retries']} 次")
+        if elapsed < min_elapsed:
+            problems.append(f"耗时 {elapsed:.2f}s 少于 Retry-After 要求的 {min_elapsed}s")
+        return problems
+    return check
+
+
+def _expect_list_failure(summary, roster, elapsed):
+    return [] if summary["failures"] >= 1 and summary["pages"] == 1 else [f"应在列表页失败，实际 {summary}"]
+
+
+BUDGET = 5
+# 场景名: (FaultPlan 参数, 是否 TLS, 全局重试预算, 预期或 {数据源: 预期})；sync- 开头的场景使用同步传输
+SCENARIOS = {
+    "clean": (dict(), False, None, _expect(lambda n: 0)),
+    "5xx": (dict(fail_first=1), False, None, _expect(lambda n: n)),
+    "retry-after": (dict(fail_first=1, retry_after=1), False, None, _expect(lambda n: n, min_elapsed=2.0)),
+    "timeout": (dict(fail_first=1, fail_mode="hang", hang=CLIENT_TIMEOUT * 4), False, None, _expect(lambda n: n)),
+    "tls": (dict(), True, None, _expect(lambda n: 1)),
+    "budget": (dict(fail_first=1), False, BUDGET, _expect(lambda n: BUDGET, failures=lambda n: n - BUDGET)),
+    "load": (None, False, None, None),
+    "sync-clean": (dict(), False, None, _expect(lambda n: 0)),
+    "sync-5xx": (dict(fail_first=1), False, None, _expect(lambda n: n)),
+    "sync-timeout": (dict(fail_first=1, fail_mode="hang", hang=CLIENT_TIMEOUT * 4), False, None, _expect(lambda n: n)),
+    "sync-tls": (dict(), True, None, {"mhws": _expect(lambda n: 1), "mhwi": _expect_list_failure}),
+    "sync-budget": (dict(fail_first=1), False, BUDGET, {"mhws": _expect(lambda n: BUDGET, failures=lambda n: n - BUDGET)}),
+}
+
+
+def run_scenario(name, roster, latency, sources, concurrency, compress=True):
+    fault_kwargs, tls, budget, checks = SCENARIOS[name]
+    faults = FaultPlan(latency=latency) if fault_kwargs is None else FaultPlan(**fault_kwargs)
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="mh-crawl-") as tmp, serve_in_thread(FixtureServer(roster, faults, tls=tls, compress=compress)) as server:
+        for source in sources:
+            start = time.perf_counter()
+            report = _crawl(source, server, os.path.join(tmp, source), concurrency, budget, sync=name.startswith("sync-"))
+            elapsed = time.perf_counter() - start
+            summary = report.summary()
+            files = os.listdir(os.path.join(tmp, source))
+            saved = len([f for f in files if f.endswith(".json") and f not in ("monster_list.json", "manifest.json")])
+            check = checks.get(source) if isinstance(checks, dict) else checks
+            problems = check(summary, roster, elapsed) if check else []
+            # 列表页失败时不写出任何文件
+            listed = summary["pages"] == roster + 1
+            if check and listed and saved != roster - summary["failures"]:
+                problems.append(f"应保存 {roster - summary['failures']} 个怪物文件，实际 {saved} 个")
+            if check and listed and "manifest.json" not in files:
+                problems.append("爬取结束后没有写出 manifest.json")
+            status = "通过" if not problems else "失败：" + "；".join(problems)
+            print(f"{name:12s} {source}  {summary['pages']:4d} 页 {elapsed:6.2f}s "
+                  f"({summary['pages'] / elapsed:6.1f} 页/s)  传输 {summary['wire_bytes'] / 1024:7.1f}KiB  "
+                  f"解析 {summary['parse_s_total']:5.2f}s  重试 {summary['retries']:3d}  "
+                  f"失败 {summary['failures']:3d}  {status}")
+            failures += bool(problems)
+        print(f"{'':12s} 服务器: {server.stats()}")
+    return failures
+
+
+class _Crash(BaseException):
+    """模拟进程中途退出（不被爬虫的 except Exception 吞掉）"""
+
+
+def _crash_crawl(source, server, data_dir, concurrency, crash_after=None, crash_in_commit=False):
+    """内容有变化（description 改为 v2）的一次爬取，保存 crash_after 个怪物后或提交移入前中断"""
+    add_crawler_paths()
+    import dataset_writer
+    from async_http_utils import AsyncHttpUtils
+    import mhwi_crawler
+    import mhws_crawler
+    module = mhws_crawler if source == "mhws" else mhwi_crawler
+    cls = module.MHWSCrawler if source == "mhws" else module.MHWICrawler
+    http = AsyncHttpUtils(retry_times=3, retry_interval=0.02, timeout=CLIENT_TIMEOUT)
+    crawler = cls(server.base_url(source), module.CrawlReport(source), data_dir, async_http_utils=http)
+    save, saved = crawler.save_monster_data, []
+
+    def save_changed(data, *args):
+        if crash_after is not None and len(saved) >= crash_after:
+            raise _Crash()
+        saved.append(data.get("name"))
+        save(dict(data, description="v2"), *args)
+
+    def crash_commit(src_dir):
+        raise _Crash()
+
+    crawler.save_monster_data = save_changed
+    commit = dataset_writer.commit_staging
+    if crash_in_commit:
+        dataset_writer.commit_staging = crash_commit
+    try:
+        asyncio.run(crawler.crawl_async(concurrency))
+    except _Crash:
+        pass
+    finally:
+        dataset_writer.commit_staging = commit
+
+
+def _count_v2(data_dir):
+    """返回 (数据源目录中的怪物文件数, 其中为 v2 数据的文件数)"""
+    files = [f for f in os.listdir(data_dir) if f.endswith(".json") and f not in ("monster_list.json", "manifest.json")]
+    with_v2 = 0
+    for f in files:
+        with open(os.path.join(data_dir, f), encoding="utf-8") as fp:
+            with_v2 += '"description":"v2"' in fp.read()
+    return len(files), with_v2
+
+
+def run_crash_scenario(roster, sources, concurrency):
+    if PLUGIN_DIR not in sys.path:
+        sys.path.insert(0, PLUGIN_DIR)
+    from analyze import MonsterAnalyzer
+    from dataset_schema import read_committed_manifest
+    from dataset_writer import DatasetWriter
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="mh-crawl-") as tmp, serve_in_thread(FixtureServer(roster, FaultPlan())) as server:
+        for source in sources:
+            data_dir = os.path.join(tmp, "data", source)
+            _crawl(source, server, data_dir, concurrency, None)
+            problems = []
+            for label, kwargs in (("爬取中断", dict(crash_after=roster // 2)), ("提交中断", dict(crash_in_commit=True))):
+                _crash_crawl(source, server, data_dir, concurrency, **kwargs)
+                manifest, _ = read_committed_manifest(data_dir)
+                analyzer = MonsterAnalyzer(tmp)
+                loaded = len(analyzer.meat_data.get(source, {}))
+                if loaded != roster or analyzer.skipped_files:
+                    problems.append(f"{label}后应加载 {roster} 个怪物，实际 {loaded} 个，跳过 {len(analyzer.skipped_files)} 个文件")
+                if any(manifest["files"].get(f, {}).get("sha256") != cached[0]
+                       for (s, f), cached in analyzer._file_cache.items() if s == source):
+                    problems.append(f"{label}后分析器加载的不是已提交的清单中的文件")
+                # 分析器只读：提交中断时暂存文件仍未移入
+                files, with_v2 = _count_v2(data_dir)
+                if with_v2:
+                    problems.append(f"{label}后数据源目录中不应有 v2 数据，实际 {with_v2} 个")
+            # 下一次爬取创建 DatasetWriter 时完成移入
+            DatasetWriter(data_dir, source)
+            files, with_v2 = _count_v2(data_dir)
+            if with_v2 != files:
+                problems.append(f"再次爬取开始后应有 {files} 个文件为 v2 数据，实际 {with_v2} 个")
+            status = "通过" if not problems else "失败：" + "；".join(problems)
+            print(f"{'crash':12s} {source}  {status}")
+            failures += bool(problems)
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", default="", help="只运行该场景（" + "/".join(list(SCENARIOS) + ["crash"]) + "）")
+    ap.add_argument("--roster", type=int, default=10, help="每个站点的怪物数量")
+    ap.add_argument("--latency", type=float, default=0.02, help="load 场景每个请求的延迟（秒）")
+    ap.add_argument("--concurrency", type=int, default=4, help="爬虫同时进行的页面请求数")
+    ap.add_argument("--sources", default="mhws,mhwi")
+    ap.add_argument("--no-compress", action="store_true", help="服务器不返回 gzip 压缩的页面")
+    ap.add_argument("--verbose", action="store_true", help="显示爬虫日志")
+    args = ap.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+        warnings.filterwarnings("ignore")
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()]
+    failures = 0
+    for name in SCENARIOS:
+        if args.only and args.only != name:
+            continue
+        failures += run_scenario(name, args.roster, args.latency, sources, args.concurrency, not args.no_compress)
+    if not args.only or args.only == "crash":
+        failures += run_crash_scenario(args.roster, sources, args.concurrency)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""本地 HTTP 替身服务器：用录制的页面模拟两个 kiranico 站点，供爬虫离线压测与重试验证。
+
+同一个服务器同时提供两个站点的路径：
+- mhws：/zh/data/monsters（列表页）与 /zh/data/monsters/<slug>（怪物页）
+- mhwi：/zh/monsters（列表页）与 /zh/monsters/<slug>（怪物页）
+列表页由 fixtures/html/*_list.html 中 <!-- rows --> 标记内的样例行复制出 roster 行，
+怪物页使用 fixtures/html/*_monster.html 并替换怪物名，保证每只怪物的输出文件不同。
+
+故障注入（FaultPlan）：
+- latency / jitter：每个请求的固定延迟与随机抖动（秒）
+- error_rate / error_status / retry_after：按概率返回 5xx，可附带 Retry-After 头
+- timeout_rate / hang：按概率挂起 hang 秒不响应，让客户端超时
+- fail_first / fail_mode：每个路径的前 N 次请求必定失败（error 或 hang），用于确定性地验证重试次数
+- tls：以自签名证书提供 HTTPS，客户端的证书校验必定失败（需要 openssl 命令）
+客户端声明 Accept-Encoding: gzip 时返回预先压缩的页面（--no-compress 关闭），用于比较传输字节数。
+按概率注入的故障由 seed 决定，顺序爬取时结果可复现。
+
+用法（在插件目录下）：
+    python scripts/fixture_server.py --roster 50 --latency 0.05 --fail-first 1
+    python mhws_Wiki_Crawler/src/mhws_crawler.py --base-url http://127.0.0.1:8811/zh/data/monsters --data-dir /tmp/mh-crawl/mhws
+GET /__stats 返回各路径的请求次数与注入的故障数。
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import re
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import read_fixture  # noqa: E402
+
+SITES = {
+    "mhws": {
+        "list_path": "/zh/data/monsters",
+        "list_fixture": "html/mhws_list.html",
+        "page_fixture": "html/mhws_monster.html",
+        "name": "雌火龙",
+        "slug": "ci-huo-long",
+    },
+    "mhwi": {
+        "list_path": "/zh/monsters",
+        "list_fixture": "html/mhwi_list.html",
+        "page_fixture": "html/mhwi_monster.html",
+        "name": "冥赤龙",
+        "slug": "safi-jiiva",
+    },
+}
+ROWS_RE = re.compile(r"<!-- rows -->\n(.*?)<!-- /rows -->\n", re.S)
+
+
+class FaultPlan:
+    """决定每个请求是正常返回、返回错误还是挂起，以及额外延迟多久。"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, retry_after=None,
+                 timeout_rate=0.0, hang=30.0, fail_first=0, fail_mode="error", seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.fail_first = fail_first
+        self.fail_mode = fail_mode
+        self._rng = random.Random(seed)
+
+    def decide(self, hit: int):
+        """hit 为该路径此前的请求次数，返回 (动作, 延迟秒数)，动作为 ok/error/hang。"""
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if hit < self.fail_first:
+            return self.fail_mode, delay
+        roll = self._rng.random()
+        if roll < self.timeout_rate:
+            return "hang", delay
+        if roll < self.timeout_rate + self.error_rate:
+            return "error", delay
+        return "ok", delay
+
+
+def _build_pages(roster: int):
+    """预先生成全部页面，返回 {路径: HTML 字节}。"""
+    pages = {}
+    for source, site in SITES.items():
+        list_html = read_fixture(site["list_fixture"])
+        row = ROWS_RE.search(list_html).group(1)
+        page_html = read_fixture(site["page_fixture"])
+        rows = []
+        for i in range(roster):
+            name = f"{site['name']}{i:03d}"
+            slug = f"{site['slug']}-{i:03d}"
+            rows.append(row.replace(site["slug"], slug).replace(site["name"], name))
+            pages[f"{site['list_path']}/{slug}"] = page_html.replace(site["name"], name).encode("utf-8")
+        pages[site["list_path"]] = ROWS_RE.sub(lambda _: "".join(rows), list_html).encode("utf-8")
+    return pages
+
+
+def _self_signed_context(workdir: str) -> ssl.SSLContext:
+    cert = os.path.join(workdir, "cert.pem")
+    key = os.path.join(workdir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", key, "-out", cert,
+         "-days", "1", "-subj", "/CN=localhost"],
+        check=True, capture_output=True,
+    )
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert, key)
+    return ctx
+
+
+class FixtureServer:
+    """aiohttp 替身服务器，start() 后通过 base_url(source) 取得爬虫的列表页 URL。"""
+
+    def __init__(self, roster=20, faults=None, host="127.0.0.1", port=0, tls=False, compress=True):
+        self.roster = roster
+        self.compress = compress
+        self.faults = faults or FaultPlan()
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.hits = Counter()
+        self.injected = Counter()
+        self._pages = _build_pages(roster)
+        self._gzipped = {path: gzip.compress(body, 6) for path, body in self._pages.items()} if compress else {}
+        self.bytes_sent = 0
+        self._runner = None
+        self._closing = None
+        self._tmpdir = None
+
+    def base_url(self, source: str) -> str:
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://{self.host}:{self.port}{SITES[source]['list_path']}"
+
+    def stats(self) -> dict:
+        return {
+            "requests": sum(self.hits.values()),
+            "paths": len(self.hits),
+            "injected": dict(self.injected),
+            "max_hits_per_path": max(self.hits.values(), default=0),
+            "bytes_sent": self.bytes_sent,
+        }
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        path = request.path.rstrip("/") or "/"
+        if path == "/__stats":
+            return web.json_response(self.stats())
+        body = self._pages.get(path)
+        if body is None:
+            return web.Response(status=404, text="not found")
+        hit = self.hits[path]
+        self.hits[path] += 1
+        action, delay = self.faults.decide(hit)
+        if delay:
+            await asyncio.sleep(delay)
+        if action == "hang":
+            self.injected["hang"] += 1
+            try:
+                await asyncio.wait_for(self._closing.wait(), self.faults.hang)
+            except asyncio.TimeoutError:
+                pass
+            return web.Response(status=504, text="gateway timeout")
+        if action == "error":
+            self.injected["error"] += 1
+            headers = {"Retry-After": str(self.faults.retry_after)} if self.faults.retry_after is not None else None
+            return web.Response(status=self.faults.error_status, text="injected error", headers=headers)
+        headers = None
+        if self.compress and "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = self._gzipped[path]
+            headers = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="text/html", charset="utf-8", headers=headers)
+
+    async def start(self):
+        self._closing = asyncio.Event()
+        ssl_context = None
+        if self.tls:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="mh-fixture-tls-")
+            ssl_context = _self_signed_context(self._tmpdir.name)
+        app = web.Application()
+        app.router.add_route("GET", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        site = web.SockSite(self._runner, sock, ssl_context=ssl_context, shutdown_timeout=1.0)
+        await site.start()
+        return self
+
+    async def stop(self):
+        if self._closing:
+            self._closing.set()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._tmpdir:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+
+@contextmanager
+def serve_in_thread(server: FixtureServer):
+    """在后台线程的事件循环中运行服务器，供同步爬虫使用。"""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    error = []
+
+    def _run():
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(server.start())
+        except Exception as e:  # 启动失败时交给调用方抛出
+            error.append(e)
+            started.set()
+            return
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=_run, name="mh-fixture-server", daemon=True)
+    thread.start()
+    started.wait()
+    if error:
+        loop.close()
+        raise error[0]
+    try:
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def add_fault_arguments(ap: argparse.ArgumentParser):
+    ap.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    ap.add_argument("--jitter", type=float, default=0.0, help="额外的随机延迟上限（秒）")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="返回 5xx 的概率")
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--retry-after", type=int, default=None, help="错误响应附带的 Retry-After（秒）")
+    ap.add_argument("--timeout-rate", type=float, default=0.0, help="挂起不响应的概率")
+    ap.add_argument("--hang", type=float, default=30.0, help="挂起时长（秒）")
+    ap.add_argument("--fail-first", type=int, default=0, help="每个路径的前 N 次请求必定失败")
+    ap.add_argument("--fail-mode", choices=("error", "hang"), default="error")
+    ap.add_argument("--seed", type=int, default=0)
+
+
+def faults_from_args(args) -> FaultPlan:
+    return FaultPlan(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+        retry_after=args.retry_after, timeout_rate=args.timeout_rate, hang=args.hang,
+        fail_first=args.fail_first, fail_mode=args.fail_mode, seed=args.seed,
+    )
+
+
+async def _serve_forever(server: FixtureServer):
+    await server.start()
+    for source in SITES:
+        print(f"{source}: {server.base_url(source)}")
+    print("按 Ctrl+C 退出")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        print(json.dumps(server.stats(), ensure_ascii=False))
+        await server.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8811)
+    ap.add_argument("--roster", type=int, default=20, help="每个站点的怪物数量")
+    ap.add_argument("--tls", action="store_true", help="以自签名证书提供 HTTPS（模拟证书校验失败）")
+    ap.add_argument("--no-compress", action="store_true", help="不返回 gzip 压缩的页面")
+    add_fault_arguments(ap)
+    args = ap.parse_args()
+    server = FixtureServer(args.roster, faults_from_args(args), args.host, args.port, args.tls, not args.no_compress)
+    try:
+        asyncio.run(_serve_forever(server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""离线生成合成怪物数据，用于规模测试。
+
+按爬虫的输出格式写出 <out>/data/<源>/monster_list.json 与每只怪物的 JSON：
+- mhws：与 MonsterParser 输出一致（部位 / 列1 / 斩 打 弹 火 水 雷 冰 龙 晕 / HP）；
+- mhwi：与 MHWParser 输出一致的原始格式（Part "部位 (状态)" / 切断 打击 遥远 / col4..col9）；
+写出前与爬虫一样经 dataset_schema 归一化为带 schema_version 的通用格式，--legacy 时保留原始格式
+（旧数据，加载时由 MonsterAnalyzer 迁移）。
+
+用法（在插件目录下）：
+    python scripts/gen_dataset.py --out /tmp/mh-synth --monsters 2000 --parts 30 --states 4
+生成后可用 `python scripts/bench.py --data /tmp/mh-synth` 在该数据上跑基准。
+注意不要把 --out 指向插件目录本身，以免覆盖真实数据。
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+SYLLABLES = "火 雷 冰 水 龙 冥 赤 金 银 黑 白 苍 紫 岩 霞 风 雪 影 爆 鳞 角 牙 爪 翼 尾 甲".split()
+SUFFIXES = "龙 兽 鸟 蛙 狮 鱼 蛛 猿 虫 狼".split()
+PARTS = ["头部", "颈部", "躯干", "背部", "腹部", "左前脚", "右前脚", "左后脚", "右后脚",
+         "左翼", "右翼", "尾巴", "尾尖", "角", "左爪", "右爪", "胸部", "背鳍"]
+MHWS_STATES = ["", "伤口", "弱点", "愤怒", "破坏后", "硬化", "赤热化", "蓄力"]
+MHWI_STATES = ["基本", "赤热化", "破坏后", "愤怒", "硬化", "软化", "蓄力", "部位破坏"]
+STATUS = [("毒", 180, 120, 660), ("睡眠", 150, 100, 750), ("麻痹", 150, 120, 750),
+          ("爆破异常", 70, 30, 670), ("昏厥", 150, 100, 750), ("减气", 225, 75, 900)]
+
+
+def monster_names(count: int, rng: random.Random):
+    names = []
+    seen = set()
+    while len(names) < count:
+        base = rng.choice(SYLLABLES) + rng.choice(SYLLABLES) + rng.choice(SUFFIXES)
+        name = base if base not in seen else f"{base}{len(names)}"
+        if name in seen:
+            continue
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def part_names(count: int):
+    if count <= len(PARTS):
+        return PARTS[:count]
+    return PARTS + [f"部位{i}" for i in range(len(PARTS) + 1, count + 1)]
+
+
+def _hitzone_values(rng: random.Random):
+    phys = [rng.randint(15, 80) for _ in range(3)]
+    elem = [rng.choice((0, 5, 10, 15, 20, 25, 30)) for _ in range(5)]
+    stun = rng.choice((0, 0, 0, 100))
+    return phys, elem, stun
+
+
+def build_mhws_monster(name, parts, states, rng):
+    hitzone = []
+    for part in parts:
+        for state in MHWS_STATES[:states]:
+            phys, elem, stun = _hitzone_values(rng)
+            row = {"部位": part, "列1": state}
+            for key, value in zip(("斩", "打", "弹", "火", "水", "雷", "冰", "龙", "晕"), phys + elem + [stun]):
+                row[key] = str(value)
+            if not state:
+                row["HP"] = str(rng.randint(3, 30) * 100)
+            hitzone.append(row)
+    return {
+        "name": name,
+        "description": f"{name}是一种用于规模测试的合成怪物。",
+        "base_data": {
+            "Species": rng.choice(("飞龙种", "兽龙种", "牙兽种", "古龙种")),
+            "BaseHealth": str(rng.randint(80, 400) * 100),
+            "HunterRankPoint": str(rng.randint(1, 20) * 30),
+        },
+        "hitzone_data": hitzone,
+        "status_effects": [
+            {"状态": s, "初始值": str(a), "增长": f"+{b}", "最大值": str(c), "持续时间": str(rng.randint(5, 30))}
+            for s, a, b, c in STATUS
+        ],
+        "materials": [
+            {"name": f"{name}的{m}", "description": f"{name}身上取得的{m}。", "rate": f"{rng.randint(1, 40)}%"}
+            for m in ("鳞", "甲壳", "棘", "骨髓", "宝玉")
+        ],
+    }
+
+
+def build_mhwi_monster(name, parts, states, rng, url):
+    hitzone = []
+    for part in parts:
+        for state in MHWI_STATES[:states]:
+            phys, elem, stun = _hitzone_values(rng)
+            row = {"Part": f"{part} ({state})", "切断": str(phys[0]), "打击": str(phys[1]), "遥远": str(phys[2])}
+            for i, value in enumerate(elem + [stun], start=4):
+                row[f"col{i}"] = str(value)
+            row["耐力"] = str(stun)
+            hitzone.append(row)
+    return {
+        "name": name,
+        "description": f"{name}是一种用于规模测试的合成怪物。",
+        "base_data": {"体力": str(rng.randint(80, 400) * 100)},
+        "hitzone_data": hitzone,
+        "status_effects": [],
+        "materials": [{"name": f"{name}的{m}", "rate": f"{rng.randint(1, 40)}%"} for m in ("鳞", "坚壳", "角", "宝玉")],
+        "source_url": url,
+    }
+
+
+def generate_dataset(root: str, monsters: int = 200, parts: int = 12, states: int = 3,
+                     sources=("mhws", "mhwi"), seed: int = 811, indent=None, legacy=False):
+    """在 root/data/<源>/ 下生成合成数据，返回 root。legacy 为 True 时写出未归一化的旧格式。"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_common import add_crawler_paths
+    add_crawler_paths()
+    from dataset_schema import normalize_monster
+    rng = random.Random(seed)
+    names = monster_names(monsters, rng)
+    part_list = part_names(parts)
+    for source in sources:
+        src_dir = os.path.join(root, "data", source)
+        os.makedirs(src_dir, exist_ok=True)
+        listing = []
+        for i, name in enumerate(names):
+            url = f"/zh/monsters/synthetic-{i:05d}"
+            image = f"https://example.invalid/{source}/{i:05d}.png"
+            if source == "mhws":
+                monster = build_mhws_monster(name, part_list, states, rng)
+                listing.append({"image": image, "name": name, "url": url, "description": monster["description"]})
+            else:
+                monster = build_mhwi_monster(name, part_list, states, rng, "https://mhworld.kiranico.com" + url)
+                elements = {f"element_{k}": rng.randint(0, 3) for k in range(1, 6)}
+                listing.append({"name": name, "url": url, "image": image, "elements": elements, "raw": ""})
+            if not legacy:
+                monster = normalize_monster(monster, source)
+            with open(os.path.join(src_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(monster, f, ensure_ascii=False, indent=indent)
+        with open(os.path.join(src_dir, "monster_list.json"), "w", encoding="utf-8") as f:
+            json.dump(listing, f, ensure_ascii=False, indent=indent)
+    return root
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", required=True, help="输出目录（会在其中创建 data/<源>/）")
+    ap.add_argument("--monsters", type=int, default=200, help="每个数据源的怪物数量")
+    ap.add_argument("--parts", type=int, default=12, help="每只怪物的部位数")
+    ap.add_argument("--states", type=int, default=3, help="每个部位的状态数（含正常/基本）")
+    ap.add_argument("--sources", default="mhws,mhwi")
+    ap.add_argument("--seed", type=int, default=811)
+    ap.add_argument("--indent", type=int, default=0, help="JSON 缩进；默认 0 为紧凑格式，与爬虫输出一致")
+    ap.add_argument("--legacy", action="store_true", help="写出爬虫的原始格式（不带 schema_version），用于验证迁移")
+    ap.add_argument("--manifest", action="store_true", help="同时写出带校验和的 manifest.json（与爬虫结束时相同）")
+    args = ap.parse_args()
+
+    plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if os.path.abspath(args.out) == plugin_dir:
+        ap.error("--out 不能是插件目录本身")
+    sources = tuple(s.strip() for s in args.sources.split(",") if s.strip())
+    generate_dataset(args.out, args.monsters, args.parts, args.states, sources, args.seed, args.indent or None, args.legacy)
+    if args.manifest:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from bench_common import write_manifests
+        write_manifests(args.out)
+    rows = args.monsters * args.parts * args.states
+    print(f"已生成 {args.monsters} 只怪物 × {len(sources)} 个数据源（每只 {args.parts} 部位 × {args.states} 状态，共 {rows} 行/源）到 {args.out}/data/")
+
+
+if __name__ == "__main__":
+    main()
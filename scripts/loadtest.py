@@ -0,0 +1,231 @@
+"""端到端压测：在进程内用假的 ncatbot API 与 GroupMessage 驱动 mh 插件。
+
+N 个模拟群并发运行，每个群按 --mix 的比例依次发送闲聊、集会码与 /ws弱点、/ws肉质、/wi简介 等命令；
+需要回复的消息会等待该群收到下一条回复，以此得到端到端延迟（含分发、分析、渲染与发送队列）。
+图片下载被替换为本地生成的 PNG，发送走假 API（可用 --send-latency 模拟网络延迟），全程离线。
+
+用法（在插件目录下）：
+    python scripts/loadtest.py                               # 20 个群，每群 50 条
+    python scripts/loadtest.py --groups 100 --messages 200 --mix chat=40,team=10,weak=20,meat=20,intro=10
+    python scripts/loadtest.py --synthetic 2000 --tracemalloc
+默认关闭限流与请求合并以测量处理能力，--keep-limits 保留插件的默认配置。
+报告吞吐（条/秒）、端到端延迟分位数、峰值内存（RSS，--tracemalloc 时另报 Python 分配峰值）与各阶段耗时。
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import resource
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import build_fixture_dataset, load_plugin_package  # noqa: E402
+from gen_dataset import generate_dataset  # noqa: E402
+
+DEFAULT_MIX = "chat=50,team=15,list=5,weak=15,meat=5,intro=10"
+CHAT = ["今天打什么", "有人一起吗", "哈哈哈", "这个怪好难", "等我一下", "/不存在的命令", "晚上八点集合"]
+TEAM_CODE_CHARS = string.ascii_letters + string.digits + "!#$%&+-=?@^_`~"
+
+
+class FakeGroupMessage:
+    """只提供插件用到的字段。"""
+
+    def __init__(self, group_id, user_id, raw_message):
+        self.group_id = group_id
+        self.user_id = user_id
+        self.raw_message = raw_message
+
+
+class FakeAPI:
+    """记录发送的消息；每个群有一个事件，收到回复时置位，供驱动端测量端到端延迟。"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent = 0
+        self.rich = 0
+        self.chars = 0
+        self._waiters = {}
+
+    def expect_reply(self, group_id) -> asyncio.Event:
+        event = asyncio.Event()
+        self._waiters[group_id] = event
+        return event
+
+    async def post_group_msg(self, group_id, text=None, rtf=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent += 1
+        if rtf is not None:
+            self.rich += 1
+        else:
+            self.chars += len(text or "")
+        event = self._waiters.pop(group_id, None)
+        if event:
+            event.set()
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for item in text.split(","):
+        key, _, weight = item.partition("=")
+        mix[key.strip()] = float(weight)
+    unknown = set(mix) - {"chat", "team", "list", "weak", "meat", "intro"}
+    if unknown:
+        raise SystemExit(f"未知的消息类型: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def make_message(kind, rng, names):
+    """返回 (文本, 是否需要回复)。"""
+    if kind == "chat":
+        return rng.choice(CHAT), False
+    if kind == "team":
+        length = rng.choice((12, 16))
+        return "".join(rng.choice(TEAM_CODE_CHARS) for _ in range(length)), True
+    if kind == "list":
+        return "/查询", True
+    if kind == "weak":
+        return f"/ws弱点 {rng.choice(names['mhws'])}", True
+    if kind == "meat":
+        return f"/ws肉质 {rng.choice(names['mhws'])}", True
+    return f"/wi简介 {rng.choice(names['mhwi'])}", True
+
+
+async def run_group(plugin, api, group_id, count, mix, names, seed, reply_timeout, latencies, counters):
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+    for i in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        text, expects_reply = make_message(kind, rng, names)
+        msg = FakeGroupMessage(group_id, 10000 + rng.randrange(20), text)
+        event = api.expect_reply(group_id) if expects_reply else None
+        start = time.perf_counter()
+        await plugin.on_group_message(msg)
+        if event:
+            try:
+                await asyncio.wait_for(event.wait(), reply_timeout)
+            except asyncio.TimeoutError:
+                counters["no_reply"] += 1
+                continue
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+        counters["done"] += 1
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def build_plugin(root, args, background):
+    package = load_plugin_package()
+    MonsterAnalyzer = importlib.import_module(f"{package.__name__}.analyze").MonsterAnalyzer
+    plugin_cls = package.mh
+    plugin = plugin_cls.__new__(plugin_cls)
+    if not args.keep_limits:
+        unlimited = {"user": (1e9, 1e9), "group": (1e9, 1e9)}
+        plugin.rate_limits = {kind: unlimited for kind in ("text", "render", "crawl")}
+        plugin.coalesce_window = 0.0
+    plugin.warm_cache_after_crawl = False
+    plugin.api = FakeAPI(args.send_latency)
+    await plugin.on_load()
+    plugin.analyzer = MonsterAnalyzer(root)
+
+    async def fake_fetch(url):
+        # 代替网络下载：返回本地背景图，可模拟下载耗时
+        if args.download_latency:
+            await asyncio.sleep(args.download_latency)
+        return background
+    plugin._fetch_image = fake_fetch
+    return plugin
+
+
+async def main_async(args):
+    from PIL import Image as PILImage
+
+    tmp = tempfile.TemporaryDirectory(prefix="mh-load-")
+    cwd = os.getcwd()
+    # 插件以相对路径创建集会码数据库与图片缓存，切换到临时目录避免污染插件目录
+    os.chdir(tmp.name)
+    try:
+        root = os.path.join(tmp.name, "dataset")
+        if args.synthetic:
+            generate_dataset(root, args.synthetic, args.parts, args.states)
+        else:
+            build_fixture_dataset(root, args.roster)
+        background = os.path.join(tmp.name, "background.png")
+        PILImage.radial_gradient("L").resize((640, 480)).convert("RGBA").save(background)
+
+        plugin = await build_plugin(root, args, background)
+        names = {src: sorted(table) for src, table in plugin.analyzer.meat_data.items()}
+        mix = parse_mix(args.mix)
+        latencies = {}
+        counters = {"done": 0, "no_reply": 0}
+
+        if args.tracemalloc:
+            tracemalloc.start()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_group(plugin, plugin.api, 900000 + g, args.messages, mix, names, args.seed + g,
+                      args.reply_timeout, latencies, counters)
+            for g in range(args.groups)
+        ))
+        elapsed = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        traced_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+        if args.tracemalloc:
+            tracemalloc.stop()
+
+        total = args.groups * args.messages
+        print(f"{args.groups} 个群 × {args.messages} 条 = {total} 条消息，用时 {elapsed:.2f}s，"
+              f"吞吐 {total / elapsed:.1f} 条/s（完成 {counters['done']}，未收到回复 {counters['no_reply']}）")
+        all_lat = [v for values in latencies.values() for v in values]
+        print(f"{'类型':8s} {'数量':>6s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}  (ms)")
+        for kind in sorted(latencies) + ["全部"]:
+            values = all_lat if kind == "全部" else latencies[kind]
+            print(f"{kind:8s} {len(values):6d} {percentile(values, 0.5) * 1e3:9.2f} {percentile(values, 0.95) * 1e3:9.2f} "
+                  f"{percentile(values, 0.99) * 1e3:9.2f} {max(values, default=0) * 1e3:9.2f}")
+        # Linux 上 ru_maxrss 单位为 KiB
+        print(f"峰值 RSS {rss_after / 1024:.1f} MiB（压测期间增长 {(rss_after - rss_before) / 1024:.1f} MiB）"
+              + (f"，Python 分配峰值 {traced_peak / 1024 / 1024:.1f} MiB" if traced_peak is not None else ""))
+        api = plugin.api
+        print(f"发送 {api.sent} 次（图片 {api.rich} 次，文本 {api.chars} 字），发送队列 {plugin.outbox.stats()}")
+        print(f"渲染池 {plugin.render_pool.format_stats()}")
+        if args.stages:
+            print(plugin.metrics.format_text())
+
+        await plugin.on_unload()
+    finally:
+        os.chdir(cwd)
+        tmp.cleanup()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--groups", type=int, default=20, help="模拟群数量")
+    ap.add_argument("--messages", type=int, default=50, help="每个群发送的消息数")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="消息类型比例：chat/team/list/weak/meat/intro")
+    ap.add_argument("--roster", type=int, default=60, help="fixtures 生成的每源怪物数量")
+    ap.add_argument("--synthetic", type=int, default=0, help="改用合成数据，指定每源怪物数量")
+    ap.add_argument("--parts", type=int, default=12)
+    ap.add_argument("--states", type=int, default=3)
+    ap.add_argument("--send-latency", type=float, default=0.0, help="假 API 每次发送的延迟（秒）")
+    ap.add_argument("--download-latency", type=float, default=0.0, help="模拟图片下载的延迟（秒）")
+    ap.add_argument("--reply-timeout", type=float, default=30.0)
+    ap.add_argument("--keep-limits", action="store_true", help="保留默认的限流与请求合并")
+    ap.add_argument("--tracemalloc", action="store_true", help="同时统计 Python 分配峰值（会降低吞吐）")
+    ap.add_argument("--stages", action="store_true", help="输出插件记录的各阶段耗时")
+    ap.add_argument("--seed", type=int, default=811)
+    args = ap.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""多进程内存对比：N 个 worker 进程各自加载分析器，比较独立加载与共享只读肉质表（mmap）时每个进程的内存。
+
+每个 worker 用 MonsterAnalyzer.load 加载同一数据目录（--shared 时 shared=True），逐只查询全部怪物的弱点与肉质，
+然后从 /proc/self/status 读取 RssAnon（进程私有内存）与 RssFile（文件映射，共享页缓存中的页计入每个进程）。
+共享模式下第一个 worker 负责导出 data/hitzone.shared，其余进程直接映射。仅支持 Linux。
+
+用法（在插件目录下）：
+    python scripts/shared_check.py --workers 4 --synthetic 1000
+    python scripts/shared_check.py --workers 4 --synthetic 1000 --no-snapshot
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import PLUGIN_DIR, build_fixture_dataset, write_manifests  # noqa: E402
+from gen_dataset import generate_dataset  # noqa: E402
+
+
+def _status_kib(field):
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _worker(root, shared, snapshot, start, results):
+    sys.path.insert(0, PLUGIN_DIR)
+    from analyze import MonsterAnalyzer
+    start.wait()
+    t = time.perf_counter()
+    analyzer = MonsterAnalyzer.load(root, shared=shared, snapshot=snapshot)
+    load_s = time.perf_counter() - t
+    for src, table in analyzer.meat_data.items():
+        for name in table:
+            analyzer.get_monster_weakness(name, source=src)
+            analyzer.get_monster_meat(name, source=src)
+    results.put((os.getpid(), load_s, analyzer.restored_from_snapshot,
+                 _status_kib("RssAnon"), _status_kib("RssFile")))
+
+
+def run(root, workers, shared, snapshot):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    # 第一个进程单独运行，完成快照与共享表的导出，其余进程并发加载
+    rows = []
+    for batch in ([0], range(1, workers)):
+        start = ctx.Event()
+        procs = [ctx.Process(target=_worker, args=(root, shared, snapshot, start, results)) for _ in batch]
+        for p in procs:
+            p.start()
+        start.set()
+        rows += [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--roster", type=int, default=60, help="fixtures 生成的每源怪物数量")
+    ap.add_argument("--synthetic", type=int, default=0, help="改用合成数据，指定每源怪物数量")
+    ap.add_argument("--parts", type=int, default=12)
+    ap.add_argument("--states", type=int, default=3)
+    ap.add_argument("--no-snapshot", action="store_true", help="不使用启动快照")
+    args = ap.parse_args()
+    if not os.path.exists("/proc/self/status"):
+        raise SystemExit("需要 /proc/self/status（Linux）")
+
+    with tempfile.TemporaryDirectory(prefix="mh-shared-") as tmp:
+        for shared in (False, True):
+            root = os.path.join(tmp, "shared" if shared else "private")
+            if args.synthetic:
+                generate_dataset(root, args.synthetic, args.parts, args.states)
+            else:
+                build_fixture_dataset(root, args.roster)
+            write_manifests(root)
+            rows = run(root, args.workers, shared, not args.no_snapshot)
+            label = "共享 mmap" if shared else "独立加载"
+            print(f"{label}：")
+            for i, (pid, load_s, restored, anon, file_) in enumerate(rows):
+                print(f"  worker {i}  加载 {load_s * 1e3:8.1f}ms{'（快照）' if restored else '        '}  "
+                      f"RssAnon {anon / 1024:7.1f} MiB  RssFile {file_ / 1024:6.1f} MiB")
+            later = [r[3] for r in rows[1:]] or [rows[0][3]]
+            print(f"  之后每个 worker 的私有内存约 {sum(later) / len(later) / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class TeamCodeStore:
+    """按群分区持久化集会码（SQLite WAL 模式）。
+
+    每条记录带写入时间，超过 ttl 秒视为过期；每个群每种游戏最多保留
+    max_per_group 条，超出时删除最旧的记录。
+    """
+
+    def __init__(self, db_path, ttl: float = 6 * 3600, max_per_group: int = 20):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_per_group = max_per_group
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS team_codes ("
+            " group_id TEXT NOT NULL,"
+            " game TEXT NOT NULL,"
+            " code TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (group_id, game, code))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_team_codes_group_time"
+            " ON team_codes (group_id, game, created_at)"
+        )
+        self.purge_expired()
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl
+
+    def add(self, group_id, game: str, code: str):
+        """记录集会码；重复发送同一集会码只刷新时间。"""
+        group_id = str(group_id)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO team_codes (group_id, game, code, created_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (group_id, game, code) DO UPDATE SET created_at = excluded.created_at",
+                (group_id, game, code, time.time()),
+            )
+            # 超出上限时删除最旧的记录
+            self._conn.execute(
+                "DELETE FROM team_codes WHERE group_id = ? AND game = ? AND code IN ("
+                " SELECT code FROM team_codes WHERE group_id = ? AND game = ?"
+                " ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (group_id, game, group_id, game, self.max_per_group),
+            )
+
+    def list(self, group_id, game: str) -> list:
+        """返回该群未过期的集会码，按记录时间从旧到新排列。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT code FROM team_codes WHERE group_id = ? AND game = ? AND created_at >= ?"
+                " ORDER BY created_at",
+                (str(group_id), game, self._cutoff()),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def pop_latest(self, group_id, game: str):
+        """删除并返回该群最近一条未过期的集会码，没有时返回 None。"""
+        group_id = str(group_id)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT code FROM team_codes WHERE group_id = ? AND game = ? AND created_at >= ?"
+                " ORDER BY created_at DESC LIMIT 1",
+                (group_id, game, self._cutoff()),
+            ).fetchone()
+            if not row:
+                return None
+            self._conn.execute(
+                "DELETE FROM team_codes WHERE group_id = ? AND game = ? AND code = ?",
+                (group_id, game, row[0]),
+            )
+        return row[0]
+
+    def clear(self, group_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM team_codes WHERE group_id = ?", (str(group_id),))
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM team_codes WHERE created_at < ?", (self._cutoff(),))
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()